@@ -0,0 +1,168 @@
+"""
+Microbenchmarks for the ML inference path.
+
+Times each triage stage at several batch sizes using real rows from
+dataset2/focused_patient_dataset_15k.csv:
+
+    features  build_features per row, concatenated into one frame
+    stage1    stage1_model.predict_proba
+    stage2    scaler.transform + stage2_model.predict_proba
+    shap      _compute_shap_explanation (batch 1 only: it explains one row)
+
+Reports per-row cost (best of --repeat runs) and peak Python-tracked memory
+per stage (tracemalloc; numpy buffers are included, native XGBoost/SHAP
+allocations are not). Results are compared against a JSON baseline and the
+run exits non-zero on regression, so retrained models cannot silently slow
+triage down. A baseline recorded with other batch sizes, repeat count or
+model version is not compared: the run exits with status 2.
+
+Run (from backend/):
+    python -m benchmarks.bench_inference
+    python -m benchmarks.bench_inference --update-baseline
+"""
+import argparse
+import csv
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BACKEND_DIR))
+
+import pandas as pd
+
+from benchmarks.common import DEFAULT_THRESHOLD, load_baseline, write_results, config_mismatch, compare_to_baseline
+
+DATASET = BACKEND_DIR.parent / "dataset2" / "focused_patient_dataset_15k.csv"
+BASELINE_FILE = Path(__file__).resolve().parent / "baseline_inference.json"
+BATCH_SIZES = (1, 16, 256, 4096)
+# Stages whose output covers only the first row of the frame, as at intake; timing
+# them on a larger batch and dividing by its size would understate the cost
+SINGLE_ROW_STAGES = ("shap",)
+
+
+def load_payloads(limit: int) -> list[dict]:
+    """Turn dataset rows into /visits-style payloads."""
+    payloads = []
+    with open(DATASET, newline="", encoding="utf-8") as fh:
+        for row in csv.DictReader(fh):
+            conditions = [c.strip() for c in row["Pre_Existing_Conditions"].split(",")]
+            payloads.append({
+                "age": int(row["Age"]),
+                "gender": row["Gender"],
+                "systolic_bp": int(row["Blood_Pressure"].split("/")[0]),
+                "heart_rate": int(row["Heart_Rate"]),
+                "temperature": float(row["Temperature"]),
+                "symptoms": [s.strip() for s in row["Symptoms"].split(",") if s.strip()],
+                "chronic_conditions": [c for c in conditions if c and c.lower() != "none"],
+            })
+            if len(payloads) >= limit:
+                break
+    return payloads
+
+
+def _stages():
+    from utils import build_features
+    from models_loader import stage1_model, stage2_model, scaler
+    from services.triage_service import _compute_shap_explanation
+
+    def features(payloads, _frame):
+        return pd.concat([build_features(p) for p in payloads], ignore_index=True)
+
+    def stage1(_payloads, frame):
+        return stage1_model.predict_proba(frame)
+
+    def stage2(_payloads, frame):
+        return stage2_model.predict_proba(scaler.transform(frame))
+
+    def shap(_payloads, frame):
+        return _compute_shap_explanation(frame)
+
+    return {"features": features, "stage1": stage1, "stage2": stage2, "shap": shap}
+
+
+def measure(fn, payloads, frame, repeat: int) -> tuple[float, float]:
+    """Best wall time over `repeat` runs (seconds) and peak traced memory (bytes)."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(payloads, frame)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        fn(payloads, frame)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak
+
+
+def benchmark(batch_sizes, repeat: int) -> dict:
+    from utils import build_features
+
+    stages = _stages()
+    payloads_all = load_payloads(max(batch_sizes))
+    frame_all = pd.concat([build_features(p) for p in payloads_all], ignore_index=True)
+
+    results = {}
+    for batch in batch_sizes:
+        payloads = payloads_all[:batch]
+        frame = frame_all.iloc[:batch]
+        for name, fn in stages.items():
+            if batch > 1 and name in SINGLE_ROW_STAGES:
+                continue
+            fn(payloads, frame)  # warm-up (SHAP import, explainer caches)
+            seconds, peak = measure(fn, payloads, frame, repeat)
+            results[f"{name}@{batch}"] = {
+                "per_row_us": round(seconds / batch * 1e6, 2),
+                "total_ms": round(seconds * 1000, 3),
+                "peak_kib": round(peak / 1024, 1),
+            }
+    return results
+
+
+def print_results(results: dict) -> None:
+    cols = ("per_row_us", "total_ms", "peak_kib")
+    width = max(len(name) for name in results) + 2
+    print("stage@batch".ljust(width) + "".join(c.rjust(14) for c in cols))
+    for name, metrics in results.items():
+        print(name.ljust(width) + "".join(str(metrics[c]).rjust(14) for c in cols))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=list(BATCH_SIZES))
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per stage; best run wins")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    from models_loader import model_version
+    config = {"batch_sizes": args.batch_sizes, "repeat": args.repeat, "model_version": model_version}
+    results = benchmark(args.batch_sizes, args.repeat)
+    print_results(results)
+
+    if args.update_baseline:
+        write_results(args.baseline, results, config)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        print(f"No baseline at {args.baseline}; run with --update-baseline to record one.")
+        return 0
+    mismatch = config_mismatch(baseline, config)
+    if mismatch:
+        print(mismatch)
+        return 2
+    regressions = compare_to_baseline(results, baseline, args.threshold)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,201 @@
+"""
+End-to-end intake benchmark.
+
+Seeds a temporary SQLite DB with N doctors and M queued patients, then drives
+the hot endpoints through an in-process ASGI client and records throughput and
+p50/p95/p99 latency per scenario (best of several rounds). Results are compared against a JSON baseline;
+the run exits non-zero when any scenario regresses beyond the threshold, and
+with status 2, without comparing, when the baseline was recorded with other settings.
+
+Run (from backend/):
+    python -m benchmarks.bench_intake                     # compare to baseline
+    python -m benchmarks.bench_intake --update-baseline   # record a new baseline
+
+Baselines are machine-specific: record one on the machine that runs the check.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BACKEND_DIR))
+
+from benchmarks.common import (
+    DEFAULT_THRESHOLD, DEFAULT_TAIL_THRESHOLD, summarize, best_of, load_baseline, write_results,
+    config_mismatch, compare_to_baseline, print_table,
+)
+
+BASELINE_FILE = Path(__file__).resolve().parent / "baseline_intake.json"
+
+DEPARTMENTS = ["General Medicine", "Cardiology", "Pulmonology", "Neurology", "Gastroenterology"]
+SYMPTOMS = [
+    "chest pain", "palpitations", "shortness of breath", "cough", "headache", "dizziness",
+    "numbness", "abdominal pain", "vomiting", "diarrhea", "fever", "weakness",
+]
+CHRONIC = ["hypertension", "diabetes", "heart disease", "asthma", "ckd"]
+
+
+def _random_payload(rng: random.Random) -> dict:
+    return {
+        "age": rng.randint(1, 95),
+        "gender": rng.choice(["Male", "Female"]),
+        "systolic_bp": rng.randint(90, 200),
+        "heart_rate": rng.randint(50, 150),
+        "temperature": round(rng.uniform(36.0, 40.5), 1),
+        "symptoms": rng.sample(SYMPTOMS, rng.randint(1, 3)),
+        "chronic_conditions": rng.sample(CHRONIC, rng.randint(0, 2)),
+        "visit_type": "Walk-In",
+        "full_name": f"Bench Walk-In {rng.randrange(10**6)}",
+        "phone_number": f"555{rng.randrange(10**7):07d}",
+    }
+
+
+async def seed(session_factory, doctors: int, queued: int, rng: random.Random) -> list[str]:
+    """Insert departments, doctors and M queued patients. Returns doctor ids."""
+    from models import (
+        User, Department, Doctor, Patient, Visit, AIAssessment, DoctorAssignment, Queue
+    )
+
+    dept_ids = {name: uuid.uuid4() for name in DEPARTMENTS}
+    doctor_ids = []
+    async with session_factory() as db, db.begin():
+        db.add_all(Department(department_id=d_id, name=name) for name, d_id in dept_ids.items())
+        for i in range(doctors):
+            user = User(
+                user_id=uuid.uuid4(), full_name=f"Bench Doctor {i}", email=f"bench{i}@example.com",
+                password_hash="x", role="Doctor",
+            )
+            doctor = Doctor(
+                doctor_id=uuid.uuid4(), user_id=user.user_id,
+                department_id=dept_ids[DEPARTMENTS[i % len(DEPARTMENTS)]],
+                experience_years=rng.randint(1, 30), shift_start="00:00", shift_end="23:59",
+            )
+            db.add_all([user, doctor])
+            doctor_ids.append(doctor.doctor_id)
+
+        for i in range(queued):
+            payload = _random_payload(rng)
+            doctor_id = doctor_ids[i % len(doctor_ids)]
+            risk = rng.choice(["High", "Medium", "Low"])
+            patient = Patient(
+                patient_id=uuid.uuid4(), full_name=f"Bench Patient {i}", phone_number=f"777{i:07d}",
+                age=payload["age"], gender=payload["gender"], symptoms=", ".join(payload["symptoms"]),
+                blood_pressure=f"{payload['systolic_bp']}/0", heart_rate=payload["heart_rate"],
+                temperature=payload["temperature"], pre_existing_conditions=", ".join(payload["chronic_conditions"]),
+                risk_level=risk,
+            )
+            visit = Visit(visit_id=uuid.uuid4(), patient_id=patient.patient_id, visit_type="Walk-In")
+            db.add_all([
+                patient,
+                visit,
+                AIAssessment(assessment_id=uuid.uuid4(), visit_id=visit.visit_id, risk_score=rng.randint(1, 10), risk_level=risk),
+                DoctorAssignment(assignment_id=uuid.uuid4(), visit_id=visit.visit_id, doctor_id=doctor_id),
+                Queue(
+                    queue_id=uuid.uuid4(), visit_id=visit.visit_id, doctor_id=doctor_id,
+                    priority_score=rng.randint(10, 100), queue_position=i // len(doctor_ids) + 1,
+                ),
+            ])
+    return [str(d) for d in doctor_ids]
+
+
+async def run_scenarios(
+    client, doctor_ids: list[str], queued: int, requests: int, rounds: int, rng: random.Random
+) -> dict:
+    scenarios = {
+        "POST /visits": lambda: client.post("/visits", json=_random_payload(rng)),
+        "GET /doctor/queue/{id}": lambda: client.get(f"/doctor/queue/{rng.choice(doctor_ids)}"),
+        "POST /queue/recompute": lambda: client.post("/queue/recompute"),
+        "GET /stats": lambda: client.get("/stats"),
+        "GET /recipient/patients/search": lambda: client.get(
+            "/recipient/patients/search", params={"q": f"Bench Patient {rng.randrange(max(queued, 1))}"}
+        ),
+    }
+    results = {}
+    for name, call in scenarios.items():
+        for _ in range(min(3, requests)):  # warm-up
+            await call()
+        summaries = []
+        for _ in range(rounds):
+            latencies = []
+            wall_start = time.perf_counter()
+            for _ in range(requests):
+                start = time.perf_counter()
+                resp = await call()
+                latencies.append(time.perf_counter() - start)
+                if resp.status_code != 200:
+                    raise RuntimeError(f"{name} returned {resp.status_code}: {resp.text[:200]}")
+            summaries.append(summarize(latencies, time.perf_counter() - wall_start))
+        results[name] = best_of(summaries)
+    return results
+
+
+async def benchmark(doctors: int, queued: int, requests: int, rounds: int, seed_value: int) -> dict:
+    # The DB layer reads DATABASE_URL at import time, so point it at a scratch DB first
+    workdir = tempfile.mkdtemp(prefix="triage-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{Path(workdir) / 'bench.db'}"
+    logging.disable(logging.INFO)
+
+    import httpx
+    import db
+    from main import app
+
+    await db.init_db()
+    rng = random.Random(seed_value)
+    doctor_ids = await seed(db.AsyncSessionLocal, doctors, queued, rng)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        results = await run_scenarios(client, doctor_ids, queued, requests, rounds, rng)
+    await db.engine.dispose()
+    await db.read_engine.dispose()
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--doctors", type=int, default=20)
+    parser.add_argument("--queued", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=50, help="timed requests per scenario round")
+    parser.add_argument("--rounds", type=int, default=3, help="rounds per scenario; best round wins")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--tail-threshold", type=float, default=DEFAULT_TAIL_THRESHOLD, help="threshold for p99")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    config = {
+        "doctors": args.doctors, "queued": args.queued, "requests": args.requests,
+        "rounds": args.rounds, "seed": args.seed,
+    }
+    results = asyncio.run(benchmark(args.doctors, args.queued, args.requests, args.rounds, args.seed))
+    print_table(results)
+
+    if args.update_baseline:
+        write_results(args.baseline, results, config)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        print(f"No baseline at {args.baseline}; run with --update-baseline to record one.")
+        return 0
+    mismatch = config_mismatch(baseline, config)
+    if mismatch:
+        print(mismatch)
+        return 2
+    regressions = compare_to_baseline(results, baseline, args.threshold, args.tail_threshold)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+"""
+OCR preprocessing benchmark.
+
+Times tesseract per page on the raw image (what /documents/upload did before
+preprocessing) against preprocess_image + tesseract, and reports the
+preprocessing cost and the pixels tesseract has to scan. Pages come from
+--images (real scans or phone photos) or are synthesized: a 12 MP JPEG of a
+printed page under uneven light, on a darker table, stored rotated with an
+EXIF orientation tag, as phones do.
+
+Without a tesseract binary only the preprocessing columns are measured.
+
+Run (from backend/):
+    python -m benchmarks.bench_ocr
+    python -m benchmarks.bench_ocr --images ../samples --repeat 3
+"""
+import argparse
+import io
+import statistics
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BACKEND_DIR))
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from services.ocr_service import preprocess_image
+
+LINES = [
+    "DISCHARGE SUMMARY",
+    "Known type 2 diabetes and hypertension, on metformin.",
+    "Presented with chest pain and shortness of breath.",
+    "History of asthma. No fever. Mild headache and dizziness.",
+    "Advised follow-up in cardiology within two weeks.",
+]
+
+
+def synthetic_page(seed: int) -> bytes:
+    """A phone-style photo of a printed page, as JPEG bytes."""
+    rng = np.random.default_rng(seed)
+    width, height = 4032, 3024  # landscape sensor; EXIF says rotate to portrait
+    page = Image.new("L", (height, width), 80)
+    draw = ImageDraw.Draw(page)
+    draw.rectangle((250, 350, height - 250, width - 300), fill=235)
+    font = ImageFont.load_default(size=46)
+    y = 450
+    for i in range(40):
+        draw.text((380, y), LINES[i % len(LINES)], fill=25, font=font)
+        y += 78
+    pixels = np.asarray(page, dtype=np.float32)
+    pixels *= np.linspace(0.55, 1.0, pixels.shape[1])[None, :]  # light from one side
+    pixels += rng.normal(0, 6, pixels.shape)
+    photo = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8)).convert("RGB")
+    photo = photo.transpose(Image.Transpose.ROTATE_90)  # stored sideways ...
+    exif = Image.Exif()
+    exif[0x0112] = 6  # ... with orientation "rotate 90 CW" to display upright
+    buf = io.BytesIO()
+    photo.save(buf, "JPEG", quality=90, exif=exif)
+    return buf.getvalue()
+
+
+def load_pages(images: Path | None, count: int) -> list[tuple[str, bytes]]:
+    if images is None:
+        return [(f"synthetic-{i}", synthetic_page(i)) for i in range(count)]
+    files = sorted(p for p in images.iterdir() if p.suffix.lower() in {".jpg", ".jpeg", ".png", ".tif", ".tiff"})
+    return [(p.name, p.read_bytes()) for p in files[:count]]
+
+
+def _tesseract():
+    try:
+        import pytesseract
+        pytesseract.get_tesseract_version()
+        return pytesseract
+    except Exception:
+        return None
+
+
+def _best(fn, repeat: int) -> tuple[float, object]:
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def benchmark(pages, repeat: int) -> dict:
+    tesseract = _tesseract()
+    results = {}
+    for name, data in pages:
+        row = {}
+        with Image.open(io.BytesIO(data)) as raw:
+            row["raw_mpx"] = round(raw.width * raw.height / 1e6, 2)
+        seconds, prepared = _best(lambda: preprocess_image(Image.open(io.BytesIO(data))), repeat)
+        row["pre_ms"] = round(seconds * 1000, 1)
+        row["pre_mpx"] = round(prepared.width * prepared.height / 1e6, 2)
+        if tesseract is not None:
+            seconds, raw_text = _best(lambda: tesseract.image_to_string(Image.open(io.BytesIO(data))), repeat)
+            row["ocr_raw_ms"] = round(seconds * 1000, 1)
+            seconds, text = _best(lambda: tesseract.image_to_string(prepared), repeat)
+            row["ocr_pre_ms"] = round(seconds * 1000, 1)
+            row["speedup"] = round(row["ocr_raw_ms"] / (row["pre_ms"] + row["ocr_pre_ms"]), 2)
+            row["raw_chars"], row["pre_chars"] = len(raw_text.strip()), len(text.strip())
+        results[name] = row
+    return results
+
+
+def print_results(results: dict) -> None:
+    cols = list(next(iter(results.values())))
+    width = max(len(name) for name in results) + 2
+    print("page".ljust(width) + "".join(c.rjust(12) for c in cols))
+    for name, metrics in results.items():
+        print(name.ljust(width) + "".join(str(metrics[c]).rjust(12) for c in cols))
+    if len(results) > 1:
+        print("median".ljust(width) + "".join(
+            str(round(statistics.median(m[c] for m in results.values()), 2)).rjust(12) for c in cols
+        ))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", type=Path, help="directory of sample pages (default: synthesized photos)")
+    parser.add_argument("--pages", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per step; best run wins")
+    args = parser.parse_args(argv)
+
+    pages = load_pages(args.images, args.pages)
+    if not pages:
+        print(f"No images found in {args.images}")
+        return 1
+    results = benchmark(pages, args.repeat)
+    print_results(results)
+    if _tesseract() is None:
+        print("tesseract not found: OCR timings skipped, preprocessing only.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
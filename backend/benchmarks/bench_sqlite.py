@@ -0,0 +1,193 @@
+"""
+SQLite storage profile concurrency benchmark.
+
+Runs concurrent intake-style writers (read queue length, then insert patient,
+visit and queue rows in one transaction) on the writer engine alongside
+dashboard-style readers (aggregate stats and a queue join) on the reader pool,
+against a scratch database per DB_PROFILE, and reports throughput, latency
+percentiles and "database is locked" errors for each profile side by side.
+
+WAL's gain is readers running beside the writer, which needs spare cores; on a
+single-core host the difference is mostly commit latency (synchronous=NORMAL).
+
+Run (from backend/):
+    python -m benchmarks.bench_sqlite
+    python -m benchmarks.bench_sqlite --profiles legacy durable production --writers 1 --readers 1
+"""
+import argparse
+import asyncio
+import logging
+import random
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BACKEND_DIR))
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from benchmarks.common import summarize
+
+DOCTORS = 10
+
+
+def _patient_values(patient_id, name: str, rng: random.Random) -> dict:
+    return {
+        "patient_id": patient_id, "full_name": name, "age": rng.randint(1, 95), "gender": "Female",
+        "symptoms": "fever, cough", "blood_pressure": "120/80", "heart_rate": 80, "temperature": 37.5,
+        "risk_level": rng.choice(["High", "Medium", "Low"]),
+    }
+
+
+async def _setup(engine, rows: int, rng: random.Random) -> list[uuid.UUID]:
+    from models import Base, User, Department, Doctor, Patient, Visit, Queue
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    dept_id = uuid.uuid4()
+    doctor_ids = []
+    session_factory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_factory() as db, db.begin():
+        db.add(Department(department_id=dept_id, name="General Medicine"))
+        for i in range(DOCTORS):
+            user = User(
+                user_id=uuid.uuid4(), full_name=f"Bench Doctor {i}", email=f"bench{i}@example.com",
+                password_hash="x", role="Doctor",
+            )
+            doctor = Doctor(doctor_id=uuid.uuid4(), user_id=user.user_id, department_id=dept_id)
+            db.add_all([user, doctor])
+            doctor_ids.append(doctor.doctor_id)
+
+    # Pre-existing history so the dashboard reads scan a realistic table
+    patients, visits, queue = [], [], []
+    for i in range(rows):
+        patient_id, visit_id = uuid.uuid4(), uuid.uuid4()
+        patients.append(_patient_values(patient_id, f"Seed Patient {i}", rng))
+        visits.append({"visit_id": visit_id, "patient_id": patient_id, "visit_type": "Walk-In"})
+        queue.append({
+            "queue_id": uuid.uuid4(), "visit_id": visit_id, "doctor_id": doctor_ids[i % DOCTORS],
+            "priority_score": rng.randint(10, 100), "queue_position": i // DOCTORS + 1,
+        })
+    async with session_factory() as db, db.begin():
+        for model, values in ((Patient, patients), (Visit, visits), (Queue, queue)):
+            if values:
+                await db.execute(insert(model), values)
+    return doctor_ids
+
+
+async def _write(session_factory, doctor_id, rng: random.Random) -> None:
+    from models import Patient, Visit, Queue
+
+    async with session_factory() as db, db.begin():
+        position = await db.scalar(select(func.count()).select_from(Queue).where(Queue.doctor_id == doctor_id))
+        patient_id, visit_id = uuid.uuid4(), uuid.uuid4()
+        await db.execute(insert(Patient).values(**_patient_values(patient_id, "Bench Patient", rng)))
+        await db.execute(insert(Visit).values(visit_id=visit_id, patient_id=patient_id, visit_type="Walk-In"))
+        await db.execute(insert(Queue).values(
+            queue_id=uuid.uuid4(), visit_id=visit_id, doctor_id=doctor_id,
+            priority_score=rng.randint(10, 100), queue_position=position + 1,
+        ))
+
+
+async def _read(session_factory, doctor_id) -> None:
+    from models import Patient, Visit, Queue
+
+    async with session_factory() as db:
+        await db.execute(select(Patient.risk_level, func.count()).group_by(Patient.risk_level))
+        await db.execute(
+            select(func.count(), func.avg(Queue.priority_score))
+            .join(Visit, Visit.visit_id == Queue.visit_id)
+            .join(Patient, Patient.patient_id == Visit.patient_id)
+            .where(Queue.doctor_id == doctor_id, Patient.risk_level == "High")
+        )
+
+
+async def _worker(op, ops: int, latencies: list, errors: list) -> float:
+    """Run `op` `ops` times; returns the time at which the worker finished."""
+    for _ in range(ops):
+        start = time.perf_counter()
+        try:
+            await op()
+        except OperationalError as exc:
+            errors.append(str(exc.orig))
+            continue
+        latencies.append(time.perf_counter() - start)
+    return time.perf_counter()
+
+
+async def run_profile(profile: str, writers: int, readers: int, ops: int, rows: int, seed: int) -> dict:
+    from db import build_engine
+
+    workdir = tempfile.mkdtemp(prefix="triage-sqlite-bench-")
+    url = f"sqlite+aiosqlite:///{Path(workdir) / 'bench.db'}"
+    engine = build_engine(url, profile)
+    read_engine = build_engine(url, profile, read_only=True)
+    rng = random.Random(seed)
+    doctor_ids = await _setup(engine, rows, rng)
+    session_factory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    read_session_factory = async_sessionmaker(bind=read_engine, class_=AsyncSession, expire_on_commit=False)
+
+    write_lat, read_lat, write_err, read_err = [], [], [], []
+    tasks = [
+        _worker(lambda d=rng.choice(doctor_ids): _write(session_factory, d, rng), ops, write_lat, write_err)
+        for _ in range(writers)
+    ] + [
+        _worker(lambda d=rng.choice(doctor_ids): _read(read_session_factory, d), ops, read_lat, read_err)
+        for _ in range(readers)
+    ]
+    wall_start = time.perf_counter()
+    finished = await asyncio.gather(*tasks)
+    await engine.dispose()
+    await read_engine.dispose()
+
+    write_wall = max(finished[:writers], default=wall_start) - wall_start
+    read_wall = max(finished[writers:], default=wall_start) - wall_start
+    return {
+        f"{profile} writes": {**summarize(write_lat, write_wall), "errors": len(write_err)},
+        f"{profile} reads": {**summarize(read_lat, read_wall), "errors": len(read_err)},
+    }
+
+
+def print_results(results: dict) -> None:
+    cols = ("throughput_rps", "p50_ms", "p95_ms", "p99_ms", "errors")
+    width = max(len(name) for name in results) + 2
+    print("profile".ljust(width) + "".join(c.rjust(16) for c in cols))
+    for name, metrics in results.items():
+        print(name.ljust(width) + "".join(str(metrics[c]).rjust(16) for c in cols))
+
+
+def main(argv=None) -> int:
+    from db import SQLITE_PROFILES
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profiles", nargs="+", default=["legacy", "production"], choices=sorted(SQLITE_PROFILES))
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--ops", type=int, default=30, help="operations per worker")
+    parser.add_argument("--rows", type=int, default=5000, help="pre-seeded patients/visits/queue rows")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+    logging.disable(logging.INFO)
+
+    results = {}
+    for profile in args.profiles:
+        results.update(asyncio.run(run_profile(profile, args.writers, args.readers, args.ops, args.rows, args.seed)))
+    print_results(results)
+
+    first, last = args.profiles[0], args.profiles[-1]
+    if first != last:
+        for kind in ("writes", "reads"):
+            before = results[f"{first} {kind}"]["throughput_rps"]
+            after = results[f"{last} {kind}"]["throughput_rps"]
+            if before:
+                print(f"{kind}: {last} is {after / before:.2f}x {first} throughput")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
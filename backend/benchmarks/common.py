@@ -0,0 +1,125 @@
+"""
+Benchmark helpers — latency percentiles and JSON baseline comparison shared
+by the benchmark modules in this package.
+"""
+import json
+import math
+import time
+from pathlib import Path
+
+# A metric regresses when it is this much worse than the baseline (25%)
+DEFAULT_THRESHOLD = 0.25
+# Tail percentiles rest on a handful of samples, so they get more slack
+DEFAULT_TAIL_THRESHOLD = 0.5
+TAIL_METRICS = {"p99_ms"}
+
+# Metrics where a larger value is better; every other metric is a cost
+HIGHER_IS_BETTER = {"throughput_rps"}
+
+
+def percentile(sorted_samples: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted sample list."""
+    if not sorted_samples:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_samples)))
+    return sorted_samples[rank - 1]
+
+
+def summarize(latencies: list[float], wall_seconds: float) -> dict:
+    """Throughput and p50/p95/p99 (ms) for a list of per-request latencies in seconds."""
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "throughput_rps": round(len(ordered) / wall_seconds, 2) if wall_seconds else 0.0,
+        "p50_ms": round(percentile(ordered, 50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 3),
+    }
+
+
+def best_of(rounds: list[dict]) -> dict:
+    """
+    Merge per-round summaries keeping the best value of each metric, as timeit
+    does: transient interference only ever makes a round slower.
+    """
+    merged = dict(rounds[0])
+    for summary in rounds[1:]:
+        for metric, value in summary.items():
+            if metric == "requests":
+                merged[metric] += value
+            elif metric in HIGHER_IS_BETTER:
+                merged[metric] = max(merged[metric], value)
+            else:
+                merged[metric] = min(merged[metric], value)
+    return merged
+
+
+def load_baseline(path: Path) -> dict | None:
+    if not path.exists():
+        return None
+    with open(path, "r", encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def write_results(path: Path, results: dict, config: dict) -> None:
+    payload = {
+        "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": config,
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(payload, fh, indent=2, sort_keys=True)
+        fh.write("\n")
+
+
+def config_mismatch(baseline: dict, config: dict) -> str | None:
+    """
+    Why `baseline` cannot be compared with a run configured as `config`, or None.
+    Numbers recorded with other settings (batch sizes, queue length, model...) are
+    not comparable, so callers refuse to compare rather than report a verdict.
+    """
+    recorded = baseline.get("config")
+    if recorded == config:
+        return None
+    return (
+        f"Baseline config {recorded} differs from this run {config}; "
+        "re-run with the baseline's settings, or with --update-baseline to record a new one."
+    )
+
+
+def compare_to_baseline(
+    results: dict,
+    baseline: dict,
+    threshold: float = DEFAULT_THRESHOLD,
+    tail_threshold: float = DEFAULT_TAIL_THRESHOLD,
+) -> list[str]:
+    """
+    Compare {scenario: {metric: value}} against a baseline file's results.
+    Returns one message per metric that regressed beyond its threshold.
+    """
+    regressions = []
+    base_results = baseline.get("results", {})
+    for scenario, metrics in results.items():
+        base_metrics = base_results.get(scenario)
+        if not base_metrics:
+            continue
+        for metric, value in metrics.items():
+            base = base_metrics.get(metric)
+            if not isinstance(base, (int, float)) or metric == "requests" or base <= 0:
+                continue
+            limit = tail_threshold if metric in TAIL_METRICS else threshold
+            if metric in HIGHER_IS_BETTER:
+                regressed = value < base * (1 - limit)
+            else:
+                regressed = value > base * (1 + limit)
+            if regressed:
+                regressions.append(f"{scenario}: {metric} {value} vs baseline {base} (threshold {limit:.0%})")
+    return regressions
+
+
+def print_table(results: dict) -> None:
+    cols = ("throughput_rps", "p50_ms", "p95_ms", "p99_ms")
+    width = max(len(name) for name in results) + 2
+    print("scenario".ljust(width) + "".join(c.rjust(16) for c in cols))
+    for name, metrics in results.items():
+        print(name.ljust(width) + "".join(str(metrics.get(c, "")).rjust(16) for c in cols))
@@ -1,9 +1,15 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, AsyncEngine, async_sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from typing import AsyncGenerator
 from dotenv import load_dotenv
 import os
+import time
 from pathlib import Path
 
+from services.metrics import registry
+
 # Load environment variables from .env
 load_dotenv()
 
@@ -13,36 +19,143 @@ USE_SQLITE = os.getenv("USE_SQLITE", "1") == "1"
 # SQLite-only configuration
 db_path = Path(__file__).resolve().parents[1] / "backend_dev.db"
 DATABASE_URL = DATABASE_URL_OVERRIDE or f"sqlite+aiosqlite:///{db_path}"
-print(f"Using SQLite database at {db_path}")
+print(f"Using database {make_url(DATABASE_URL).render_as_string(hide_password=True)}")
+
+# Connect-time SQLite pragmas, selected with DB_PROFILE (ignored for other backends)
+SQLITE_PROFILES = {
+    # Stock SQLite: rollback journal, FULL sync. Kept for comparison benchmarks.
+    "legacy": {},
+    # WAL with full fsync on every commit, for hosts where losing the last
+    # transactions on power failure is not acceptable
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "busy_timeout": 5000,
+        "temp_store": "MEMORY",
+    },
+    # WAL lets dashboard reads run alongside an intake write; NORMAL sync is
+    # crash-safe in WAL mode and only risks the last commits on power loss
+    "production": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 5000,
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -16 * 1024,  # negative = KiB, per connection
+        "temp_store": "MEMORY",
+    },
+}
+DB_PROFILE = os.getenv("DB_PROFILE", "production")
+
+# Optional read replica for Postgres; reads fall back to the primary when unset
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+
+# Reader pool sizing for file-backed SQLite. Each aiosqlite connection owns a
+# worker thread plus its page cache and mmap, so connections are kept and
+# reused rather than recycled. WAL allows one writer alongside any number of
+# readers, so the writer pool holds a single connection: writes queue on the
+# pool instead of contending for the database lock.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+DB_POOL_WAIT_SECONDS = registry.histogram(
+    "db_pool_wait_seconds",
+    "Time to check a connection out of the pool (includes opening new connections).",
+)
+
+
+class TimedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """Default async queue pool that records checkout wait time."""
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            DB_POOL_WAIT_SECONDS.observe(time.perf_counter() - start)
+
+
+def _apply_pragmas(pragmas: dict):
+    def on_connect(dbapi_connection, _record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+    return on_connect
+
 
-# Create Async Engine
-engine = create_async_engine(DATABASE_URL, echo=False)
+def build_engine(url: str = DATABASE_URL, profile: str = DB_PROFILE, read_only: bool = False) -> AsyncEngine:
+    """
+    Create an async engine; SQLite URLs get the pool policy and pragmas of `profile`.
+    read_only=True builds a reader pool (query_only connections) instead of the single writer.
+    """
+    if make_url(url).get_backend_name() != "sqlite":
+        return create_async_engine(url, echo=False, poolclass=TimedAsyncQueuePool)
+    if profile not in SQLITE_PROFILES:
+        raise ValueError(f"Unknown DB_PROFILE {profile!r}; expected one of {sorted(SQLITE_PROFILES)}")
 
-# Create Async Session Factory
+    if ":memory:" in url:
+        # In-memory SQLite keeps SQLAlchemy's StaticPool (one shared connection)
+        new_engine = create_async_engine(url, echo=False)
+    else:
+        new_engine = create_async_engine(
+            url,
+            echo=False,
+            poolclass=TimedAsyncQueuePool,
+            pool_size=DB_POOL_SIZE if read_only else 1,
+            max_overflow=DB_MAX_OVERFLOW if read_only else 0,
+            pool_timeout=DB_POOL_TIMEOUT,
+        )
+    pragmas = dict(SQLITE_PROFILES[profile])
+    if read_only:
+        pragmas["query_only"] = "ON"
+    if pragmas:
+        event.listen(new_engine.sync_engine, "connect", _apply_pragmas(pragmas))
+    return new_engine
+
+
+def build_read_engine(write_engine: AsyncEngine, url: str = DATABASE_URL) -> AsyncEngine:
+    """Reader pool for SQLite, the replica for Postgres, else the write engine itself."""
+    if make_url(url).get_backend_name() == "sqlite":
+        # An in-memory database only exists on its one shared connection
+        return write_engine if ":memory:" in url else build_engine(url, read_only=True)
+    return build_engine(DATABASE_REPLICA_URL) if DATABASE_REPLICA_URL else write_engine
+
+
+# Create Async Engines: `engine` is the primary/writer, `read_engine` serves read-only routes
+engine = build_engine()
+read_engine = build_read_engine(engine)
+
+# Create Async Session Factories
 AsyncSessionLocal = async_sessionmaker(
     bind=engine,
     class_=AsyncSession,
     expire_on_commit=False,
     autoflush=False
 )
+ReadSessionLocal = async_sessionmaker(
+    bind=read_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autoflush=False
+)
 
-# Dependency for FastAPI
+# Dependencies for FastAPI
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     async with AsyncSessionLocal() as session:
         yield session
 
 
+async def get_read_db() -> AsyncGenerator[AsyncSession, None]:
+    """Session for routes that never write; may lag the primary when a replica is used."""
+    async with ReadSessionLocal() as session:
+        yield session
+
+
 async def init_db():
-    """Create tables for local development when using SQLite (if they don't exist)."""
-    # import models lazily to avoid circular imports at top-level
-    from models import Base
-    async with engine.begin() as conn:
-        # Only create tables if they don't already exist
-        # SQLite doesn't have a way to check easily, so we'll just try to create
-        # and it will be idempotent in most cases
-        try:
-            await conn.run_sync(Base.metadata.create_all)
-        except Exception as e:
-            # If table creation fails, it's likely because tables already exist
-            # which is fine for development
-            pass
\ No newline at end of file
+    """Apply pending schema migrations; one version query when the schema is current."""
+    # import lazily: migrations import models, which must not load before the engine exists
+    from migrations import migrate
+    await migrate(engine)
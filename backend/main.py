@@ -2,16 +2,16 @@
 Main FastAPI Application — Full orchestration with SHAP explainability.
 Aligned with the app schema (SQLite runtime).
 """
-from fastapi import FastAPI, Depends, HTTPException, UploadFile, File, WebSocket
+from fastapi import FastAPI, Depends, HTTPException, WebSocket, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, PlainTextResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update, func
 from datetime import datetime, timezone
+import json
 import uuid
 import os
-import shutil
 import traceback
 import logging
 from typing import Optional
@@ -20,7 +20,7 @@ from contextlib import asynccontextmanager
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-from db import get_db
+from db import get_db, get_read_db, engine, read_engine, ReadSessionLocal
 from db import init_db, USE_SQLITE
 from models import (
     Patient, Visit, AIAssessment, DoctorAssignment,
@@ -30,10 +30,20 @@ from schemas import VisitRequest, VisitResponse, OverrideRequest, ServeRequest
 from services.triage_service import run_triage
 from services.doctor_service import assign_doctor
 from services.queue_service import (
-    insert_into_queue, estimate_wait_time, reorder_queue_for_doctor
+    estimate_wait_time, reorder_queue_for_doctor, get_doctor_queue, get_department_queue
 )
-from services.ocr_service import extract_text_from_file, detect_conditions, merge_ocr_with_payload
-from services.ws_manager import manager as ws_manager
+from services.ocr_jobs import ocr_queue, OCRQueueFull, OCRJobNotFound
+from services.ocr_cache import OCRResultCache
+from services.upload_store import (
+    store_upload, InvalidUpload, UploadTooLarge, MAX_UPLOAD_BYTES, UPLOAD_FORM_OVERHEAD, UPLOADS_REJECTED
+)
+from services.ws_manager import (
+    manager as ws_manager, department_topic, emergencies_topic, notify_emergency, notify_stats_changed,
+    STATS_TOPIC, EMERGENCIES_TOPIC,
+)
+from services.ws_broker import create_broker
+from services.db_profiler import DBProfilerMiddleware, install_db_profiler
+from services.metrics import registry as metrics_registry
 from services.auth_service import create_user, authenticate_user, get_current_user
 from schemas import AuthRegister, AuthLogin
 from pydantic import BaseModel
@@ -53,6 +63,20 @@ async def lifespan(app: FastAPI):
         await seed_departments_and_doctors()
     except Exception as e:
         logger.warning(f"Startup seed skipped: {e}")
+    if os.getenv("SYNC_DATASETS_ON_STARTUP") == "1":
+        # Unchanged CSVs cost one checksum each, so this is cheap on every boot
+        try:
+            from services.dataset_loader import sync_datasets
+            from services.knowledge_base import build_snapshot
+            from services.triage_service import refresh_knowledge_base
+            results = await sync_datasets(engine)
+            if any(r["status"] == "synced" for r in results.values()):
+                await build_snapshot(engine)
+                refresh_knowledge_base()
+        except Exception as e:
+            logger.warning(f"Startup dataset sync skipped: {e}")
+    await ocr_queue.start(cache=OCRResultCache(engine, read_engine=read_engine))
+    await ws_manager.start(broker=create_broker(engine), loader=load_topic_state)
     
     logger.info("Application started successfully")
     
@@ -62,6 +86,9 @@ async def lifespan(app: FastAPI):
     
     # Shutdown (if needed)
     logger.info("Shutting down application...")
+    await ocr_queue.stop()
+    # sends pending updates, then closes dashboard sockets with 1001 so clients reconnect elsewhere
+    await ws_manager.stop()
 
 
 app = FastAPI(title="AI Smart Patient Triage", version="2.0.0", lifespan=lifespan)
@@ -73,8 +100,14 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allow all methods (GET, POST, PUT, DELETE, etc.)
     allow_headers=["*"],  # Allow all headers
+    expose_headers=["X-DB-Statements", "X-DB-Time-Ms", "X-DB-Slowest"],  # DB profiler (debug)
 )
 
+# Per-request SQL statement count / DB time (X-DB-* headers when DEBUG=1)
+install_db_profiler(engine)
+install_db_profiler(read_engine)
+app.add_middleware(DBProfilerMiddleware)
+
 # ── Serve static UI ───────────────────────────────────────────
 TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "templates")
 UPLOADS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "uploads")
@@ -91,6 +124,12 @@ async def serve_test_ui():
     return FileResponse(os.path.join(TEMPLATES_DIR, "simple_test.html"))
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus text exposition of the in-process metrics registry."""
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4")
+
+
 # ══════════════════════════════════════════════════════════════
 #  POST /visits — Full Orchestration Endpoint
 # ══════════════════════════════════════════════════════════════
@@ -106,17 +145,14 @@ async def create_visit(payload: VisitRequest, db: AsyncSession = Depends(get_db)
     try:
         async with db.begin():
             payload_dict = payload.model_dump()
-            result = await create_visit_orchestration(db, payload_dict)
-            
-            # Audit Log
-            audit = AuditLog(
-                log_id=uuid.uuid4(),
-                action=f"visit_created - Risk: {result['risk_level']}, Dept: {result['department']}",
-                target_table="visits",
-                target_id=uuid.UUID(result["visit_id"])
-            )
-            db.add(audit)
-            return result
+            # Patient, visit, assessment, queue and audit rows are inserted in FK order inside this one transaction
+            return await create_visit_orchestration(db, payload_dict)
+    except OCRJobNotFound as e:
+        raise HTTPException(status_code=404, detail=f"Unknown OCR job: {e}")
+    except OCRQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    except TimeoutError:
+        raise HTTPException(status_code=504, detail="OCR for the referenced documents is still running")
     except Exception as e:
         logger.error(f"Error creating visit: {e}")
         traceback.print_exc()
@@ -126,27 +162,82 @@ async def create_visit(payload: VisitRequest, db: AsyncSession = Depends(get_db)
 # ══════════════════════════════════════════════════════════════
 #  POST /documents/upload — Upload EHR/EMR document
 # ══════════════════════════════════════════════════════════════
-@app.post("/documents/upload")
-async def upload_document(file: UploadFile = File(...)):
-    """Upload a document for OCR processing. Returns extracted text and detected conditions."""
-    # Save file
-    file_path = os.path.join(UPLOADS_DIR, file.filename)
-    with open(file_path, "wb") as f:
-        shutil.copyfileobj(file.file, f)
-
-    # Extract text
-    text = extract_text_from_file(file_path)
-    detected = detect_conditions(text) if text else {"chronic_conditions": [], "symptoms": []}
-
-    return {
-        "filename": file.filename,
-        "extracted_text": text or "",
-        "detected_conditions": detected,
-        "file_path": file_path,
+UPLOAD_FORM_SCHEMA = {
+    "requestBody": {
+        "required": True,
+        "content": {"multipart/form-data": {"schema": {
+            "type": "object",
+            "properties": {"file": {"type": "string", "format": "binary"}},
+            "required": ["file"],
+        }}},
     }
+}
+
+
+@app.post("/documents/upload", openapi_extra=UPLOAD_FORM_SCHEMA)
+async def upload_document(request: Request, wait: bool = True):
+    """
+    Upload a document for OCR processing. OCR runs in the worker pool; by default the
+    response waits for it and carries the extracted text and detected conditions.
+    With wait=false it returns 202 at once; poll /documents/jobs/{job_id} or watch
+    /ws/ocr/{job_id}, then pass the job id to /visits as ocr_job_ids.
+    """
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > MAX_UPLOAD_BYTES + UPLOAD_FORM_OVERHEAD:
+        UPLOADS_REJECTED.inc(reason="too_large")
+        raise HTTPException(status_code=413, detail=f"Upload exceeds {MAX_UPLOAD_BYTES} bytes")
+
+    # The body is parsed as it arrives and the file streamed to uploads/<sha256><ext>;
+    # a chunked request without Content-Length is cut off as soon as it passes the limit
+    try:
+        stored = await store_upload(request.stream(), request.headers.get("content-type", ""), UPLOADS_DIR)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except InvalidUpload as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
+    try:
+        job = ocr_queue.submit(stored.path, stored.filename, content_hash=stored.content_hash)
+    except OCRQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    if not wait:
+        return JSONResponse(status_code=202, content=job.to_dict())
+    await ocr_queue.wait(job)
+    return job.to_dict()
+
+
+@app.get("/documents/jobs/{job_id}")
+async def get_ocr_job(job_id: str):
+    """Status of an OCR job; once done it includes the text and detected conditions."""
+    try:
+        return (await ocr_queue.get(job_id)).to_dict()
+    except OCRJobNotFound:
+        raise HTTPException(status_code=404, detail="OCR job not found")
 
 
+@app.websocket("/ws/ocr/{job_id}")
+async def websocket_ocr_job(websocket: WebSocket, job_id: str):
+    """Sends the job's current status, an ocr_page event per finished page, then ocr_finished."""
+    await websocket.accept()
+    try:
+        job = await ocr_queue.get(job_id)
+    except OCRJobNotFound:
+        await websocket.close(code=4404, reason="OCR job not found")
+        return
+    events = job.subscribe()
+    try:
+        await websocket.send_json({"event": "ocr_status", **job.to_dict()})
+        while not job.is_finished or not events.empty():
+            event = await events.get()
+            await websocket.send_json(event)
+            if event["event"] == "ocr_finished":
+                break
+        await websocket.close()
+    except Exception:
+        pass
+    finally:
+        job.unsubscribe(events)
+
 
 # ══════════════════════════════════════════════════════════════
 #  POST /visits/{visit_id}/override — Manual risk override
@@ -181,19 +272,26 @@ async def override_risk(visit_id: str, req: OverrideRequest, db: AsyncSession =
             doctor_id = str(queue_entry.doctor_id) if queue_entry.doctor_id else None
 
         audit = AuditLog(
-            log_id=str(uuid.uuid4()),
             action="risk_override",
             target_table="ai_assessments",
-            target_id=str(visit_id_uuid),
+            target_id=visit_id_uuid,
         )
         db.add(audit)
 
         if doctor_id:
-            queue_list = await reorder_queue_for_doctor(db, doctor_id)
-            await ws_manager.broadcast_to_doctor(doctor_id, {
-                "event": "queue_reordered",
-                "queue": queue_list
-            })
+            # publishes the queue_reordered snapshot to the doctor's sockets
+            await reorder_queue_for_doctor(db, doctor_id)
+
+    notify_stats_changed()  # risk distribution
+    if req.new_risk_level == "High" and old_risk != "High":
+        await notify_emergency({
+            "event": "emergency_alert",
+            "visit_id": str(visit_id_uuid),
+            "doctor_id": doctor_id,
+            "department_id": str(assessment.recommended_department) if assessment.recommended_department else None,
+            "triggered_by": "override",
+            "alert_message": f"Risk raised from {old_risk} to High by override.",
+        })
 
     return {"status": "ok", "visit_id": str(visit_id_uuid), "old_risk": old_risk, "new_risk": req.new_risk_level}
 
@@ -202,7 +300,7 @@ async def override_risk(visit_id: str, req: OverrideRequest, db: AsyncSession =
 #  GET /doctors — List all doctors
 # ══════════════════════════════════════════════════════════════
 @app.get("/doctors")
-async def list_doctors(db: AsyncSession = Depends(get_db)):
+async def list_doctors(db: AsyncSession = Depends(get_read_db)):
     from models import User  # Ensure User is available
     async with db.begin():
         result = await db.execute(
@@ -226,75 +324,124 @@ async def list_doctors(db: AsyncSession = Depends(get_db)):
         ]
 
 
-@app.websocket("/ws/doctor/{doctor_id}")
-async def websocket_doctor_queue(websocket: WebSocket, doctor_id: str):
-    """WebSocket endpoint for doctor-specific live queue updates."""
-    await websocket.accept()
+async def load_topic_state(topic: str):
+    """Current state of a WebSocket topic: stats, a department's or a doctor's queue (None if it has none)."""
     try:
-        await ws_manager.connect(doctor_id, websocket)
-        # upon connection, send a simple hello message
-        await websocket.send_json({"event": "connected", "doctor_id": doctor_id})
-        # keep the connection open and receive pings
+        async with ReadSessionLocal() as db, db.begin():
+            if topic == STATS_TOPIC:
+                return await dashboard_stats(db)
+            if topic.startswith(EMERGENCIES_TOPIC):
+                return None
+            if topic.startswith("department:"):
+                return await get_department_queue(db, topic.split(":", 1)[1])
+            return await get_doctor_queue(db, topic)
+    except ValueError:
+        return None
+
+
+async def serve_topic(websocket: WebSocket, topic: str):
+    """Keep a dashboard socket subscribed to `topic` until the client goes away."""
+    try:
+        # connect accepts the socket; the current state goes out as the first
+        # snapshot and later changes arrive as deltas
+        state = await load_topic_state(topic)
+        await ws_manager.connect(topic, websocket, state=state)
         while True:
             data = await websocket.receive_text()
-            # ignore incoming messages; it's a keep-alive channel
-            await websocket.send_text('{"event":"ack"}')
+            # any message (normally the pong to the manager's ping) shows the client is alive;
+            # nothing is sent back
+            ws_manager.touch(websocket)
+            try:
+                msg = json.loads(data)
+            except ValueError:
+                continue  # not JSON: ignored
+            if isinstance(msg, dict) and msg.get("action") == "resync":  # the client saw a gap in seq
+                ws_manager.resync(websocket)
     except Exception:
         pass
     finally:
         try:
-            await ws_manager.disconnect(doctor_id, websocket)
+            await ws_manager.disconnect(topic, websocket)
         except Exception:
             pass
 
 
+@app.websocket("/ws/doctor/{doctor_id}")
+async def websocket_doctor_queue(websocket: WebSocket, doctor_id: str):
+    """WebSocket endpoint for doctor-specific live queue updates."""
+    await serve_topic(websocket, doctor_id)
+
+
+@app.websocket("/ws/department/{department_id}")
+async def websocket_department_queue(websocket: WebSocket, department_id: str):
+    """Merged live queue of every doctor in a department; entries carry doctor_id."""
+    await serve_topic(websocket, department_topic(department_id))
+
+
+@app.websocket("/ws/emergencies")
+async def websocket_emergencies(websocket: WebSocket, department_id: Optional[str] = None):
+    """Emergency alerts as they are raised, optionally only for one department."""
+    await serve_topic(websocket, emergencies_topic(department_id))
+
+
+@app.websocket("/ws/stats")
+async def websocket_stats(websocket: WebSocket):
+    """GET /stats as a snapshot, then only the fields that changed."""
+    await serve_topic(websocket, STATS_TOPIC)
+
+
 # ══════════════════════════════════════════════════════════════
 #  GET /stats — Dashboard statistics
 # ══════════════════════════════════════════════════════════════
 @app.get("/stats")
-async def get_stats(db: AsyncSession = Depends(get_db)):
+async def get_stats(db: AsyncSession = Depends(get_read_db)):
     """Dashboard statistics for visualizations."""
     async with db.begin():
-        # Risk distribution
-        risk_stmt = select(
-            AIAssessment.risk_level, func.count().label("count")
-        ).group_by(AIAssessment.risk_level)
-        risk_result = await db.execute(risk_stmt)
-        risk_dist = {row.risk_level: row.count for row in risk_result}
-
-        # Department load
-        dept_stmt = select(
-            Department.name, func.count(Queue.queue_id).label("count")
-        ).outerjoin(Doctor, Department.department_id == Doctor.department_id
-        ).outerjoin(Queue, Doctor.doctor_id == Queue.doctor_id
-        ).group_by(Department.name)
-        dept_result = await db.execute(dept_stmt)
-        dept_load = {row.name: row.count for row in dept_result}
-
-        # Total visits
-        total_stmt = select(func.count()).select_from(Visit)
-        total_result = await db.execute(total_stmt)
-        total_visits = total_result.scalar() or 0
-
-        # Recent visits
-        recent_stmt = (
-            select(Visit.visit_id, Visit.status, Visit.arrival_time, Patient.age, Patient.gender, Patient.full_name)
-            .join(Patient, Visit.patient_id == Patient.patient_id)
-            .order_by(Visit.arrival_time.desc())
-            .limit(10)
-        )
-        recent_result = await db.execute(recent_stmt)
-        recent = [
-            {
-                "visit_id": str(r.visit_id),
-                "status": r.status,
-                "arrival_time": r.arrival_time.isoformat() if r.arrival_time else None,
-                "age": r.age,
-                "gender": r.gender,
-                "patient_name": r.full_name,
-            }
-            for r in recent_result
-        ]
+        return await dashboard_stats(db)
+
+
+async def dashboard_stats(db: AsyncSession) -> dict:
+    """The /stats figures; also pushed to /ws/stats subscribers."""
+    # Risk distribution
+    risk_stmt = select(
+        AIAssessment.risk_level, func.count().label("count")
+    ).group_by(AIAssessment.risk_level)
+    risk_result = await db.execute(risk_stmt)
+    risk_dist = {row.risk_level: row.count for row in risk_result}
+
+    # Department load
+    dept_stmt = select(
+        Department.name, func.count(Queue.queue_id).label("count")
+    ).outerjoin(Doctor, Department.department_id == Doctor.department_id
+    ).outerjoin(Queue, Doctor.doctor_id == Queue.doctor_id
+    ).group_by(Department.name)
+    dept_result = await db.execute(dept_stmt)
+    dept_load = {row.name: row.count for row in dept_result}
+
+    # Total visits
+    total_stmt = select(func.count()).select_from(Visit)
+    total_result = await db.execute(total_stmt)
+    total_visits = total_result.scalar() or 0
+
+    # Recent visits
+    recent_stmt = (
+        select(Visit.visit_id, Visit.status, Visit.arrival_time, Patient.age, Patient.gender, Patient.full_name)
+        .join(Patient, Visit.patient_id == Patient.patient_id)
+        .order_by(Visit.arrival_time.desc())
+        .limit(10)
+    )
+    recent_result = await db.execute(recent_stmt)
+    recent = [
+        {
+            "visit_id": str(r.visit_id),
+            "status": r.status,
+            "arrival_time": r.arrival_time.isoformat() if r.arrival_time else None,
+            "age": r.age,
+            "gender": r.gender,
+            "patient_name": r.full_name,
+        }
+        for r in recent_result
+    ]
 
     return {
         "risk_distribution": risk_dist,
@@ -348,7 +495,7 @@ async def get_current_user_profile(current_user: dict = Depends(get_current_user
 
 
 @app.get("/master/symptoms")
-async def get_master_symptoms(q: Optional[str] = None, db: AsyncSession = Depends(get_db)):
+async def get_master_symptoms(q: Optional[str] = None, db: AsyncSession = Depends(get_read_db)):
     """Fetch symptom suggestions for autocomplete."""
     from models import SymptomSeverity
     async with db.begin():
@@ -362,7 +509,7 @@ async def get_master_symptoms(q: Optional[str] = None, db: AsyncSession = Depend
 
 
 @app.get("/master/chronic-conditions")
-async def get_master_chronic_conditions(q: Optional[str] = None, db: AsyncSession = Depends(get_db)):
+async def get_master_chronic_conditions(q: Optional[str] = None, db: AsyncSession = Depends(get_read_db)):
     """Fetch chronic condition suggestions for autocomplete."""
     async with db.begin():
         stmt = select(ChronicCondition)
@@ -375,7 +522,7 @@ async def get_master_chronic_conditions(q: Optional[str] = None, db: AsyncSessio
 
 
 @app.get("/departments")
-async def list_departments(db: AsyncSession = Depends(get_db)):
+async def list_departments(db: AsyncSession = Depends(get_read_db)):
     async with db.begin():
         result = await db.execute(select(Department))
         departments = result.scalars().all()
@@ -0,0 +1,164 @@
+"""
+Versioned schema migrations.
+
+Each migration module defines VERSION, DESCRIPTION, TRANSACTIONAL and
+upgrade(sync_conn). Applied versions are recorded in the schema_version table,
+so startup costs one query when the schema is current. Non-transactional
+migrations run on an autocommit connection, letting long index builds proceed
+without holding one transaction (and use CONCURRENTLY on Postgres).
+
+Every worker runs migrate() on startup, so applying migrations is serialised
+across processes: a session-level pg_advisory_lock on Postgres, BEGIN IMMEDIATE
+on SQLite. The version is re-read under the lock, so workers that waited find
+the steps already applied. SQLite has a single writer, so there all pending
+migrations run on the locking connection, in one transaction.
+
+Add a migration by creating the next mNNNN_*.py module and listing it in
+MIGRATIONS. Migrations carry their own (frozen) DDL and never import models.py,
+whose tables keep changing. Never edit a migration that has shipped.
+"""
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from sqlalchemy import Column, Float, Integer, MetaData, String, Table, TIMESTAMP, func, insert, select, text
+from sqlalchemy.exc import DBAPIError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from migrations import (
+    m0001_baseline, m0002_doctor_shifts, m0003_hot_path_indexes, m0004_dataset_sync, m0005_document_ocr_cache,
+)
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS = [
+    m0001_baseline, m0002_doctor_shifts, m0003_hot_path_indexes, m0004_dataset_sync, m0005_document_ocr_cache,
+]
+LATEST_VERSION = MIGRATIONS[-1].VERSION
+
+# pg_advisory_lock key shared by every process migrating the same database
+MIGRATION_LOCK_KEY = 0x7472_6961_6765  # "triage"
+SQLITE_LOCK_TIMEOUT = 300.0  # seconds to wait for another process's migrations
+
+schema_version = Table(
+    "schema_version",
+    MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("description", String(200), nullable=False),
+    Column("applied_at", TIMESTAMP, server_default=func.now()),
+    Column("duration_ms", Float),
+)
+
+
+async def current_version(engine: AsyncEngine) -> int:
+    """Highest applied version, or 0 for a database that predates versioning."""
+    try:
+        async with engine.connect() as conn:
+            return await _read_version(conn)
+    except DBAPIError:
+        # schema_version does not exist yet
+        return 0
+
+
+async def _read_version(conn: AsyncConnection) -> int:
+    return (await conn.execute(select(func.max(schema_version.c.version)))).scalar() or 0
+
+
+@asynccontextmanager
+async def _migration_lock(engine: AsyncEngine) -> AsyncIterator[Optional[AsyncConnection]]:
+    """
+    Hold the cross-process migration lock. On SQLite yields the connection holding
+    the write lock, which the migrations must run on; otherwise yields None.
+    """
+    async with engine.connect() as conn:
+        # autocommit: the lock connection must not sit in a transaction that would
+        # block CREATE INDEX CONCURRENTLY; SQLite's transaction is opened by hand
+        await conn.execution_options(isolation_level="AUTOCOMMIT")
+        dialect = engine.dialect.name
+        if dialect == "postgresql":
+            await conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+            try:
+                yield None
+            finally:
+                await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+        elif dialect == "sqlite":
+            deadline = time.monotonic() + SQLITE_LOCK_TIMEOUT
+            while True:
+                try:
+                    await conn.exec_driver_sql("BEGIN IMMEDIATE")
+                    break
+                except OperationalError as e:
+                    if "locked" not in str(e) or time.monotonic() > deadline:
+                        raise
+                    await asyncio.sleep(0.1)
+            try:
+                yield conn
+            except BaseException:
+                await conn.exec_driver_sql("ROLLBACK")
+                raise
+            await conn.exec_driver_sql("COMMIT")
+        else:
+            yield None
+
+
+async def migrate(engine: AsyncEngine) -> list[tuple[int, str, float]]:
+    """Apply pending migrations in order. Returns (version, description, seconds) per migration applied."""
+    if await current_version(engine) >= LATEST_VERSION:
+        return []
+    async with _migration_lock(engine) as locked:
+        if locked is not None:
+            return await _apply_on(locked)
+        async with engine.begin() as conn:
+            await conn.run_sync(schema_version.create, checkfirst=True)
+        # another process may have migrated while this one waited for the lock
+        return await _apply(engine, await current_version(engine))
+
+
+async def _apply_on(conn: AsyncConnection) -> list[tuple[int, str, float]]:
+    """SQLite: every pending migration on the connection holding BEGIN IMMEDIATE."""
+    await conn.run_sync(schema_version.create, checkfirst=True)
+    current = await _read_version(conn)
+    applied = []
+    for migration in MIGRATIONS:
+        if migration.VERSION <= current:
+            continue
+        logger.info(f"Applying migration {migration.VERSION:04d}: {migration.DESCRIPTION}")
+        start = time.perf_counter()
+        await conn.run_sync(migration.upgrade)
+        seconds = time.perf_counter() - start
+        await conn.execute(_record(migration, seconds))
+        logger.info(f"Migration {migration.VERSION:04d} applied in {seconds * 1000:.1f} ms")
+        applied.append((migration.VERSION, migration.DESCRIPTION, seconds))
+    return applied
+
+
+async def _apply(engine: AsyncEngine, current: int) -> list[tuple[int, str, float]]:
+    applied = []
+    for migration in MIGRATIONS:
+        if migration.VERSION <= current:
+            continue
+        logger.info(f"Applying migration {migration.VERSION:04d}: {migration.DESCRIPTION}")
+        start = time.perf_counter()
+        if migration.TRANSACTIONAL:
+            async with engine.begin() as conn:
+                await conn.run_sync(migration.upgrade)
+                seconds = time.perf_counter() - start
+                await conn.execute(_record(migration, seconds))
+        else:
+            async with engine.connect() as conn:
+                autocommit = await conn.execution_options(isolation_level="AUTOCOMMIT")
+                await autocommit.run_sync(migration.upgrade)
+            seconds = time.perf_counter() - start
+            async with engine.begin() as conn:
+                await conn.execute(_record(migration, seconds))
+        logger.info(f"Migration {migration.VERSION:04d} applied in {seconds * 1000:.1f} ms")
+        applied.append((migration.VERSION, migration.DESCRIPTION, seconds))
+    return applied
+
+
+def _record(migration, seconds: float):
+    return insert(schema_version).values(
+        version=migration.VERSION, description=migration.DESCRIPTION, duration_ms=round(seconds * 1000, 3)
+    )
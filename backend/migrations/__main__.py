@@ -0,0 +1,31 @@
+"""
+Apply pending schema migrations, or show the current version.
+
+Usage (from backend/):
+    python -m migrations            # upgrade to the latest version
+    python -m migrations --status
+"""
+import argparse
+import asyncio
+import logging
+
+from db import engine
+from migrations import LATEST_VERSION, current_version, migrate
+
+
+async def main(status_only: bool) -> None:
+    current = await current_version(engine)
+    print(f"Schema version {current} (latest {LATEST_VERSION})")
+    if not status_only:
+        for version, description, seconds in await migrate(engine):
+            print(f"[OK] {version:04d} {description} ({seconds * 1000:.1f} ms)")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply pending schema migrations.")
+    parser.add_argument("--status", action="store_true", help="only print the current schema version")
+    args = parser.parse_args()
+    logging.basicConfig(format="%(message)s")
+    logging.getLogger("migrations").setLevel(logging.INFO)
+    asyncio.run(main(args.status))
@@ -0,0 +1,345 @@
+"""
+Baseline: every table in models.py as of the introduction of versioning.
+
+The DDL is frozen here rather than taken from models.py, so this migration
+creates the same schema however the models change later. Databases that
+already have the tables only gain the missing ones. Later schema changes must
+come as new migrations, not edits to models alone.
+"""
+from sqlalchemy import (
+    JSON, TIMESTAMP, Boolean, Column, ForeignKey, Index, Integer, MetaData, Numeric, String, Table, Text,
+    Uuid, func, text,
+)
+
+VERSION = 1
+DESCRIPTION = "baseline schema"
+TRANSACTIONAL = True
+
+metadata = MetaData()
+
+Table(
+    "chronic_condition_modifiers",
+    metadata,
+    Column("chronic_id", String(50), primary_key=True),
+    Column("chronic_condition", String(200)),
+    Column("risk_modifier_score", Integer),
+    Column("high_risk_with_symptoms", Text),
+    Column("associated_department", String(100)),
+    Column("complication_risk_level", String(50)),
+)
+
+Table(
+    "chronic_conditions",
+    metadata,
+    Column("chronic_id", Uuid, primary_key=True),
+    Column("chronic_condition", String(200), nullable=False),
+    Column("risk_modifier_score", Integer),
+    Column("high_risk_with_symptoms", Text),
+    Column("associated_department", String(100)),
+    Column("complication_risk_level", String(50)),
+    Index("ix_chronic_conditions_chronic_condition_lower", text("lower(chronic_condition)")),
+)
+
+Table(
+    "departments",
+    metadata,
+    Column("department_id", Uuid, primary_key=True),
+    Column("name", String, nullable=False, unique=True),
+    Column("description", Text),
+    Column("created_at", TIMESTAMP, nullable=False, server_default=func.now()),
+    Index("ix_departments_name_lower", text("lower(name)")),
+)
+
+Table(
+    "disease_priority",
+    metadata,
+    Column("condition_id", String(50), primary_key=True),
+    Column("condition_name", String(200)),
+    Column("condition_category", String(100)),
+    Column("base_severity_score", Integer),
+    Column("default_department", String(100)),
+    Column("emergency_flag", Boolean, nullable=False),
+    Column("contagious_flag", Boolean, nullable=False),
+    Column("max_recommended_wait_minutes", Integer),
+    Column("mortality_risk_level", String(50)),
+    Column("progression_speed", String(50)),
+)
+
+Table(
+    "doctor_specialization",
+    metadata,
+    Column("doctor_id", String(50), primary_key=True),
+    Column("specialization", String(100)),
+    Column("subspecialty", String(100)),
+    Column("experience_years", Integer),
+    Column("max_patients_per_hour", Integer),
+    Column("critical_case_certified", Boolean, nullable=False),
+    Column("performance_score", Numeric(5, 2)),
+    Column("preferred_case_types", Text),
+    Column("consultation_fee", Numeric(10, 2)),
+    Column("availability_hours_per_week", Integer),
+)
+
+Table(
+    "focused_patient_dataset",
+    metadata,
+    Column("patient_id", String(50), primary_key=True),
+    Column("age", Integer),
+    Column("gender", String(20)),
+    Column("symptoms", Text),
+    Column("blood_pressure", String(20)),
+    Column("heart_rate", Integer),
+    Column("temperature", Numeric(4, 2)),
+    Column("pre_existing_conditions", Text),
+    Column("risk_level", String(20)),
+)
+
+Table(
+    "symptom_severity",
+    metadata,
+    Column("symptom_id", Uuid, primary_key=True),
+    Column("symptom_name", String(200), nullable=False),
+    Column("base_severity", Integer),
+    Column("emergency_trigger", Boolean, nullable=False),
+    Column("associated_department", String(100)),
+    Column("typical_duration_days", Integer),
+    Index("ix_symptom_severity_symptom_name_lower", text("lower(symptom_name)")),
+)
+
+Table(
+    "users",
+    metadata,
+    Column("user_id", Uuid, primary_key=True),
+    Column("full_name", String, nullable=False),
+    Column("email", String, nullable=False, unique=True),
+    Column("password_hash", Text, nullable=False),
+    Column("role", String, nullable=False),
+    Column("is_active", Boolean, nullable=False),
+    Column("created_at", TIMESTAMP, nullable=False, server_default=func.now()),
+)
+
+Table(
+    "vital_signs_reference",
+    metadata,
+    Column("vital_id", Uuid, primary_key=True),
+    Column("vital_type", String(100), nullable=False),
+    Column("age_group", String(50)),
+    Column("condition_modifier", String(100)),
+    Column("critical_low_threshold", Numeric),
+    Column("critical_high_threshold", Numeric),
+    Column("moderate_low_threshold", Numeric),
+    Column("moderate_high_threshold", Numeric),
+    Column("critical_instability_score", Integer),
+    Column("moderate_instability_score", Integer),
+)
+
+Table(
+    "audit_logs",
+    metadata,
+    Column("log_id", Uuid, primary_key=True),
+    Column("user_id", Uuid, ForeignKey("users.user_id")),
+    Column("action", Text, nullable=False),
+    Column("target_table", String(100)),
+    Column("target_id", Uuid),
+    Column("ip_address", String(50)),
+    Column("timestamp", TIMESTAMP, nullable=False, server_default=func.now()),
+)
+
+Table(
+    "doctors",
+    metadata,
+    Column("doctor_id", Uuid, primary_key=True),
+    Column("user_id", Uuid, ForeignKey("users.user_id"), nullable=False, unique=True),
+    Column("department_id", Uuid, ForeignKey("departments.department_id")),
+    Column("specialization", String),
+    Column("experience_years", Integer),
+    Column("consultation_fee", Numeric(10, 2)),
+    Column("is_available", Boolean, nullable=False),
+    Column("max_daily_patients", Integer, nullable=False),
+    Column("shift_start", String(5), nullable=False),
+    Column("shift_end", String(5), nullable=False),
+    Column("created_at", TIMESTAMP, nullable=False, server_default=func.now()),
+    Index("ix_doctors_department_id", "department_id"),
+)
+
+Table(
+    "notifications",
+    metadata,
+    Column("notification_id", Uuid, primary_key=True),
+    Column("user_id", Uuid, ForeignKey("users.user_id"), nullable=False),
+    Column("message", Text, nullable=False),
+    Column("is_read", Boolean, nullable=False),
+    Column("created_at", TIMESTAMP, nullable=False, server_default=func.now()),
+)
+
+Table(
+    "patients",
+    metadata,
+    Column("patient_id", Uuid, primary_key=True),
+    Column("user_id", Uuid, ForeignKey("users.user_id")),
+    Column("full_name", String),
+    Column("phone_number", String),
+    Column("age", Integer, nullable=False),
+    Column("gender", String, nullable=False),
+    Column("symptoms", Text, nullable=False),
+    Column("blood_pressure", String, nullable=False),
+    Column("heart_rate", Integer, nullable=False),
+    Column("temperature", Numeric(4, 2), nullable=False),
+    Column("pre_existing_conditions", Text),
+    Column("risk_level", String),
+    Column("created_at", TIMESTAMP, nullable=False, server_default=func.now()),
+    Index("ix_patients_phone_number", "phone_number"),
+    Index("ix_patients_user_id", "user_id"),
+)
+
+Table(
+    "priority_rules",
+    metadata,
+    Column("rule_id", Uuid, primary_key=True),
+    Column("condition_name", String(200), nullable=False),
+    Column("base_priority", Integer),
+    Column("department_id", Uuid, ForeignKey("departments.department_id")),
+    Column("emergency_override", Boolean, nullable=False),
+    Column("created_at", TIMESTAMP, nullable=False, server_default=func.now()),
+    Index("ix_priority_rules_condition_name_lower", text("lower(condition_name)")),
+)
+
+Table(
+    "patient_preferences",
+    metadata,
+    Column("preference_id", Uuid, primary_key=True),
+    Column("patient_id", Uuid, ForeignKey("patients.patient_id"), nullable=False),
+    Column("preferred_doctor", Uuid, ForeignKey("doctors.doctor_id"), nullable=False),
+    Column("created_at", TIMESTAMP, nullable=False, server_default=func.now()),
+    Index("ix_patient_preferences_patient_id_preferred_doctor", "patient_id", "preferred_doctor"),
+)
+
+Table(
+    "visits",
+    metadata,
+    Column("visit_id", Uuid, primary_key=True),
+    Column("patient_id", Uuid, ForeignKey("patients.patient_id")),
+    Column("visit_type", String),
+    Column("arrival_time", TIMESTAMP, nullable=False, server_default=func.now()),
+    Column("status", String, nullable=False),
+    Column("emergency_flag", Boolean, nullable=False),
+    Column("waiting_time_minutes", Integer, nullable=False),
+    Column("completed_at", TIMESTAMP),
+    Index("ix_visits_arrival_time", "arrival_time"),
+    Index("ix_visits_patient_id", "patient_id"),
+)
+
+Table(
+    "whatsapp_bookings",
+    metadata,
+    Column("booking_id", Uuid, primary_key=True),
+    Column("phone_number", String(20), nullable=False),
+    Column("patient_id", Uuid, ForeignKey("patients.patient_id")),
+    Column("symptoms", Text),
+    Column("triage_risk_score", Integer),
+    Column("assigned_department", Uuid, ForeignKey("departments.department_id")),
+    Column("assigned_doctor", Uuid, ForeignKey("doctors.doctor_id")),
+    Column("booking_status", String(20)),
+    Column("created_at", TIMESTAMP, nullable=False, server_default=func.now()),
+)
+
+Table(
+    "ai_assessments",
+    metadata,
+    Column("assessment_id", Uuid, primary_key=True),
+    Column("visit_id", Uuid, ForeignKey("visits.visit_id"), nullable=False),
+    Column("risk_score", Integer),
+    Column("risk_level", String),
+    Column("recommended_department", Uuid, ForeignKey("departments.department_id")),
+    Column("shap_explanation", JSON),
+    Column("model_version", String),
+    Column("confidence_score", Numeric(5, 2)),
+    Column("created_at", TIMESTAMP, nullable=False, server_default=func.now()),
+    Index("ix_ai_assessments_visit_id", "visit_id"),
+)
+
+Table(
+    "doctor_assignments",
+    metadata,
+    Column("assignment_id", Uuid, primary_key=True),
+    Column("visit_id", Uuid, ForeignKey("visits.visit_id"), nullable=False),
+    Column("doctor_id", Uuid, ForeignKey("doctors.doctor_id"), nullable=False),
+    Column("assigned_by", Uuid, ForeignKey("users.user_id")),
+    Column("assigned_at", TIMESTAMP, nullable=False, server_default=func.now()),
+    Column("is_active", Boolean, nullable=False),
+    Index("ix_doctor_assignments_doctor_id_is_active", "doctor_id", "is_active"),
+    Index("ix_doctor_assignments_visit_id", "visit_id"),
+)
+
+Table(
+    "documents",
+    metadata,
+    Column("document_id", Uuid, primary_key=True),
+    Column("patient_id", Uuid, ForeignKey("patients.patient_id"), nullable=False),
+    Column("visit_id", Uuid, ForeignKey("visits.visit_id")),
+    Column("file_url", Text, nullable=False),
+    Column("file_type", String(50)),
+    Column("extracted_text", Text),
+    Column("processed", Boolean, nullable=False),
+    Column("uploaded_at", TIMESTAMP, nullable=False, server_default=func.now()),
+)
+
+Table(
+    "emergency_alerts",
+    metadata,
+    Column("alert_id", Uuid, primary_key=True),
+    Column("visit_id", Uuid, ForeignKey("visits.visit_id"), nullable=False),
+    Column("triggered_by", String(50)),
+    Column("alert_message", Text),
+    Column("resolved", Boolean, nullable=False),
+    Column("created_at", TIMESTAMP, nullable=False, server_default=func.now()),
+)
+
+Table(
+    "medical_records",
+    metadata,
+    Column("record_id", Uuid, primary_key=True),
+    Column("visit_id", Uuid, ForeignKey("visits.visit_id"), nullable=False),
+    Column("doctor_id", Uuid, ForeignKey("doctors.doctor_id")),
+    Column("diagnosis", Text),
+    Column("syndrome_identified", Text),
+    Column("treatment_plan", Text),
+    Column("follow_up_required", Boolean, nullable=False),
+    Column("follow_up_date", TIMESTAMP),
+    Column("notes", Text),
+    Column("created_at", TIMESTAMP, nullable=False, server_default=func.now()),
+    Index("ix_medical_records_visit_id", "visit_id"),
+)
+
+Table(
+    "queue",
+    metadata,
+    Column("queue_id", Uuid, primary_key=True),
+    Column("visit_id", Uuid, ForeignKey("visits.visit_id"), nullable=False),
+    Column("doctor_id", Uuid, ForeignKey("doctors.doctor_id")),
+    Column("priority_score", Integer, nullable=False),
+    Column("queue_position", Integer),
+    Column("waiting_time_minutes", Integer, nullable=False),
+    Column("wait_time_boost", Integer, nullable=False),
+    Column("is_emergency", Boolean, nullable=False),
+    Column("last_updated", TIMESTAMP, nullable=False, server_default=func.now()),
+    Index("ix_queue_doctor_id_queue_position", "doctor_id", "queue_position"),
+    Index("ix_queue_visit_id", "visit_id"),
+)
+
+Table(
+    "prescriptions",
+    metadata,
+    Column("prescription_id", Uuid, primary_key=True),
+    Column("record_id", Uuid, ForeignKey("medical_records.record_id"), nullable=False),
+    Column("medication_name", String(200)),
+    Column("dosage", String(100)),
+    Column("frequency", String(100)),
+    Column("duration", String(100)),
+    Column("instructions", Text),
+    Index("ix_prescriptions_record_id", "record_id"),
+)
+
+
+def upgrade(sync_conn) -> None:
+    metadata.create_all(sync_conn, checkfirst=True)
@@ -0,0 +1,18 @@
+"""
+Doctor shift hours (HH:MM), used by doctor assignment. Replaces the old update_db.py
+for databases created before the columns existed.
+"""
+from sqlalchemy import inspect, text
+
+VERSION = 2
+DESCRIPTION = "doctor shift_start/shift_end columns"
+TRANSACTIONAL = True
+
+COLUMNS = {"shift_start": "'09:00'", "shift_end": "'17:00'"}
+
+
+def upgrade(sync_conn) -> None:
+    existing = {col["name"] for col in inspect(sync_conn).get_columns("doctors")}
+    for name, default in COLUMNS.items():
+        if name not in existing:
+            sync_conn.execute(text(f"ALTER TABLE doctors ADD COLUMN {name} VARCHAR(5) DEFAULT {default}"))
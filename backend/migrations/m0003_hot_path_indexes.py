@@ -0,0 +1,73 @@
+"""
+Secondary indexes for hot lookups, as declared in the frozen baseline (m0001).
+
+create_all only builds indexes together with new tables, so this adds the
+missing ones to older databases, one statement at a time (CONCURRENTLY on
+Postgres). An index on a column an old database lacks fails the migration,
+so schema_version never claims an index that is not there. On Postgres an
+INVALID index left by an interrupted CREATE INDEX CONCURRENTLY is dropped and
+built again.
+"""
+import logging
+import time
+
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateIndex
+
+from migrations.m0001_baseline import metadata
+
+VERSION = 3
+DESCRIPTION = "hot path indexes"
+TRANSACTIONAL = False
+
+logger = logging.getLogger(__name__)
+
+
+def _existing_index_names(sync_conn, inspector, table_name: str) -> set[str]:
+    if sync_conn.dialect.name == "sqlite":
+        # SQLite reflection skips expression indexes; the pragma lists every index by name
+        rows = sync_conn.execute(text(f"PRAGMA index_list('{table_name}')"))
+        return {row[1] for row in rows}
+    if sync_conn.dialect.name == "postgresql":
+        return set(sync_conn.execute(_PG_INDEXES, {"table": table_name, "valid": True}).scalars())
+    return {ix["name"] for ix in inspector.get_indexes(table_name)}
+
+
+# Indexes of a table on the search path, by pg_index.indisvalid
+_PG_INDEXES = text(
+    "SELECT i.relname FROM pg_index x"
+    " JOIN pg_class i ON i.oid = x.indexrelid"
+    " JOIN pg_class t ON t.oid = x.indrelid"
+    " WHERE t.relname = :table AND pg_table_is_visible(t.oid) AND x.indisvalid = :valid"
+)
+
+
+def upgrade(sync_conn) -> None:
+    inspector = inspect(sync_conn)
+    existing_tables = set(inspector.get_table_names())
+    for table in metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = _existing_index_names(sync_conn, inspector, table.name)
+        invalid = set()
+        if sync_conn.dialect.name == "postgresql":
+            invalid = set(sync_conn.execute(_PG_INDEXES, {"table": table.name, "valid": False}).scalars())
+        columns = {col["name"] for col in inspector.get_columns(table.name)}
+        for index in sorted(table.indexes, key=lambda ix: ix.name):
+            if index.name in existing:
+                continue
+            missing = [col.name for col in index.columns if col.name not in columns]
+            if missing:
+                raise RuntimeError(
+                    f"Cannot create {index.name}: {table.name} has no {', '.join(missing)}; "
+                    "add the column and run the migrations again"
+                )
+            ddl = str(CreateIndex(index).compile(dialect=sync_conn.dialect))
+            if sync_conn.dialect.name == "postgresql":
+                if index.name in invalid:
+                    logger.warning(f"Rebuilding {index.name}: an earlier build left it INVALID")
+                    sync_conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{index.name}"'))
+                ddl = ddl.replace("CREATE INDEX", "CREATE INDEX CONCURRENTLY", 1)
+            start = time.perf_counter()
+            sync_conn.execute(text(ddl))
+            logger.info(f"Created {index.name} in {(time.perf_counter() - start) * 1000:.1f} ms")
@@ -0,0 +1,22 @@
+"""
+dataset_sync table: per-CSV checksums for the incremental dataset2/ sync
+(services/dataset_loader.sync_datasets).
+"""
+from sqlalchemy import TIMESTAMP, Column, Integer, MetaData, String, Table, func
+
+VERSION = 4
+DESCRIPTION = "dataset_sync checksum table"
+TRANSACTIONAL = True
+
+dataset_sync = Table(
+    "dataset_sync",
+    MetaData(),
+    Column("dataset", String(100), primary_key=True),
+    Column("checksum", String(64), nullable=False),
+    Column("row_count", Integer),
+    Column("synced_at", TIMESTAMP, nullable=False, server_default=func.now()),
+)
+
+
+def upgrade(sync_conn) -> None:
+    dataset_sync.create(sync_conn, checkfirst=True)
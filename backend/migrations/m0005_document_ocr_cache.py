@@ -0,0 +1,65 @@
+"""
+documents: content hash and detected conditions for the OCR result cache, and
+patient_id made nullable (documents are stored at upload, before the visit).
+
+SQLite cannot drop NOT NULL in place, so there the table is rebuilt and its
+rows copied over; Postgres alters the column.
+"""
+from sqlalchemy import (
+    JSON, TIMESTAMP, Boolean, Column, ForeignKey, Index, MetaData, String, Table, Text, Uuid, func, inspect, text,
+)
+
+VERSION = 5
+DESCRIPTION = "documents OCR cache columns"
+TRANSACTIONAL = True
+
+NEW_COLUMNS = {"content_hash": "VARCHAR(64)", "detected_conditions": "JSON"}
+
+metadata = MetaData()
+# foreign-key targets only; never created here
+Table("patients", metadata, Column("patient_id", Uuid, primary_key=True))
+Table("visits", metadata, Column("visit_id", Uuid, primary_key=True))
+
+documents = Table(
+    "documents",
+    metadata,
+    Column("document_id", Uuid, primary_key=True),
+    Column("patient_id", Uuid, ForeignKey("patients.patient_id")),
+    Column("visit_id", Uuid, ForeignKey("visits.visit_id")),
+    Column("file_url", Text, nullable=False),
+    Column("file_type", String(50)),
+    Column("content_hash", String(64)),
+    Column("extracted_text", Text),
+    Column("detected_conditions", JSON),
+    Column("processed", Boolean, nullable=False),
+    Column("uploaded_at", TIMESTAMP, nullable=False, server_default=func.now()),
+    Index("ix_documents_content_hash", "content_hash"),
+)
+
+
+def upgrade(sync_conn) -> None:
+    table = documents
+    inspector = inspect(sync_conn)
+    if "documents" not in inspector.get_table_names():
+        table.create(sync_conn)
+        return
+    columns = {col["name"]: col for col in inspector.get_columns("documents")}
+    if set(NEW_COLUMNS) <= set(columns) and columns["patient_id"]["nullable"]:
+        return
+
+    if sync_conn.dialect.name == "sqlite":
+        sync_conn.execute(text("ALTER TABLE documents RENAME TO documents_old"))
+        for index in table.indexes:
+            sync_conn.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+        table.create(sync_conn)
+        shared = ", ".join(name for name in columns if name in table.c)
+        sync_conn.execute(text(f"INSERT INTO documents ({shared}) SELECT {shared} FROM documents_old"))
+        sync_conn.execute(text("DROP TABLE documents_old"))
+        return
+
+    sync_conn.execute(text("ALTER TABLE documents ALTER COLUMN patient_id DROP NOT NULL"))
+    for name, ddl_type in NEW_COLUMNS.items():
+        if name not in columns:
+            sync_conn.execute(text(f"ALTER TABLE documents ADD COLUMN {name} {ddl_type}"))
+    for index in table.indexes:
+        sync_conn.execute(text(f"CREATE INDEX IF NOT EXISTS {index.name} ON documents ({index.columns[0].name})"))
@@ -4,7 +4,7 @@ SQLite is the default runtime backend.
 """
 from sqlalchemy import (
     Column, Integer, String, Float, Boolean, Text, ForeignKey,
-    TIMESTAMP, Numeric, Uuid
+    TIMESTAMP, Numeric, Uuid, Index
 )
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 from sqlalchemy.sql import func
@@ -39,6 +39,9 @@ class Department(Base):
     description: Mapped[str] = mapped_column(Text, nullable=True)
     created_at: Mapped[datetime] = mapped_column(TIMESTAMP, server_default=func.now())
 
+    # get_department_id matches case-insensitively
+    __table_args__ = (Index("ix_departments_name_lower", func.lower(name)),)
+
 
 # ── Doctors ────────────────────────────────────────────────────
 class Doctor(Base):
@@ -46,7 +49,7 @@ class Doctor(Base):
 
     doctor_id: Mapped[uuid.UUID] = mapped_column(Uuid, primary_key=True, default=uuid.uuid4)
     user_id: Mapped[uuid.UUID] = mapped_column(Uuid, ForeignKey("users.user_id"), unique=True)
-    department_id: Mapped[uuid.UUID] = mapped_column(Uuid, ForeignKey("departments.department_id"), nullable=True)
+    department_id: Mapped[uuid.UUID] = mapped_column(Uuid, ForeignKey("departments.department_id"), nullable=True, index=True)
     specialization: Mapped[str] = mapped_column(String, nullable=True)
     experience_years: Mapped[int] = mapped_column(Integer, nullable=True)
     consultation_fee: Mapped[float] = mapped_column(Numeric(10, 2), nullable=True)
@@ -62,9 +65,9 @@ class Patient(Base):
     __tablename__ = "patients"
 
     patient_id: Mapped[uuid.UUID] = mapped_column(Uuid, primary_key=True, default=uuid.uuid4)
-    user_id: Mapped[uuid.UUID] = mapped_column(Uuid, ForeignKey("users.user_id"), nullable=True)
+    user_id: Mapped[uuid.UUID] = mapped_column(Uuid, ForeignKey("users.user_id"), nullable=True, index=True)
     full_name: Mapped[str] = mapped_column(String, nullable=True)
-    phone_number: Mapped[str] = mapped_column(String, nullable=True)
+    phone_number: Mapped[str] = mapped_column(String, nullable=True, index=True)
     age: Mapped[int] = mapped_column(Integer, nullable=False)
     gender: Mapped[str] = mapped_column(String, nullable=False)
     symptoms: Mapped[str] = mapped_column(Text, nullable=False)
@@ -81,9 +84,9 @@ class Visit(Base):
     __tablename__ = "visits"
 
     visit_id: Mapped[uuid.UUID] = mapped_column(Uuid, primary_key=True, default=uuid.uuid4)
-    patient_id: Mapped[uuid.UUID] = mapped_column(Uuid, ForeignKey("patients.patient_id"), nullable=True)
+    patient_id: Mapped[uuid.UUID] = mapped_column(Uuid, ForeignKey("patients.patient_id"), nullable=True, index=True)
     visit_type: Mapped[str] = mapped_column(String, nullable=True)
-    arrival_time: Mapped[datetime] = mapped_column(TIMESTAMP, server_default=func.now())
+    arrival_time: Mapped[datetime] = mapped_column(TIMESTAMP, server_default=func.now(), index=True)
     status: Mapped[str] = mapped_column(String, default="Waiting")
     emergency_flag: Mapped[bool] = mapped_column(Boolean, default=False)
     waiting_time_minutes: Mapped[int] = mapped_column(Integer, default=0)
@@ -95,7 +98,7 @@ class AIAssessment(Base):
     __tablename__ = "ai_assessments"
 
     assessment_id: Mapped[uuid.UUID] = mapped_column(Uuid, primary_key=True, default=uuid.uuid4)
-    visit_id: Mapped[uuid.UUID] = mapped_column(Uuid, ForeignKey("visits.visit_id"))
+    visit_id: Mapped[uuid.UUID] = mapped_column(Uuid, ForeignKey("visits.visit_id"), index=True)
     risk_score: Mapped[int] = mapped_column(Integer, nullable=True)
     risk_level: Mapped[str] = mapped_column(String, nullable=True)
     recommended_department: Mapped[uuid.UUID] = mapped_column(Uuid, ForeignKey("departments.department_id"), nullable=True)
@@ -116,6 +119,8 @@ class PriorityRule(Base):
     emergency_override: Mapped[bool] = mapped_column(Boolean, default=False)
     created_at: Mapped[datetime] = mapped_column(TIMESTAMP, server_default=func.now())
 
+    __table_args__ = (Index("ix_priority_rules_condition_name_lower", func.lower(condition_name)),)
+
 
 # ── Symptom Severity ───────────────────────────────────────────
 class SymptomSeverity(Base):
@@ -128,6 +133,8 @@ class SymptomSeverity(Base):
     associated_department: Mapped[str] = mapped_column(String(100), nullable=True)
     typical_duration_days: Mapped[int] = mapped_column(Integer, nullable=True)
 
+    __table_args__ = (Index("ix_symptom_severity_symptom_name_lower", func.lower(symptom_name)),)
+
 
 # ── Vital Signs Reference ──────────────────────────────────────
 class VitalSignReference(Base):
@@ -156,18 +163,23 @@ class ChronicCondition(Base):
     associated_department: Mapped[str] = mapped_column(String(100), nullable=True)
     complication_risk_level: Mapped[str] = mapped_column(String(50), nullable=True)
 
+    __table_args__ = (Index("ix_chronic_conditions_chronic_condition_lower", func.lower(chronic_condition)),)
+
 
 # ── Doctor Assignments ─────────────────────────────────────────
 class DoctorAssignment(Base):
     __tablename__ = "doctor_assignments"
 
     assignment_id: Mapped[uuid.UUID] = mapped_column(Uuid, primary_key=True, default=uuid.uuid4)
-    visit_id: Mapped[uuid.UUID] = mapped_column(Uuid, ForeignKey("visits.visit_id"))
+    visit_id: Mapped[uuid.UUID] = mapped_column(Uuid, ForeignKey("visits.visit_id"), index=True)
     doctor_id: Mapped[uuid.UUID] = mapped_column(Uuid, ForeignKey("doctors.doctor_id"))
     assigned_by: Mapped[uuid.UUID] = mapped_column(Uuid, ForeignKey("users.user_id"), nullable=True)
     assigned_at: Mapped[datetime] = mapped_column(TIMESTAMP, server_default=func.now())
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
 
+    # Doctor load counts filter on (doctor_id, is_active)
+    __table_args__ = (Index("ix_doctor_assignments_doctor_id_is_active", doctor_id, is_active),)
+
 
 # ── Patient Doctor Preference ─────────────────────────────────
 class PatientPreference(Base):
@@ -178,13 +190,15 @@ class PatientPreference(Base):
     preferred_doctor: Mapped[uuid.UUID] = mapped_column(Uuid, ForeignKey("doctors.doctor_id"))
     created_at: Mapped[datetime] = mapped_column(TIMESTAMP, server_default=func.now())
 
+    __table_args__ = (Index("ix_patient_preferences_patient_id_preferred_doctor", patient_id, preferred_doctor),)
+
 
 # ── Queue ──────────────────────────────────────────────────────
 class Queue(Base):
     __tablename__ = "queue"
 
     queue_id: Mapped[uuid.UUID] = mapped_column(Uuid, primary_key=True, default=uuid.uuid4)
-    visit_id: Mapped[uuid.UUID] = mapped_column(Uuid, ForeignKey("visits.visit_id"))
+    visit_id: Mapped[uuid.UUID] = mapped_column(Uuid, ForeignKey("visits.visit_id"), index=True)
     doctor_id: Mapped[uuid.UUID] = mapped_column(Uuid, ForeignKey("doctors.doctor_id"), nullable=True)
     priority_score: Mapped[int] = mapped_column(Integer)
     queue_position: Mapped[int] = mapped_column(Integer, nullable=True)
@@ -193,13 +207,16 @@ class Queue(Base):
     is_emergency: Mapped[bool] = mapped_column(Boolean, default=False)
     last_updated: Mapped[datetime] = mapped_column(TIMESTAMP, server_default=func.now())
 
+    # Per-doctor queue reads, next-position lookups and reorders
+    __table_args__ = (Index("ix_queue_doctor_id_queue_position", doctor_id, queue_position),)
+
 
 # ── Medical Records ────────────────────────────────────────────
 class MedicalRecord(Base):
     __tablename__ = "medical_records"
 
     record_id: Mapped[uuid.UUID] = mapped_column(Uuid, primary_key=True, default=uuid.uuid4)
-    visit_id: Mapped[uuid.UUID] = mapped_column(Uuid, ForeignKey("visits.visit_id"))
+    visit_id: Mapped[uuid.UUID] = mapped_column(Uuid, ForeignKey("visits.visit_id"), index=True)
     doctor_id: Mapped[uuid.UUID] = mapped_column(Uuid, ForeignKey("doctors.doctor_id"), nullable=True)
     diagnosis: Mapped[str] = mapped_column(Text, nullable=True)
     syndrome_identified: Mapped[str] = mapped_column(Text, nullable=True)
@@ -215,7 +232,7 @@ class Prescription(Base):
     __tablename__ = "prescriptions"
 
     prescription_id: Mapped[uuid.UUID] = mapped_column(Uuid, primary_key=True, default=uuid.uuid4)
-    record_id: Mapped[uuid.UUID] = mapped_column(Uuid, ForeignKey("medical_records.record_id"))
+    record_id: Mapped[uuid.UUID] = mapped_column(Uuid, ForeignKey("medical_records.record_id"), index=True)
     medication_name: Mapped[str] = mapped_column(String(200), nullable=True)
     dosage: Mapped[str] = mapped_column(String(100), nullable=True)
     frequency: Mapped[str] = mapped_column(String(100), nullable=True)
@@ -282,6 +299,17 @@ class FocusedPatientDataset(Base):
     risk_level: Mapped[str] = mapped_column(String(20), nullable=True)
 
 
+# ── Dataset Sync State ─────────────────────────────────────────
+class DatasetSync(Base):
+    """Fingerprint of the dataset2/ CSV last synced into each knowledge-base table."""
+    __tablename__ = "dataset_sync"
+
+    dataset: Mapped[str] = mapped_column(String(100), primary_key=True)
+    checksum: Mapped[str] = mapped_column(String(64), nullable=False)
+    row_count: Mapped[int] = mapped_column(Integer, nullable=True)
+    synced_at: Mapped[datetime] = mapped_column(TIMESTAMP, server_default=func.now())
+
+
 # Backwards-compatible alias
 VitalSignsReference = VitalSignReference
 
@@ -290,12 +318,15 @@ VitalSignsReference = VitalSignReference
 class Document(Base):
     __tablename__ = "documents"
 
-    document_id: Mapped[uuid.UUID] = mapped_column(Uuid, primary_key=True, default=uuid.uuid4)
-    patient_id: Mapped[uuid.UUID] = mapped_column(Uuid, ForeignKey("patients.patient_id"))
+    document_id: Mapped[uuid.UUID] = mapped_column(Uuid, primary_key=True, default=uuid.uuid4)  # = OCR job id
+    # Uploads precede the visit; patient and visit are filled in when a visit references the document
+    patient_id: Mapped[uuid.UUID] = mapped_column(Uuid, ForeignKey("patients.patient_id"), nullable=True)
     visit_id: Mapped[uuid.UUID] = mapped_column(Uuid, ForeignKey("visits.visit_id"), nullable=True)
     file_url: Mapped[str] = mapped_column(Text, nullable=False)
     file_type: Mapped[str] = mapped_column(String(50), nullable=True)
+    content_hash: Mapped[str] = mapped_column(String(64), nullable=True, index=True)  # SHA-256 of the file
     extracted_text: Mapped[str] = mapped_column(Text, nullable=True)
+    detected_conditions: Mapped[dict] = mapped_column(JSON_TYPE, nullable=True)
     processed: Mapped[bool] = mapped_column(Boolean, default=False)
     uploaded_at: Mapped[datetime] = mapped_column(TIMESTAMP, server_default=func.now())
 
@@ -1,19 +1,19 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update, delete
-from db import get_db
+from db import get_db, get_read_db
 from models import Queue, Visit, DoctorAssignment, AuditLog, MedicalRecord
-from services.ws_manager import manager as ws_manager
 from schemas import ServeRequest, MedicalRecordCreate
 from services.queue_service import reorder_queue_for_doctor
 from services.preference_service import record_doctor_preference
+from services.ws_manager import notify_stats_changed
 import uuid
 from datetime import datetime, timezone
 
 router = APIRouter(prefix="/doctor", tags=["Doctor"])
 
 @router.get("/queue/{doctor_id}")
-async def get_doctor_queue_endpoint(doctor_id: str, db: AsyncSession = Depends(get_db)):
+async def get_doctor_queue_endpoint(doctor_id: str, db: AsyncSession = Depends(get_read_db)):
     """Get active queue for a specific doctor."""
     from services.queue_service import get_doctor_queue # Late import to avoid circular if any
     async with db.begin():
@@ -74,15 +74,14 @@ async def serve_queue_entry(queue_id: str, req: ServeRequest, db: AsyncSession =
         db.add(audit)
 
         if entry.doctor_id:
-            queue_list = await reorder_queue_for_doctor(db, str(entry.doctor_id))
-            await ws_manager.broadcast_to_doctor(str(entry.doctor_id), {
+            await reorder_queue_for_doctor(db, str(entry.doctor_id), event={
                 "event": f"queue_{req.action}",
                 "queue_id": queue_id,
                 "visit_id": str(entry.visit_id),
                 "action": req.action,
-                "queue": queue_list,
             })
-            
+
+    notify_stats_changed()  # visit status and department load
     return {"status": "ok", "queue_id": queue_id, "action": req.action}
 
 
@@ -3,7 +3,7 @@ API Routes for ML-based patient insights
 """
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from db import get_db
+from db import get_read_db
 from services.ml_insights import extract_key_insights, get_patient_insights_text
 
 router = APIRouter(prefix="/patient", tags=["Patient Insights"])
@@ -12,7 +12,7 @@ router = APIRouter(prefix="/patient", tags=["Patient Insights"])
 @router.get("/{patient_id}/insights")
 async def get_patient_insights(
     patient_id: str,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get ML-extracted insights for a patient's medical history.
@@ -28,7 +28,7 @@ async def get_patient_insights(
 @router.get("/{patient_id}/insights/text")
 async def get_patient_insights_summary(
     patient_id: str,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get a formatted text summary of patient insights for quick display.
@@ -4,9 +4,9 @@ Queue Management API Routes - Reordering and Admin Controls
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from db import get_db
+from db import get_db, get_read_db
 from models import Queue
-from services.queue_service import reorder_queue_for_doctor
+from services.queue_service import get_doctor_queue, reorder_queue_for_doctor
 from datetime import datetime, timezone
 
 router = APIRouter(prefix="/queue", tags=["Queue Management"])
@@ -45,14 +45,16 @@ async def recompute_queue_priorities(
 @router.get("/{doctor_id}")
 async def get_doctor_queue_endpoint(
     doctor_id: str,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get the dynamically sorted queue for a specific doctor.
-    Returns queue with wait-time boost applied.
+    Returns queue with wait-time boost applied. Read-only: positions are
+    persisted and broadcast by the writes that change the queue.
     """
     try:
-        queue_list = await reorder_queue_for_doctor(db, doctor_id)
+        async with db.begin():
+            queue_list = await get_doctor_queue(db, doctor_id)
         return {"queue": queue_list}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, or_
-from db import get_db
+from db import get_db, get_read_db
 from models import Patient, User
 from pydantic import BaseModel
 from typing import List, Optional
@@ -34,7 +34,7 @@ class PatientResponse(BaseModel):
     current_visit: Optional[CurrentVisitInfo] = None
 
 @router.get("/patients/search", response_model=List[PatientResponse])
-async def search_patients(q: str, db: AsyncSession = Depends(get_db)):
+async def search_patients(q: str, db: AsyncSession = Depends(get_read_db)):
     """Search patients by name or phone and include current active visit info."""
     from models import Visit, DoctorAssignment, Doctor, User, Department
     
@@ -122,7 +122,7 @@ async def create_patient(payload: PatientCreate, db: AsyncSession = Depends(get_
             "risk_level": new_patient.risk_level # None initially
         }
 @router.get("/visiting-patients", response_model=List[dict])
-async def get_visiting_patients(db: AsyncSession = Depends(get_db)):
+async def get_visiting_patients(db: AsyncSession = Depends(get_read_db)):
     """
     Get list of patients who have been assigned to a doctor.
     Shows Patient Name, Assigned Doctor, Department, and Syndrome/Risk.
@@ -18,6 +18,7 @@ class VisitRequest(BaseModel):
     chronic_conditions: list[str] = []
     visit_type: str = "Walk-In"
     uploaded_documents: list[str] = []  # file paths for OCR
+    ocr_job_ids: list[str] = []  # finished /documents/upload jobs to reuse
     patient_id: Optional[str] = None
     full_name: Optional[str] = None
     phone_number: Optional[str] = None
@@ -10,7 +10,6 @@ import os
 import sys
 from pathlib import Path
 import uuid
-import pandas as pd
 from dotenv import load_dotenv
 from sqlalchemy import func, select
 
@@ -23,13 +22,14 @@ load_dotenv(ROOT / "backend" / ".env")
 
 from backend.db import engine, AsyncSessionLocal, USE_SQLITE
 from backend.models import Base, Department, Doctor
+from services.dataset_loader import sync_datasets
+from services.knowledge_base import SNAPSHOT_FILE, build_snapshot
 from backend.models import (
     DiseasePriority, SymptomSeverity, VitalSignReference,
     ChronicConditionModifier, DoctorSpecialization, FocusedPatientDataset
 )
 
 DATA_DIR = ROOT / "dataset2"
-CACHE_FILE = ROOT / "backend" / "data_cache.json"
 
 
 async def create_tables():
@@ -139,134 +139,17 @@ async def seed_departments_and_doctors():
         return False
 
 
-async def import_table(df: pd.DataFrame, model_cls, mapping: dict, session):
-    """Import dataframe rows into table."""
-    rows = []
-    for _, r in df.iterrows():
-        kwargs = {}
-        for col, attr in mapping.items():
-            val = r.get(col)
-            if pd.isna(val):
-                val = None
-            if isinstance(val, str):
-                vlow = val.strip().lower()
-                if vlow in ("true", "yes", "y", "1"):
-                    val = True
-                elif vlow in ("false", "no", "n", "0"):
-                    val = False
-            kwargs[attr] = val
-        rows.append(model_cls(**kwargs))
-    if rows:
-        session.add_all(rows)
-    return len(rows)
-
-
 async def import_datasets():
-    """Import all CSV datasets."""
+    """Sync all CSV datasets (unchanged CSVs are skipped)."""
     print("\n[3/5] Importing dataset CSVs...")
     
     try:
-        async with AsyncSessionLocal() as session:
-            async with session.begin():
-                # 1. disease_priority
-                print("  -> disease_priority...", end=" ")
-                df1 = pd.read_csv(DATA_DIR / "1_disease_priority_10k.csv")
-                mapping1 = {
-                    "Condition_ID": "condition_id",
-                    "Condition_Name": "condition_name",
-                    "Condition_Category": "condition_category",
-                    "Base_Severity_Score": "base_severity_score",
-                    "Default_Department": "default_department",
-                    "Emergency_Flag": "emergency_flag",
-                    "Contagious_Flag": "contagious_flag",
-                    "Max_Recommended_Wait_Time_Minutes": "max_recommended_wait_minutes",
-                    "Mortality_Risk_Level": "mortality_risk_level",
-                    "Progression_Speed": "progression_speed",
-                }
-                count1 = await import_table(df1, DiseasePriority, mapping1, session)
-                print(f"{count1} rows")
-
-                # 2. symptom_severity
-                print("  -> symptom_severity...", end=" ")
-                df2 = pd.read_csv(DATA_DIR / "2_symptom_severity_10k.csv")
-                mapping2 = {
-                    "Symptom_ID": "symptom_id",
-                    "Symptom_Name": "symptom_name",
-                    "Base_Severity": "base_severity",
-                    "Emergency_Trigger": "emergency_trigger",
-                    "Associated_Department": "associated_department",
-                    "Possible_Linked_Conditions": "possible_linked_conditions",
-                    "Typical_Duration_Days": "typical_duration_days",
-                }
-                count2 = await import_table(df2, SymptomSeverity, mapping2, session)
-                print(f"{count2} rows")
-
-                # 3. vital_signs_reference
-                print("  -> vital_signs_reference...", end=" ")
-                df3 = pd.read_csv(DATA_DIR / "3_vital_signs_reference_10k.csv")
-                mapping3 = {
-                    "Vital_ID": "vital_id",
-                    "Vital_Type": "vital_type",
-                    "Age_Group": "age_group",
-                    "Condition_Modifier": "condition_modifier",
-                    "Critical_Low_Threshold": "critical_low_threshold",
-                    "Critical_High_Threshold": "critical_high_threshold",
-                    "Moderate_Low_Threshold": "moderate_low_threshold",
-                    "Moderate_High_Threshold": "moderate_high_threshold",
-                    "Critical_Instability_Score": "critical_instability_score",
-                    "Moderate_Instability_Score": "moderate_instability_score",
-                }
-                count3 = await import_table(df3, VitalSignReference, mapping3, session)
-                print(f"{count3} rows")
-
-                # 4. chronic_condition_modifiers
-                print("  -> chronic_condition_modifiers...", end=" ")
-                df4 = pd.read_csv(DATA_DIR / "4_chronic_condition_modifiers_10k.csv")
-                mapping4 = {
-                    "Chronic_ID": "chronic_id",
-                    "Chronic_Condition": "chronic_condition",
-                    "Risk_Modifier_Score": "risk_modifier_score",
-                    "High_Risk_With_Symptoms": "high_risk_with_symptoms",
-                    "Associated_Department": "associated_department",
-                    "Complication_Risk_Level": "complication_risk_level",
-                }
-                count4 = await import_table(df4, ChronicConditionModifier, mapping4, session)
-                print(f"{count4} rows")
-
-                # 5. doctor_specialization
-                print("  -> doctor_specialization...", end=" ")
-                df5 = pd.read_csv(DATA_DIR / "5_doctor_specialization_10k.csv")
-                mapping5 = {
-                    "Doctor_ID": "doctor_id",
-                    "Specialization": "specialization",
-                    "Subspecialty": "subspecialty",
-                    "Experience_Years": "experience_years",
-                    "Max_Patients_Per_Hour": "max_patients_per_hour",
-                    "Critical_Case_Certified": "critical_case_certified",
-                    "Performance_Score": "performance_score",
-                    "Preferred_Case_Types": "preferred_case_types",
-                    "Consultation_Fee": "consultation_fee",
-                    "Availability_Hours_Per_Week": "availability_hours_per_week",
-                }
-                count5 = await import_table(df5, DoctorSpecialization, mapping5, session)
-                print(f"{count5} rows")
-
-                # 6. focused_patient_dataset
-                print("  → focused_patient_dataset...", end=" ")
-                df6 = pd.read_csv(DATA_DIR / "focused_patient_dataset_15k.csv")
-                mapping6 = {
-                    "Patient_ID": "patient_id",
-                    "Age": "age",
-                    "Gender": "gender",
-                    "Symptoms": "symptoms",
-                    "Blood_Pressure": "blood_pressure",
-                    "Heart_Rate": "heart_rate",
-                    "Temperature": "temperature",
-                    "Pre_Existing_Conditions": "pre_existing_conditions",
-                    "Risk_Level": "risk_level",
-                }
-                count6 = await import_table(df6, FocusedPatientDataset, mapping6, session)
-                print(f"{count6} rows")
+        results = await sync_datasets(engine, DATA_DIR)
+        for name, r in results.items():
+            if r["status"] == "unchanged":
+                print(f"  -> {name}: unchanged")
+            else:
+                print(f"  -> {name}: {r['inserted']} inserted, {r['updated']} updated, {r['deleted']} deleted")
         
         print("✓ All datasets imported successfully")
         return True
@@ -278,23 +161,16 @@ async def import_datasets():
 
 
 async def build_cache():
-    """Build symptom->department cache."""
-    print("\n[4/5] Building data cache...")
+    """Build the mmap'd knowledge-base snapshot read by triage."""
+    print("\n[4/5] Building knowledge-base snapshot...")
     
     try:
-        import json
-        async with AsyncSessionLocal() as session:
-            stmt = select(SymptomSeverity.symptom_name, SymptomSeverity.associated_department)
-            res = await session.execute(stmt)
-            mapping = {row[0].strip().lower(): row[1] for row in res if row[0] and row[1]}
-        
-        with open(CACHE_FILE, "w", encoding="utf-8") as f:
-            json.dump({"symptom_to_department": mapping}, f, indent=2)
-        
-        print(f"✓ Cache built with {len(mapping)} symptom mappings")
+        counts = await build_snapshot(engine, SNAPSHOT_FILE)
+        summary = ", ".join(f"{n} {name}" for name, n in counts.items())
+        print(f"✓ Snapshot written to {SNAPSHOT_FILE} ({summary})")
         return True
     except Exception as e:
-        print(f"✗ Failed to build cache: {e}")
+        print(f"✗ Failed to build snapshot: {e}")
         return False
 
 
@@ -339,7 +215,7 @@ async def main():
         ("Creating tables", create_tables),
         ("Seeding departments/doctors", seed_departments_and_doctors),
         ("Importing datasets", import_datasets),
-        ("Building cache", build_cache),
+        ("Building knowledge-base snapshot", build_cache),
         ("Verifying data", verify_data),
     ]
     
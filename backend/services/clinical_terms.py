@@ -0,0 +1,114 @@
+"""
+Clinical vocabulary shared by OCR condition detection and patient insights.
+
+All keyword tables, plus the symptom and chronic-condition names from the
+knowledge-base snapshot, are compiled into one TermMatcher, so each OCR
+page or medical-record field is scanned once whatever the vocabulary size.
+Matching is whole-word. `with_inflections` adds the other forms of each
+term's last word: the verb forms listed in WORD_FORMS ("vomit", "vomiting",
+"vomited"), or else a simple plural. Triage's symptom matcher uses it too.
+"""
+from services.keyword_matcher import TermMatcher
+from services.knowledge_base import load_knowledge_base
+
+# ── OCR keyword → condition/symptom mapping (canonical names match utils.SYMPTOM_MAP / CHRONIC_MAP) ──
+CHRONIC_KEYWORDS = {
+    "hypertension": "hypertension",
+    "high blood pressure": "hypertension",
+    "diabetes": "diabetes",
+    "diabetic": "diabetes",
+    "type 2 diabetes": "diabetes",
+    "type 1 diabetes": "diabetes",
+    "heart disease": "heart disease",
+    "cardiac": "heart disease",
+    "coronary": "heart disease",
+    "asthma": "asthma",
+    "chronic kidney": "chronic kidney disease",
+    "ckd": "chronic kidney disease",
+    "renal failure": "chronic kidney disease",
+}
+
+SYMPTOM_KEYWORDS = {
+    "chest pain": "chest pain",
+    "shortness of breath": "shortness of breath",
+    "dyspnea": "shortness of breath",
+    "fever": "fever",
+    "cough": "cough",
+    "headache": "headache",
+    "dizzy": "dizziness",
+    "dizziness": "dizziness",
+    "vomit": "vomiting",
+    "nausea": "vomiting",
+    "diarrhea": "diarrhea",
+    "abdominal pain": "abdominal pain",
+    "stomach pain": "abdominal pain",
+    "palpitation": "palpitations",
+    "weakness": "weakness",
+    "fatigue": "weakness",
+    "numbness": "numbness",
+    "tingling": "numbness",
+}
+
+# ── Patient insights: conditions and findings to highlight ──
+CHRONIC_CONDITIONS = [
+    "diabetes", "hypertension", "heart disease", "asthma", "copd", "cancer",
+    "stroke", "kidney disease", "liver disease", "hiv", "hepatitis"
+]
+
+HIGH_RISK_SYMPTOMS = [
+    "chest pain", "shortness of breath", "unconscious", "bleeding", "seizure",
+    "stroke", "heart attack", "severe pain", "difficulty breathing"
+]
+
+
+# Every form of the words that appear as verbs (or with a singular) at the end of a term;
+# any other last word only gets a plural "s", so nouns never get made-up "-ing"/"-ed" forms
+WORD_FORMS = [
+    ("cough", "coughs", "coughing", "coughed"),
+    ("vomit", "vomits", "vomiting", "vomited"),
+    ("bleed", "bleeds", "bleeding"),
+    ("palpitation", "palpitations"),
+]
+_FORMS_OF = {form: forms for forms in WORD_FORMS for form in forms}
+
+
+def with_inflections(terms: dict[str, str]) -> dict[str, str]:
+    """`terms` (keyword -> canonical term) plus the other forms of each keyword's last word."""
+    vocabulary = dict(terms)
+    for keyword, term in terms.items():
+        *head, last = keyword.split(" ")
+        forms = _FORMS_OF.get(last) or ((last + "s",) if not last.endswith("s") else ())
+        for form in forms:
+            vocabulary.setdefault(" ".join(head + [form]), term)
+    return vocabulary
+
+
+def build_term_matcher(kb=None) -> TermMatcher:
+    """
+    Categories: "chronic" and "symptom" (OCR, canonical triage names), "history" and
+    "high_risk" (insights), "kb_symptom" and "kb_chronic" (knowledge-base names).
+    """
+    vocabularies = {
+        "chronic": with_inflections(CHRONIC_KEYWORDS),
+        "symptom": with_inflections(SYMPTOM_KEYWORDS),
+        "history": with_inflections({c: c for c in CHRONIC_CONDITIONS}),
+        "high_risk": with_inflections({s: s for s in HIGH_RISK_SYMPTOMS}),
+    }
+    if kb is not None:
+        vocabularies["kb_symptom"] = {name: name for name in kb.keys("symptoms")}
+        vocabularies["kb_chronic"] = {name: name for name in kb.keys("chronic")}
+    return TermMatcher(vocabularies)
+
+
+TERM_MATCHER = build_term_matcher(load_knowledge_base())
+
+
+def refresh_term_matcher(kb) -> None:
+    """Recompile with the vocabulary of a newly mapped knowledge base."""
+    global TERM_MATCHER
+    TERM_MATCHER = build_term_matcher(kb)
+
+
+def scan(text: str, categories=None) -> dict[str, list[str]]:
+    """Canonical terms found in `text` per category (all categories unless given)."""
+    return TERM_MATCHER.scan(text, categories)
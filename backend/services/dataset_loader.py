@@ -0,0 +1,312 @@
+"""
+Bulk loader and incremental sync for the dataset2/ knowledge-base CSVs.
+
+Each CSV is read column-wise with pandas, normalized per target column type
+(boolean-like strings, NaN -> NULL, CSV ids -> UUIDs for Uuid keys) and
+upserted on the primary key with Core INSERT executemany in chunks. On
+Postgres with asyncpg the rows are COPYed into a temp table and merged with
+one INSERT ... ON CONFLICT. Re-running a load updates rows in place.
+
+sync_datasets() fingerprints each CSV (SHA-256, recorded in dataset_sync),
+skips files that have not changed since the last sync and diffs the others
+against the table by primary key, applying only the inserts, updates and
+deletes.
+"""
+import hashlib
+import logging
+import time
+import uuid
+from decimal import Decimal
+from pathlib import Path
+
+import pandas as pd
+from sqlalchemy import Boolean, Integer, MetaData, String, Uuid, delete, func, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+
+from models import (
+    DiseasePriority, SymptomSeverity, VitalSignReference,
+    ChronicConditionModifier, DoctorSpecialization, FocusedPatientDataset, DatasetSync
+)
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = Path(__file__).resolve().parents[2] / "dataset2"
+CHUNK_SIZE = 5000
+
+# Stable UUIDs for CSV ids loaded into Uuid primary keys, so re-imports hit the same rows
+DATASET_NAMESPACE = uuid.UUID("6f1c3a52-9b7e-4d0a-8e39-2f5d7c41b8a6")
+
+BOOL_VALUES = {
+    "true": True, "yes": True, "y": True, "1": True,
+    "false": False, "no": False, "n": False, "0": False,
+}
+
+# table name -> CSV file, model and CSV column -> model attribute mapping
+DATASETS = {
+    "disease_priority": {
+        "file": "1_disease_priority_10k.csv",
+        "model": DiseasePriority,
+        "columns": {
+            "Condition_ID": "condition_id",
+            "Condition_Name": "condition_name",
+            "Condition_Category": "condition_category",
+            "Base_Severity_Score": "base_severity_score",
+            "Default_Department": "default_department",
+            "Emergency_Flag": "emergency_flag",
+            "Contagious_Flag": "contagious_flag",
+            "Max_Recommended_Wait_Time_Minutes": "max_recommended_wait_minutes",
+            "Mortality_Risk_Level": "mortality_risk_level",
+            "Progression_Speed": "progression_speed",
+        },
+    },
+    "symptom_severity": {
+        "file": "2_symptom_severity_10k.csv",
+        "model": SymptomSeverity,
+        "columns": {
+            "Symptom_ID": "symptom_id",
+            "Symptom_Name": "symptom_name",
+            "Base_Severity": "base_severity",
+            "Emergency_Trigger": "emergency_trigger",
+            "Associated_Department": "associated_department",
+            "Typical_Duration_Days": "typical_duration_days",
+        },
+    },
+    "vital_signs_reference": {
+        "file": "3_vital_signs_reference_10k.csv",
+        "model": VitalSignReference,
+        "columns": {
+            "Vital_ID": "vital_id",
+            "Vital_Type": "vital_type",
+            "Age_Group": "age_group",
+            "Condition_Modifier": "condition_modifier",
+            "Critical_Low_Threshold": "critical_low_threshold",
+            "Critical_High_Threshold": "critical_high_threshold",
+            "Moderate_Low_Threshold": "moderate_low_threshold",
+            "Moderate_High_Threshold": "moderate_high_threshold",
+            "Critical_Instability_Score": "critical_instability_score",
+            "Moderate_Instability_Score": "moderate_instability_score",
+        },
+    },
+    "chronic_condition_modifiers": {
+        "file": "4_chronic_condition_modifiers_10k.csv",
+        "model": ChronicConditionModifier,
+        "columns": {
+            "Chronic_ID": "chronic_id",
+            "Chronic_Condition": "chronic_condition",
+            "Risk_Modifier_Score": "risk_modifier_score",
+            "High_Risk_With_Symptoms": "high_risk_with_symptoms",
+            "Associated_Department": "associated_department",
+            "Complication_Risk_Level": "complication_risk_level",
+        },
+    },
+    "doctor_specialization": {
+        "file": "5_doctor_specialization_10k.csv",
+        "model": DoctorSpecialization,
+        "columns": {
+            "Doctor_ID": "doctor_id",
+            "Specialization": "specialization",
+            "Subspecialty": "subspecialty",
+            "Experience_Years": "experience_years",
+            "Max_Patients_Per_Hour": "max_patients_per_hour",
+            "Critical_Case_Certified": "critical_case_certified",
+            "Performance_Score": "performance_score",
+            "Preferred_Case_Types": "preferred_case_types",
+            "Consultation_Fee": "consultation_fee",
+            "Availability_Hours_Per_Week": "availability_hours_per_week",
+        },
+    },
+    "focused_patient_dataset": {
+        "file": "focused_patient_dataset_15k.csv",
+        "model": FocusedPatientDataset,
+        "columns": {
+            "Patient_ID": "patient_id",
+            "Age": "age",
+            "Gender": "gender",
+            "Symptoms": "symptoms",
+            "Blood_Pressure": "blood_pressure",
+            "Heart_Rate": "heart_rate",
+            "Temperature": "temperature",
+            "Pre_Existing_Conditions": "pre_existing_conditions",
+            "Risk_Level": "risk_level",
+        },
+    },
+}
+
+
+def dataset_uuid(value) -> uuid.UUID:
+    """UUID stored for a CSV id in a Uuid column (ids that already are UUIDs are kept)."""
+    value = str(value).strip()
+    try:
+        return uuid.UUID(value)
+    except ValueError:
+        return uuid.uuid5(DATASET_NAMESPACE, value)
+
+
+def read_dataset(path: Path, model, columns: dict) -> pd.DataFrame:
+    """Read a CSV into a frame of model attribute -> DB-ready values (None for missing)."""
+    frame = pd.read_csv(path, usecols=list(columns)).rename(columns=columns)
+    table = model.__table__
+    for attr in frame.columns:
+        col_type = table.columns[attr].type
+        if isinstance(col_type, Boolean):
+            frame[attr] = frame[attr].astype("string").str.strip().str.lower().map(BOOL_VALUES)
+        elif isinstance(col_type, Uuid):
+            frame[attr] = frame[attr].map(dataset_uuid, na_action="ignore")
+        elif isinstance(col_type, String):
+            frame[attr] = frame[attr].astype("string")
+        elif isinstance(col_type, Integer):
+            # pandas reads integer columns with gaps as float
+            frame[attr] = frame[attr].astype("Int64")
+    keys = [c.name for c in table.primary_key.columns]
+    frame = frame.drop_duplicates(subset=keys, keep="last")
+    return frame.astype(object).where(frame.notna(), None)
+
+
+def _upsert_statement(conn, table, names, source=None):
+    """INSERT of `names` (or INSERT ... SELECT from `source`) that updates them on PK conflict."""
+    dialect = conn.dialect.name
+    if dialect == "postgresql":
+        stmt = postgresql.insert(table)
+    elif dialect == "sqlite":
+        stmt = sqlite.insert(table)
+    else:
+        raise NotImplementedError(f"Bulk upsert is not supported on {dialect}")
+    if source is not None:
+        stmt = stmt.from_select(names, select(*(source.c[n] for n in names)))
+    keys = [c.name for c in table.primary_key.columns]
+    updates = {name: stmt.excluded[name] for name in names if name not in keys}
+    return stmt.on_conflict_do_update(index_elements=keys, set_=updates)
+
+
+async def _copy_upsert(conn, table, frame: pd.DataFrame) -> None:
+    """Postgres/asyncpg: COPY into a temp table, then merge it with one upsert."""
+    staging = f"{table.name}_staging"
+    await conn.execute(text(
+        f'CREATE TEMP TABLE "{staging}" (LIKE "{table.name}" INCLUDING DEFAULTS) ON COMMIT DROP'
+    ))
+    raw = await conn.get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(
+        staging, records=frame.itertuples(index=False, name=None), columns=list(frame.columns)
+    )
+    source = table.to_metadata(MetaData(), name=staging)
+    await conn.execute(_upsert_statement(conn, table, list(frame.columns), source))
+
+
+async def upsert_frame(conn, model, frame: pd.DataFrame, chunk_size: int = CHUNK_SIZE) -> int:
+    """Upsert every row of `frame` into `model`'s table on `conn`; returns the row count."""
+    table = model.__table__
+    if frame.empty:
+        return 0
+    if conn.dialect.name == "postgresql" and conn.dialect.driver == "asyncpg":
+        await _copy_upsert(conn, table, frame)
+        return len(frame)
+
+    stmt = _upsert_statement(conn, table, list(frame.columns))
+    records = frame.to_dict("records")
+    for start in range(0, len(records), chunk_size):
+        await conn.execute(stmt, records[start:start + chunk_size])
+    return len(records)
+
+
+async def load_datasets(engine, data_dir: Path = DATA_DIR, names=None, chunk_size: int = CHUNK_SIZE) -> dict:
+    """
+    Bulk-upsert the dataset CSVs (all of DATASETS, or `names`), one transaction per table.
+    Returns {table: (rows, seconds)}.
+    """
+    results = {}
+    for name in names or DATASETS:
+        spec = DATASETS[name]
+        start = time.perf_counter()
+        frame = read_dataset(Path(data_dir) / spec["file"], spec["model"], spec["columns"])
+        async with engine.begin() as conn:
+            rows = await upsert_frame(conn, spec["model"], frame, chunk_size)
+        seconds = time.perf_counter() - start
+        results[name] = (rows, seconds)
+        logger.info("Loaded %d rows into %s in %.2fs (%.0f rows/s)", rows, name, seconds, rows / max(seconds, 1e-9))
+    return results
+
+
+def file_checksum(path: Path) -> str:
+    """SHA-256 of a file, read in 1 MiB blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _comparable(value):
+    # Numeric columns come back as Decimal while the CSV side holds floats
+    return float(value) if isinstance(value, Decimal) else value
+
+
+def _owned_key(key) -> bool:
+    """
+    Whether sync may delete the row with this key. String-keyed tables hold only CSV rows;
+    in Uuid-keyed ones only UUIDv5 keys come from the CSVs (rows seeded by the app use uuid4).
+    """
+    return not isinstance(key, uuid.UUID) or key.version == 5
+
+
+async def diff_dataset(conn, model, frame: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame, list]:
+    """Rows to insert, rows to update and keys to delete so the table matches `frame`."""
+    table = model.__table__
+    (key,) = [c.name for c in table.primary_key.columns]
+    names = list(frame.columns)
+    result = await conn.execute(select(*(table.c[n] for n in names)))
+    current = {row._mapping[key]: tuple(map(_comparable, row)) for row in result}
+
+    new, changed = [], []
+    for row in frame.itertuples(index=False, name=None):
+        stored = current.get(row[names.index(key)])
+        new.append(stored is None)
+        changed.append(stored is not None and stored != tuple(map(_comparable, row)))
+    incoming = set(frame[key])
+    deletes = [k for k in current if k not in incoming and _owned_key(k)]
+    return frame[new], frame[changed], deletes
+
+
+async def sync_datasets(
+    engine, data_dir: Path = DATA_DIR, names=None, force: bool = False, batch_size: int = CHUNK_SIZE
+) -> dict:
+    """
+    Bring the knowledge-base tables in line with the CSVs, one transaction per table.
+    Unchanged CSVs are skipped unless `force`. Returns
+    {table: {"status": "unchanged" | "synced", "inserted", "updated", "deleted", "seconds"}}.
+    """
+    async with engine.connect() as conn:
+        synced = dict((await conn.execute(select(DatasetSync.dataset, DatasetSync.checksum))).all())
+
+    results = {}
+    for name in names or DATASETS:
+        spec = DATASETS[name]
+        model = spec["model"]
+        path = Path(data_dir) / spec["file"]
+        start = time.perf_counter()
+        checksum = file_checksum(path)
+        if not force and synced.get(name) == checksum:
+            results[name] = {
+                "status": "unchanged", "inserted": 0, "updated": 0, "deleted": 0,
+                "seconds": time.perf_counter() - start,
+            }
+            continue
+
+        frame = read_dataset(path, model, spec["columns"])
+        async with engine.begin() as conn:
+            inserts, updates, deletes = await diff_dataset(conn, model, frame)
+            await upsert_frame(conn, model, pd.concat([inserts, updates]), batch_size)
+            key = model.__table__.primary_key.columns[0]
+            for offset in range(0, len(deletes), batch_size):
+                await conn.execute(delete(model.__table__).where(key.in_(deletes[offset:offset + batch_size])))
+            record = _upsert_statement(conn, DatasetSync.__table__, ["dataset", "checksum", "row_count", "synced_at"])
+            await conn.execute(record.values(dataset=name, checksum=checksum, row_count=len(frame), synced_at=func.now()))
+
+        results[name] = {
+            "status": "synced", "inserted": len(inserts), "updated": len(updates), "deleted": len(deletes),
+            "seconds": time.perf_counter() - start,
+        }
+        logger.info(
+            "Synced %s: %d inserted, %d updated, %d deleted in %.2fs",
+            name, len(inserts), len(updates), len(deletes), results[name]["seconds"],
+        )
+    return results
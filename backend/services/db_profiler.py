@@ -0,0 +1,129 @@
+"""
+DB Profiler — Per-request SQL statement count and DB time.
+
+SQLAlchemy cursor events on the engine record every statement into the stats
+of the request currently being served (held in a contextvar). The ASGI
+middleware aggregates them into per-route histograms on the metrics registry
+and, in debug mode, reports them as X-DB-* response headers.
+"""
+import heapq
+import os
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+
+from services.metrics import registry
+
+# Debug mode exposes per-request DB stats as response headers
+DEBUG_HEADERS = os.getenv("DEBUG", "0") == "1"
+# Number of slowest statements kept per request
+SLOWEST_KEPT = 3
+# Statement text is truncated to this many characters in headers
+STATEMENT_PREVIEW_CHARS = 120
+
+DB_STATEMENTS = registry.histogram(
+    "http_request_db_statements",
+    "SQL statements executed per HTTP request.",
+    ("method", "route"),
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500),
+)
+DB_TIME = registry.histogram(
+    "http_request_db_seconds",
+    "Total time spent executing SQL per HTTP request.",
+    ("method", "route"),
+)
+
+_current_stats: ContextVar["RequestDBStats | None"] = ContextVar("request_db_stats", default=None)
+
+
+class RequestDBStats:
+    """SQL activity recorded for one request."""
+    __slots__ = ("statements", "total_seconds", "_slowest")
+
+    def __init__(self):
+        self.statements = 0
+        self.total_seconds = 0.0
+        self._slowest: list[tuple[float, int, str]] = []
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.statements += 1
+        self.total_seconds += seconds
+        item = (seconds, self.statements, statement)
+        if len(self._slowest) < SLOWEST_KEPT:
+            heapq.heappush(self._slowest, item)
+        elif seconds > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, item)
+
+    @property
+    def slowest(self) -> list[tuple[float, str]]:
+        """Slowest statements first, as (seconds, statement)."""
+        return [(s, stmt) for s, _, stmt in sorted(self._slowest, reverse=True)]
+
+
+def current_stats() -> RequestDBStats | None:
+    """Stats for the request being served, or None outside a request."""
+    return _current_stats.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None:
+        conn.info.setdefault("db_profiler_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    starts = conn.info.get("db_profiler_start")
+    if stats is None or not starts:
+        return
+    stats.record(statement, time.perf_counter() - starts.pop())
+
+
+def install_db_profiler(engine) -> None:
+    """Attach the statement hooks to an (async) engine. Safe to call twice."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _header_safe(text: str) -> str:
+    flat = " ".join(text.split())[:STATEMENT_PREVIEW_CHARS]
+    return flat.encode("latin-1", "replace").decode("latin-1")
+
+
+class DBProfilerMiddleware:
+    """Pure ASGI middleware: one RequestDBStats per HTTP request."""
+
+    def __init__(self, app, expose_headers: bool = DEBUG_HEADERS):
+        self.app = app
+        self.expose_headers = expose_headers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestDBStats()
+        token = _current_stats.set(stats)
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start" and self.expose_headers:
+                headers = MutableHeaders(scope=message)
+                headers["X-DB-Statements"] = str(stats.statements)
+                headers["X-DB-Time-Ms"] = f"{stats.total_seconds * 1000:.2f}"
+                if stats.statements:
+                    headers["X-DB-Slowest"] = " | ".join(
+                        f"{seconds * 1000:.2f}ms {_header_safe(stmt)}" for seconds, stmt in stats.slowest
+                    )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            _current_stats.reset(token)
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            method = scope.get("method", "")
+            DB_STATEMENTS.observe(stats.statements, method=method, route=route)
+            DB_TIME.observe(stats.total_seconds, method=method, route=route)
@@ -4,8 +4,11 @@ Uses UUID-based doctor_id and department_id from the app schema.
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
 from models import Doctor, DoctorAssignment, Department
+from services.metrics import registry
 import uuid
 
+ASSIGN_DOCTOR_SECONDS = registry.histogram("assign_doctor_seconds", "Time to pick a doctor for a visit.")
+
 
 async def get_department_id(db: AsyncSession, department_name: str) -> str | None:
     """Look up department UUID by name."""
@@ -53,11 +56,13 @@ async def get_patient_preferred_doctor(
     return str(doctor_id) if doctor_id else None
 
 
+@ASSIGN_DOCTOR_SECONDS.timed()
 async def assign_doctor(
     db: AsyncSession,
     department_name: str,
     risk_level: str,
-    patient_id: str | None = None
+    patient_id: str | None = None,
+    department_id: str | None = None,
 ) -> tuple[str | None, str | None]:
     """
     Assign the best available doctor in the given department.
@@ -67,14 +72,15 @@ async def assign_doctor(
     2. Filter available doctors based on current SHIFT timings (09:00 - 17:00).
     3. If High Risk: Rank by Experience first (DESC), then least load (ASC).
     4. If Medium/Low Risk: Rank by Least Load (ASC), then Experience (DESC).
+
+    Callers that already resolved the department can pass department_id to skip the lookup.
     
     Returns: (doctor_id, department_uuid) or (None, None) if no doctor available
     """
     from datetime import datetime
-    import pytz # Assuming local time timezone awareness is needed, but using simple comparison for now.
 
     # Look up department UUID
-    dept_id = await get_department_id(db, department_name)
+    dept_id = department_id or await get_department_id(db, department_name)
     if not dept_id:
         # Fallback: try General Medicine or similar default
         # For now return None if department invalid
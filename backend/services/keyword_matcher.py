@@ -0,0 +1,135 @@
+"""
+Multi-pattern keyword matching (Aho-Corasick).
+
+A KeywordMatcher is compiled once from a vocabulary and then finds every
+mention in a text in a single pass, independent of vocabulary size. Matches
+are case-insensitive, must sit on word boundaries ("cough" does not match
+"coughing") and overlapping mentions resolve to the longest one ("severe
+chest pain" wins over "chest pain").
+
+TermMatcher layers several tagged vocabularies over one automaton, for
+callers that need matches per category from a single scan.
+"""
+from collections import deque
+from typing import Iterable
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton over a fixed set of lower-cased keywords."""
+
+    def __init__(self, keywords: Iterable[str]):
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        # keywords ending at each node, including those reached through failure links
+        self._report: list[tuple[str, ...]] = [()]
+        self.keywords: list[str] = []
+
+        for keyword in dict.fromkeys(k.strip().lower() for k in keywords):
+            if keyword:
+                self._add(keyword)
+        self._link()
+
+    def _add(self, keyword: str) -> None:
+        node = 0
+        for ch in keyword:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._report.append(())
+            node = nxt
+        self._report[node] = (keyword,)
+        self.keywords.append(keyword)
+
+    def _link(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                fallback = self._fail[node]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                self._report[child] += self._report[self._fail[child]]
+                queue.append(child)
+
+    def __len__(self) -> int:
+        return len(self.keywords)
+
+    def matches(self, text: str) -> list[tuple[int, int, str]]:
+        """Every whole-word (start, end, keyword) occurrence, overlaps included, by end position."""
+        text = text.lower()
+        goto, fail, report = self._goto, self._fail, self._report
+        found = []
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for keyword in report[node]:
+                start, end = i + 1 - len(keyword), i + 1
+                if (start == 0 or not _is_word_char(text[start - 1])) and (
+                    end == len(text) or not _is_word_char(text[end])
+                ):
+                    found.append((start, end, keyword))
+        return found
+
+    def finditer(self, text: str) -> list[tuple[int, int, str]]:
+        """Non-overlapping (start, end, keyword) matches in text order; longest match wins overlaps."""
+        return longest_non_overlapping(self.matches(text))
+
+    def findall(self, text: str) -> list[str]:
+        """Distinct keywords mentioned in `text`, in order of first appearance."""
+        return list(dict.fromkeys(keyword for _, _, keyword in self.finditer(text)))
+
+
+def longest_non_overlapping(matches: list[tuple]) -> list[tuple]:
+    """Keep the longest of overlapping (start, end, ...) matches (leftmost on ties), in text order."""
+    chosen = []
+    taken = set()
+    for match in sorted(matches, key=lambda m: (m[0] - m[1], m[0])):
+        span = range(match[0], match[1])
+        if taken.isdisjoint(span):
+            taken.update(span)
+            chosen.append(match)
+    chosen.sort()
+    return chosen
+
+
+class TermMatcher:
+    """
+    One compiled matcher over several vocabularies ({category: {keyword: canonical term}}).
+    A text is scanned once; overlaps are then resolved to the longest match within each
+    category, so a longer term in one vocabulary does not hide a shorter term in another.
+    """
+
+    def __init__(self, vocabularies: dict[str, dict[str, str]]):
+        self.categories = list(vocabularies)
+        self._tags: dict[str, list[tuple[str, str]]] = {}
+        for category, terms in vocabularies.items():
+            for keyword, term in terms.items():
+                self._tags.setdefault(keyword.strip().lower(), []).append((category, term))
+        self._matcher = KeywordMatcher(self._tags)
+
+    def __len__(self) -> int:
+        return len(self._matcher)
+
+    def scan(self, text: str, categories=None) -> dict[str, list[str]]:
+        """Canonical terms found per category (distinct, in order of first mention)."""
+        wanted = self.categories if categories is None else categories
+        hits = {category: [] for category in wanted}
+        for start, end, keyword in self._matcher.matches(text):
+            for category, term in self._tags[keyword]:
+                if category in hits:
+                    hits[category].append((start, end, term))
+        return {
+            category: list(dict.fromkeys(term for _, _, term in longest_non_overlapping(found)))
+            for category, found in hits.items()
+        }
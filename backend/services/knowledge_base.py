@@ -0,0 +1,284 @@
+"""
+Memory-mapped knowledge-base snapshot (symptoms, conditions, vital references,
+chronic modifiers).
+
+The snapshot is one read-only binary file, so every worker process can mmap it:
+loading is a header parse, and the OS page cache holds a single copy of the
+data for all workers. Layout (little-endian, sections 8-byte aligned):
+
+    header      magic b"TKB1", format version, section count
+    sections    (name, offset, length) per section
+    strings     interned UTF-8 pool + uint32 offsets; records refer to ids
+    <table>     fixed-width records sorted by lookup key (numpy structured dtype)
+    <table>.idx open-addressing hash index (CRC-32, linear probing) -> record number
+
+Lookup keys are lower-cased names; vital references are keyed by
+"vital_type|age_group|condition_modifier". Where several rows share a key the
+last one in table order wins (CSV order for imported datasets), as in the old
+data_cache.json.
+"""
+import math
+import mmap
+import os
+import struct
+import zlib
+from pathlib import Path
+from typing import Iterator, Optional
+
+import numpy as np
+from sqlalchemy import select
+
+from models import SymptomSeverity, DiseasePriority, VitalSignReference, ChronicConditionModifier
+
+SNAPSHOT_FILE = Path(os.getenv("KB_SNAPSHOT_PATH", Path(__file__).resolve().parents[1] / "kb_snapshot.bin"))
+
+MAGIC = b"TKB1"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sHHI")
+SECTION = struct.Struct("<24sQQ")
+
+NULL_STR = 0xFFFFFFFF
+NULL_INT = -(2 ** 31)
+NULL_BOOL = -1
+EMPTY_SLOT = 0xFFFFFFFF
+
+FIELD_DTYPES = {"str": "<u4", "int": "<i4", "bool": "i1", "float": "<f8"}
+
+# snapshot table -> source model, columns forming the lookup key, stored fields
+SCHEMAS = {
+    "symptoms": {
+        "model": SymptomSeverity,
+        "key": ("symptom_name",),
+        "fields": {
+            "symptom_name": "str",
+            "associated_department": "str",
+            "base_severity": "int",
+            "emergency_trigger": "bool",
+            "typical_duration_days": "int",
+        },
+    },
+    "conditions": {
+        "model": DiseasePriority,
+        "key": ("condition_name",),
+        "fields": {
+            "condition_name": "str",
+            "condition_category": "str",
+            "default_department": "str",
+            "base_severity_score": "int",
+            "emergency_flag": "bool",
+            "contagious_flag": "bool",
+            "max_recommended_wait_minutes": "int",
+            "mortality_risk_level": "str",
+            "progression_speed": "str",
+        },
+    },
+    "vitals": {
+        "model": VitalSignReference,
+        "key": ("vital_type", "age_group", "condition_modifier"),
+        "fields": {
+            "vital_type": "str",
+            "age_group": "str",
+            "condition_modifier": "str",
+            "critical_low_threshold": "float",
+            "critical_high_threshold": "float",
+            "moderate_low_threshold": "float",
+            "moderate_high_threshold": "float",
+            "critical_instability_score": "int",
+            "moderate_instability_score": "int",
+        },
+    },
+    "chronic": {
+        "model": ChronicConditionModifier,
+        "key": ("chronic_condition",),
+        "fields": {
+            "chronic_condition": "str",
+            "risk_modifier_score": "int",
+            "high_risk_with_symptoms": "str",
+            "associated_department": "str",
+            "complication_risk_level": "str",
+        },
+    },
+}
+
+
+def make_key(*parts) -> str:
+    return "|".join("" if p is None else str(p).strip().lower() for p in parts)
+
+
+def _record_dtype(fields: dict) -> np.dtype:
+    return np.dtype([("_key", "<u4")] + [(name, FIELD_DTYPES[kind]) for name, kind in fields.items()])
+
+
+def _index_size(count: int) -> int:
+    return max(8, 1 << math.ceil(math.log2(max(count, 1) * 2)))
+
+
+def write_snapshot(path: Path, tables: dict) -> dict:
+    """
+    Write {table: {key: {field: value}}} (tables from SCHEMAS) to `path` atomically:
+    processes that have the old file mapped keep reading it. Returns row counts.
+    """
+    strings: dict[str, int] = {}
+
+    def intern(value) -> int:
+        if value is None:
+            return NULL_STR
+        return strings.setdefault(value, len(strings))
+
+    sections = []
+    for name, schema in SCHEMAS.items():
+        rows = tables.get(name, {})
+        fields = schema["fields"]
+        keys = sorted(rows)
+        records = np.zeros(len(keys), dtype=_record_dtype(fields))
+        for i, key in enumerate(keys):
+            row = rows[key]
+            values = [intern(key)]
+            for field, kind in fields.items():
+                value = row.get(field)
+                if kind == "str":
+                    values.append(intern(None if value is None else str(value)))
+                elif kind == "int":
+                    values.append(NULL_INT if value is None else int(value))
+                elif kind == "bool":
+                    values.append(NULL_BOOL if value is None else int(bool(value)))
+                else:
+                    values.append(math.nan if value is None else float(value))
+            records[i] = tuple(values)
+
+        index = np.full(_index_size(len(keys)), EMPTY_SLOT, dtype="<u4")
+        mask = len(index) - 1
+        for i, key in enumerate(keys):
+            slot = zlib.crc32(key.encode("utf-8")) & mask
+            while index[slot] != EMPTY_SLOT:
+                slot = (slot + 1) & mask
+            index[slot] = i
+        sections += [(name, records.tobytes()), (f"{name}.idx", index.tobytes())]
+
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype="<u4")
+    offsets[1:] = np.cumsum([len(b) for b in encoded], dtype=np.int64)
+    sections = [("strings.offsets", offsets.tobytes()), ("strings.data", b"".join(encoded))] + sections
+
+    position = HEADER.size + SECTION.size * len(sections)
+    table, body = [], bytearray()
+    for name, payload in sections:
+        start = -(-position // 8) * 8
+        body += b"\0" * (start - position) + payload
+        table.append(SECTION.pack(name.encode("ascii"), start, len(payload)))
+        position = start + len(payload)
+
+    tmp = Path(f"{path}.tmp")
+    with open(tmp, "wb") as fh:
+        fh.write(HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(sections)))
+        fh.write(b"".join(table))
+        fh.write(body)
+    os.replace(tmp, path)
+    return {name: len(tables.get(name, {})) for name in SCHEMAS}
+
+
+async def build_snapshot(engine, path: Path = SNAPSHOT_FILE) -> dict:
+    """Read the knowledge-base tables and write a fresh snapshot. Returns row counts per table."""
+    tables = {}
+    async with engine.connect() as conn:
+        for name, schema in SCHEMAS.items():
+            model = schema["model"]
+            columns = list(dict.fromkeys(schema["key"] + tuple(schema["fields"])))
+            result = await conn.execute(select(*(model.__table__.c[c] for c in columns)))
+            rows = {}
+            for row in result.mappings():
+                key = make_key(*(row[c] for c in schema["key"]))
+                if key.strip("|"):
+                    rows[key] = dict(row)
+            tables[name] = rows
+    return write_snapshot(path, tables)
+
+
+class KnowledgeBase:
+    """Read-only view over a mapped snapshot; records are decoded on lookup."""
+
+    def __init__(self, path: Path = SNAPSHOT_FILE):
+        with open(path, "rb") as fh:
+            self._map = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} knowledge-base snapshot")
+        self._sections = {}
+        for i in range(count):
+            name, offset, length = SECTION.unpack_from(self._map, HEADER.size + i * SECTION.size)
+            self._sections[name.rstrip(b"\0").decode("ascii")] = (offset, length)
+
+        self._offsets = self._array("strings.offsets", np.dtype("<u4"))
+        self._data = memoryview(self._map)[slice(*self._span("strings.data"))]
+        self._records = {name: self._array(name, _record_dtype(s["fields"])) for name, s in SCHEMAS.items()}
+        self._index = {name: self._array(f"{name}.idx", np.dtype("<u4")) for name in SCHEMAS}
+
+    def _span(self, name: str) -> tuple[int, int]:
+        offset, length = self._sections[name]
+        return offset, offset + length
+
+    def _array(self, name: str, dtype: np.dtype) -> np.ndarray:
+        offset, length = self._sections[name]
+        return np.frombuffer(self._map, dtype=dtype, count=length // dtype.itemsize, offset=offset)
+
+    def _string(self, string_id: int) -> Optional[str]:
+        if string_id == NULL_STR:
+            return None
+        return str(self._data[self._offsets[string_id]:self._offsets[string_id + 1]], "utf-8")
+
+    def _find(self, table: str, key: str) -> int:
+        index = self._index[table]
+        records = self._records[table]
+        encoded = key.encode("utf-8")
+        mask = len(index) - 1
+        slot = zlib.crc32(encoded) & mask
+        while (row := index[slot]) != EMPTY_SLOT:
+            string_id = records[row]["_key"]
+            if self._data[self._offsets[string_id]:self._offsets[string_id + 1]] == encoded:
+                return int(row)
+            slot = (slot + 1) & mask
+        return -1
+
+    def __len__(self) -> int:
+        return sum(len(r) for r in self._records.values())
+
+    def count(self, table: str) -> int:
+        return len(self._records[table])
+
+    def keys(self, table: str) -> Iterator[str]:
+        """Lookup keys of `table` in sorted order."""
+        for string_id in self._records[table]["_key"]:
+            yield self._string(string_id)
+
+    def _decode(self, record, field: str, kind: str):
+        value = record[field]
+        if kind == "str":
+            return self._string(int(value))
+        if kind == "int":
+            return None if value == NULL_INT else int(value)
+        if kind == "bool":
+            return None if value == NULL_BOOL else bool(value)
+        return None if math.isnan(value) else float(value)
+
+    def get(self, table: str, *key_parts) -> Optional[dict]:
+        """Decoded record for the key (case-insensitive), or None."""
+        row = self._find(table, make_key(*key_parts))
+        if row < 0:
+            return None
+        record = self._records[table][row]
+        return {field: self._decode(record, field, kind) for field, kind in SCHEMAS[table]["fields"].items()}
+
+    def value(self, table: str, field: str, *key_parts):
+        """A single field of the record for the key, or None."""
+        row = self._find(table, make_key(*key_parts))
+        if row < 0:
+            return None
+        return self._decode(self._records[table][row], field, SCHEMAS[table]["fields"][field])
+
+
+def load_knowledge_base(path: Path = SNAPSHOT_FILE) -> Optional[KnowledgeBase]:
+    """Map the snapshot, or None when it has not been built (or is unreadable)."""
+    try:
+        return KnowledgeBase(path)
+    except (OSError, ValueError):
+        return None
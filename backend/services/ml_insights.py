@@ -10,16 +10,8 @@ import re
 import uuid
 from typing import List, Dict
 
-# Critical keywords to highlight
-CHRONIC_CONDITIONS = [
-    "diabetes", "hypertension", "heart disease", "asthma", "copd", "cancer",
-    "stroke", "kidney disease", "liver disease", "hiv", "hepatitis"
-]
-
-HIGH_RISK_SYMPTOMS = [
-    "chest pain", "shortness of breath", "unconscious", "bleeding", "seizure",
-    "stroke", "heart attack", "severe pain", "difficulty breathing"
-]
+from services import clinical_terms
+from services.clinical_terms import CHRONIC_CONDITIONS, HIGH_RISK_SYMPTOMS  # noqa: F401 (re-exported)
 
 MEDICATION_PATTERNS = [
     r"(insulin|metformin|aspirin|warfarin|statins?|beta.?blockers?)",
@@ -77,14 +69,12 @@ async def extract_key_insights(db: AsyncSession, patient_id: str) -> Dict:
     
     # 1. Extract chronic conditions from patient record
     if patient.pre_existing_conditions:
-        conditions_text = patient.pre_existing_conditions.lower()
-        for condition in CHRONIC_CONDITIONS:
-            if condition in conditions_text:
-                insights["chronic_conditions"].append({
-                    "condition": condition.title(),
-                    "confidence": 0.9,
-                    "source": "Patient Record"
-                })
+        for condition in clinical_terms.scan(patient.pre_existing_conditions, ("history",))["history"]:
+            insights["chronic_conditions"].append({
+                "condition": condition.title(),
+                "confidence": 0.9,
+                "source": "Patient Record"
+            })
     
     # 2. Analyze medical records
     symptom_counts = {}
@@ -92,14 +82,12 @@ async def extract_key_insights(db: AsyncSession, patient_id: str) -> Dict:
     for record in records:
         # Check for high-risk diagnoses
         if record.diagnosis:
-            diagnosis_lower = record.diagnosis.lower()
-            for risk_symptom in HIGH_RISK_SYMPTOMS:
-                if risk_symptom in diagnosis_lower:
-                    insights["recent_high_risk"].append({
-                        "finding": risk_symptom.title(),
-                        "date": record.created_at.strftime("%Y-%m-%d"),
-                        "confidence": 0.85
-                    })
+            for risk_symptom in clinical_terms.scan(record.diagnosis, ("high_risk",))["high_risk"]:
+                insights["recent_high_risk"].append({
+                    "finding": risk_symptom.title(),
+                    "date": record.created_at.strftime("%Y-%m-%d"),
+                    "confidence": 0.85
+                })
         
         # Track recurring symptoms
         if record.syndrome_identified:
@@ -0,0 +1,101 @@
+"""
+Content-addressed OCR results, persisted in the documents table.
+
+Every OCR job becomes a Document row (document_id = job id) carrying the file's
+SHA-256, the extracted text and the detected conditions. Before tesseract runs,
+the job's hash is looked up: first in a small in-process LRU, then in
+documents. A file that was already OCR'd (an identical re-upload, or a visit
+re-submitted with the same paths) therefore never runs tesseract again, and
+any worker process can answer for a job another one ran.
+"""
+import os
+import uuid
+from collections import OrderedDict
+from typing import Optional
+
+from sqlalchemy import insert, select, update
+
+from models import Document
+from services.metrics import registry
+
+OCR_CACHE_SIZE = int(os.getenv("OCR_CACHE_SIZE", "512"))
+
+OCR_CACHE_LOOKUPS = registry.counter(
+    "ocr_cache_lookups_total", "OCR result cache lookups by outcome.", ("result",)
+)
+
+
+class OCRResultCache:
+    """
+    Documents-table store with an LRU of (text, detected) by content hash in front.
+    Lookups and loads go through `read_engine` (the reader pool), so they never wait
+    behind intake writes on the writer; only `store` uses `engine`.
+    """
+
+    def __init__(self, engine, read_engine=None, size: int = OCR_CACHE_SIZE):
+        self.engine = engine
+        self.read_engine = read_engine or engine
+        self.size = size
+        self._recent: "OrderedDict[str, tuple[str, dict]]" = OrderedDict()
+
+    def _remember(self, content_hash: str, text: str, detected: dict) -> None:
+        self._recent[content_hash] = (text, detected)
+        self._recent.move_to_end(content_hash)
+        while len(self._recent) > self.size:
+            self._recent.popitem(last=False)
+
+    async def lookup(self, content_hash: str) -> Optional[tuple[str, dict]]:
+        """(text, detected conditions) of an earlier successful OCR of this content, or None."""
+        hit = self._recent.get(content_hash)
+        if hit is not None:
+            self._recent.move_to_end(content_hash)
+            OCR_CACHE_LOOKUPS.inc(result="memory")
+            return hit
+        async with self.read_engine.connect() as conn:
+            row = (await conn.execute(
+                select(Document.extracted_text, Document.detected_conditions)
+                .where(Document.content_hash == content_hash, Document.processed.is_(True))
+                .limit(1)
+            )).first()
+        if row is None:
+            OCR_CACHE_LOOKUPS.inc(result="miss")
+            return None
+        OCR_CACHE_LOOKUPS.inc(result="database")
+        self._remember(content_hash, row.extracted_text or "", row.detected_conditions or {})
+        return row.extracted_text or "", row.detected_conditions or {}
+
+    async def store(self, job) -> None:
+        """Persist a finished job as its Document row; successful results also enter the LRU."""
+        processed = job.status == "done"
+        async with self.engine.begin() as conn:
+            await conn.execute(insert(Document).values(
+                document_id=uuid.UUID(job.id),
+                file_url=job.file_path,
+                file_type=os.path.splitext(job.filename)[1].lstrip(".").lower() or None,
+                content_hash=job.content_hash,
+                extracted_text=job.text if processed else None,
+                detected_conditions=job.detected if processed else None,
+                processed=processed,
+            ))
+        if processed and job.content_hash:
+            self._remember(job.content_hash, job.text, job.detected)
+
+    async def load(self, document_id: str) -> Optional[dict]:
+        """The Document row (as a mapping) for a job id, or None (unknown id, or not a UUID)."""
+        try:
+            key = uuid.UUID(document_id)
+        except ValueError:
+            return None
+        table = Document.__table__
+        async with self.read_engine.connect() as conn:
+            row = (await conn.execute(select(table).where(table.c.document_id == key))).mappings().first()
+        return dict(row) if row is not None else None
+
+
+async def attach_documents(db, document_ids: list, patient_id, visit_id) -> None:
+    """Link uploaded documents to the visit (and patient) that referenced them."""
+    keys = [uuid.UUID(str(d)) for d in document_ids]
+    if keys:
+        await db.execute(
+            update(Document).where(Document.document_id.in_(keys)).values(patient_id=patient_id, visit_id=visit_id)
+        )
@@ -0,0 +1,388 @@
+"""
+OCR job queue — tesseract runs in a process pool, never on the event loop.
+
+An upload submits a job and gets its id back. Callers then poll
+GET /documents/jobs/{job_id}, watch /ws/ocr/{job_id} for the completion event,
+or await the job. Admission is bounded: once OCR_QUEUE_SIZE jobs are waiting
+for a worker, submit() raises OCRQueueFull (503 upstream) instead of letting
+the backlog grow. Finished jobs are kept (the latest OCR_JOB_HISTORY) so /visits
+can reuse their results instead of running OCR again. Multi-page PDFs and TIFFs
+are split into pages that are OCR'd in parallel (a few at a time, so one long
+document does not starve other uploads); per-page progress is published to
+subscribers, and reading stops once OCR_EARLY_STOP categories are all found.
+With an OCRResultCache
+(services/ocr_cache.py), each job is also stored as a Document row and content
+that was OCR'd before skips tesseract.
+"""
+import asyncio
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Callable, Iterable, Optional
+
+from services.dataset_loader import file_checksum
+from services.metrics import registry
+from services.ocr_cache import OCRResultCache
+from services.ocr_service import OCR_DOCUMENTS, OCR_SECONDS, ocr_page, page_count, detect_conditions
+
+logger = logging.getLogger(__name__)
+
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", "0")) or os.cpu_count() or 1
+OCR_QUEUE_SIZE = int(os.getenv("OCR_QUEUE_SIZE", "64"))
+OCR_JOB_HISTORY = int(os.getenv("OCR_JOB_HISTORY", "1000"))
+OCR_VISIT_WAIT_SECONDS = float(os.getenv("OCR_VISIT_WAIT_SECONDS", "30"))
+# Pages of one document OCR'd at once, so a long PDF leaves workers for other uploads
+OCR_PAGES_IN_FLIGHT = int(os.getenv("OCR_PAGES_IN_FLIGHT", "0")) or max(1, OCR_WORKERS // 2)
+# Stop reading further pages once every listed detection category has a hit ("" reads every page)
+OCR_EARLY_STOP = tuple(c for c in os.getenv("OCR_EARLY_STOP", "chronic_conditions,symptoms").split(",") if c)
+
+OCR_QUEUE_DEPTH = registry.gauge("ocr_queue_depth", "OCR jobs waiting for a worker.")
+OCR_JOBS_REJECTED = registry.counter("ocr_jobs_rejected_total", "OCR jobs refused because the queue was full.")
+OCR_PAGES = registry.counter("ocr_pages_total", "Document pages by outcome.", ("status",))
+
+EMPTY_DETECTION = {"chronic_conditions": [], "symptoms": []}
+
+
+def _run_portable(ocr: Callable, file_path: str, page: int) -> str:
+    # Some library exceptions (pytesseract's among them) cannot be unpickled in the
+    # parent, which breaks the whole pool; send back a plain RuntimeError instead.
+    try:
+        return ocr(file_path, page)
+    except Exception as e:
+        raise RuntimeError(f"{type(e).__name__}: {e}") from None
+
+
+class OCRQueueFull(Exception):
+    """The job queue is at capacity; the caller should retry later."""
+
+
+class OCRJobNotFound(LookupError):
+    """No job with that id (never submitted, or evicted from history)."""
+
+
+@dataclass
+class OCRJob:
+    id: str
+    file_path: str
+    filename: str
+    status: str = "queued"  # queued | running | done | failed
+    text: str = ""
+    detected: dict = field(default_factory=lambda: dict(EMPTY_DETECTION))
+    error: Optional[str] = None
+    content_hash: Optional[str] = None
+    cached: bool = False  # result reused from an earlier OCR of the same content
+    page_count: int = 0
+    pages: list = field(default_factory=list)  # {"page", "status", "chars"} in completion order
+    stopped_early: bool = False  # remaining pages skipped once OCR_EARLY_STOP was satisfied
+    listeners: list = field(default_factory=list, repr=False)
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    finished_at: Optional[datetime] = None
+    finished: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    @classmethod
+    def from_document(cls, row) -> "OCRJob":
+        """A finished job rebuilt from its Document row (evicted, or run by another process)."""
+        job = cls(
+            id=str(row["document_id"]),
+            file_path=row["file_url"],
+            filename=os.path.basename(row["file_url"]),
+            status="done" if row["processed"] else "failed",
+            text=row["extracted_text"] or "",
+            detected=row["detected_conditions"] or dict(EMPTY_DETECTION),
+            error=None if row["processed"] else "OCR failed",
+            content_hash=row["content_hash"],
+            created_at=row["uploaded_at"],
+            finished_at=row["uploaded_at"],
+        )
+        job.finished.set()
+        return job
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def subscribe(self) -> asyncio.Queue:
+        """Queue receiving this job's ocr_page events and its final ocr_finished event."""
+        events = asyncio.Queue()
+        self.listeners.append(events)
+        return events
+
+    def unsubscribe(self, events: asyncio.Queue) -> None:
+        if events in self.listeners:
+            self.listeners.remove(events)
+
+    def publish(self, event: dict) -> None:
+        for events in self.listeners:
+            events.put_nowait(event)
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "filename": self.filename,
+            "file_path": self.file_path,
+            "extracted_text": self.text,
+            "detected_conditions": self.detected,
+            "error": self.error,
+            "content_hash": self.content_hash,
+            "cached": self.cached,
+            "page_count": self.page_count,
+            "pages": self.pages,
+            "stopped_early": self.stopped_early,
+            "created_at": self.created_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+class OCRJobQueue:
+    """
+    Bounded queue in front of an executor. One dispatcher task per worker pulls
+    jobs, so at most `workers` documents are being OCR'd at once. Condition
+    detection and metrics run back in the parent, where the knowledge base and
+    the metrics registry live.
+    """
+
+    def __init__(
+        self,
+        workers: int = OCR_WORKERS,
+        max_queued: int = OCR_QUEUE_SIZE,
+        history: int = OCR_JOB_HISTORY,
+        executor_factory: Optional[Callable[[int], Executor]] = None,
+        ocr: Callable = ocr_page,
+        pages: Callable = page_count,
+        cache: Optional[OCRResultCache] = None,
+        pages_in_flight: int = OCR_PAGES_IN_FLIGHT,
+        early_stop: tuple = OCR_EARLY_STOP,
+    ):
+        self.workers = workers
+        self.max_queued = max_queued
+        self.history = history
+        self._executor_factory = executor_factory or (lambda n: ProcessPoolExecutor(max_workers=n))
+        self._ocr = ocr
+        self._page_count = pages
+        self.cache = cache
+        self.pages_in_flight = pages_in_flight
+        self.early_stop = early_stop
+        self._executor: Optional[Executor] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: list[asyncio.Task] = []
+        self._jobs: "OrderedDict[str, OCRJob]" = OrderedDict()
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self, cache: Optional[OCRResultCache] = None) -> None:
+        if cache is not None:
+            self.cache = cache
+        if self._tasks:
+            return
+        self._executor = self._executor_factory(self.workers)
+        self._queue = asyncio.Queue(maxsize=self.max_queued)
+        self._tasks = [asyncio.create_task(self._dispatch()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        """Cancel dispatchers and shut the pool down; jobs still queued are marked failed."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        for job in self._jobs.values():
+            if not job.is_finished:
+                self._finish(job, error="OCR service shut down")
+        self._queue = None
+        OCR_QUEUE_DEPTH.set(0)
+
+    def submit(
+        self,
+        file_path: str,
+        filename: Optional[str] = None,
+        content_hash: Optional[str] = None,
+    ) -> OCRJob:
+        """Queue the document at `file_path`; pass `content_hash` when it is already known."""
+        if self._queue is None:
+            raise RuntimeError("OCR job queue is not running")
+        job = OCRJob(
+            id=str(uuid.uuid4()),
+            file_path=file_path,
+            filename=filename or os.path.basename(file_path),
+            content_hash=content_hash,
+        )
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            OCR_JOBS_REJECTED.inc()
+            raise OCRQueueFull(f"{self.max_queued} OCR jobs already waiting")
+        OCR_QUEUE_DEPTH.set(self._queue.qsize())
+        self._remember(job)
+        return job
+
+    async def get(self, job_id: str) -> OCRJob:
+        """A job by id: from memory, else rebuilt from its stored Document row."""
+        job = self._jobs.get(job_id)
+        if job is None and self.cache is not None:
+            row = await self.cache.load(job_id)
+            if row is not None:
+                job = OCRJob.from_document(row)
+        if job is None:
+            raise OCRJobNotFound(job_id)
+        return job
+
+    async def wait(self, job: OCRJob, timeout: Optional[float] = None) -> OCRJob:
+        """Wait for `job` to finish; raises TimeoutError after `timeout` seconds."""
+        await asyncio.wait_for(job.finished.wait(), timeout)
+        return job
+
+    async def run(self, file_path: str, timeout: Optional[float] = None) -> OCRJob:
+        return await self.wait(self.submit(file_path), timeout)
+
+    async def results(
+        self,
+        job_ids: Iterable[str] = (),
+        file_paths: Iterable[str] = (),
+        timeout: Optional[float] = OCR_VISIT_WAIT_SECONDS,
+    ) -> list[OCRJob]:
+        """
+        Finished jobs for a visit: earlier uploads by id (waiting for any still
+        running) and bare file paths, which are OCR'd now in the pool.
+        """
+        jobs = [await self.get(job_id) for job_id in job_ids]
+        jobs += [self.submit(path) for path in file_paths]
+        await asyncio.wait_for(asyncio.gather(*(job.finished.wait() for job in jobs)), timeout)
+        return jobs
+
+    def _remember(self, job: OCRJob) -> None:
+        self._jobs[job.id] = job
+        while len(self._jobs) > self.history:
+            oldest = next(iter(self._jobs.values()))
+            if not oldest.is_finished:
+                break
+            self._jobs.popitem(last=False)
+
+    def _finish(self, job: OCRJob, error: Optional[str] = None) -> None:
+        """Mark the job finished and wake its waiters."""
+        job.status = "failed" if error else "done"
+        job.error = error
+        job.finished_at = datetime.now(timezone.utc)
+        job.finished.set()
+        job.publish({"event": "ocr_finished", **job.to_dict()})
+        job.listeners.clear()
+
+    async def _dispatch(self) -> None:
+        while True:
+            job = await self._queue.get()
+            OCR_QUEUE_DEPTH.set(self._queue.qsize())
+            job.status = "running"
+            try:
+                error = await self._process(job)
+            except asyncio.CancelledError:
+                self._finish(job, error="OCR service shut down")
+                raise
+            finally:
+                self._queue.task_done()
+            job.status = "failed" if error else "done"
+            job.error = error
+            if self.cache is not None:
+                # Stored before waiters wake, so a visit can link the row straight away
+                try:
+                    await self.cache.store(job)
+                except Exception as e:
+                    logger.warning(f"[OCR] Could not store document {job.id}: {e}")
+            self._finish(job, error)
+
+    async def _process(self, job: OCRJob) -> Optional[str]:
+        """Fill in the job's text and detections (cache first); returns an error message or None."""
+        if self.cache is not None:
+            try:
+                job.content_hash = job.content_hash or await asyncio.to_thread(file_checksum, job.file_path)
+                hit = await self.cache.lookup(job.content_hash)
+            except OSError as e:
+                OCR_DOCUMENTS.inc(status="error")
+                return str(e)
+            if hit is not None:
+                job.text, job.detected = hit
+                job.cached = True
+                OCR_DOCUMENTS.inc(status="cached")
+                return None
+
+        start = time.perf_counter()
+        executor = self._executor
+        try:
+            job.page_count = await asyncio.to_thread(self._page_count, job.file_path)
+            error = await self._ocr_pages(job, executor)
+            OCR_DOCUMENTS.inc(status="error" if error else "ok")
+            return error
+        except BrokenProcessPool as e:
+            # A worker died (crash, OOM kill); later jobs get a fresh pool
+            OCR_DOCUMENTS.inc(status="error")
+            if self._executor is executor:
+                executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = self._executor_factory(self.workers)
+            return f"OCR worker died: {e}"
+        except Exception as e:
+            OCR_DOCUMENTS.inc(status="error")
+            logger.exception(f"[OCR] Error processing {job.file_path}")
+            return str(e)
+        finally:
+            OCR_SECONDS.observe(time.perf_counter() - start)
+
+    async def _ocr_pages(self, job: OCRJob, executor: Executor) -> Optional[str]:
+        """
+        OCR pages in order with at most pages_in_flight in the pool, publishing each
+        page as it completes and stopping early once the early_stop categories are all
+        detected. Returns an error message when no page could be read.
+        """
+        loop = asyncio.get_running_loop()
+        texts: dict[int, str] = {}
+        errors: list[str] = []
+        pending: dict[asyncio.Future, int] = {}
+        next_page = 0
+        try:
+            while next_page < job.page_count or pending:
+                while next_page < job.page_count and len(pending) < self.pages_in_flight:
+                    future = loop.run_in_executor(executor, _run_portable, self._ocr, job.file_path, next_page)
+                    pending[future] = next_page
+                    next_page += 1
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in sorted(done, key=pending.get):
+                    page = pending.pop(future)
+                    try:
+                        texts[page] = future.result()
+                    except BrokenProcessPool:
+                        raise
+                    except Exception as e:
+                        errors.append(f"page {page + 1}: {e}")
+                        job.pages.append({"page": page + 1, "status": "failed", "chars": 0})
+                        OCR_PAGES.inc(status="error")
+                        continue
+                    job.pages.append({"page": page + 1, "status": "done", "chars": len(texts[page])})
+                    OCR_PAGES.inc(status="ok")
+                job.text = "\n".join(texts[p] for p in sorted(texts) if texts[p])
+                if job.text:
+                    job.detected = detect_conditions(job.text)
+                job.publish({"event": "ocr_page", "job_id": job.id, "pages": job.pages,
+                             "page_count": job.page_count, "detected_conditions": job.detected})
+                if self.early_stop and all(job.detected.get(c) for c in self.early_stop):
+                    job.stopped_early = next_page < job.page_count or bool(pending)
+                    break
+        finally:
+            for future in pending:
+                future.cancel()
+            skipped = job.page_count - len(job.pages)
+            if skipped > 0:
+                OCR_PAGES.inc(skipped, status="skipped")
+        if errors and not texts:
+            return "; ".join(errors)
+        return None
+
+
+ocr_queue = OCRJobQueue()
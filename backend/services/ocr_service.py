@@ -2,94 +2,200 @@
 OCR Service — Extracts text from uploaded documents and maps to
 chronic conditions / symptom flags to merge with intake data.
 Uses pytesseract if available, otherwise graceful degradation.
+Documents are OCR'd through the job queue (services/ocr_jobs.py), which runs
+page_count and ocr_page in its worker pool.
 """
 import os
 
+from services.metrics import registry
+from services import clinical_terms
+from services.clinical_terms import CHRONIC_KEYWORDS, SYMPTOM_KEYWORDS  # noqa: F401 (re-exported)
+
+OCR_SECONDS = registry.histogram(
+    "ocr_seconds", "Time spent in tesseract per document.", buckets=(0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60)
+)
+OCR_DOCUMENTS = registry.counter("ocr_documents_total", "Documents passed to OCR by outcome.", ("status",))
+
 try:
-    from PIL import Image
+    import numpy as np
+    from PIL import Image, ImageFilter, ImageOps
     import pytesseract
     OCR_AVAILABLE = True
 except ImportError:
     OCR_AVAILABLE = False
     print("[OCR] pytesseract or Pillow not installed. OCR disabled.")
 
+try:
+    import pypdfium2 as pdfium
+    PDF_AVAILABLE = True
+except ImportError:
+    PDF_AVAILABLE = False
+
+OCR_MAX_PAGES = int(os.getenv("OCR_MAX_PAGES", "50"))
+PDF_TEXT_MIN_CHARS = 20  # PDF pages with less embedded text than this are treated as scans
+
+# ── Preprocessing (phone photos are large, unevenly lit and mostly background) ──
+OCR_PREPROCESS = os.getenv("OCR_PREPROCESS", "1") == "1"
+OCR_TARGET_DPI = int(os.getenv("OCR_TARGET_DPI", "300"))
+OCR_MAX_SIDE = int(os.getenv("OCR_MAX_SIDE", "3000"))  # px; photos carry no meaningful DPI
+OCR_BINARIZE = os.getenv("OCR_BINARIZE", "1") == "1"
+OCR_CROP = os.getenv("OCR_CROP", "1") == "1"
+CROP_MIN_INK = 0.002  # fraction of dark pixels for a row/column to count as text
+CROP_MAX_INK = 0.5  # edge rows/columns darker than this are surroundings, not page
+CROP_MARGIN = 20  # px kept around the text region
+
+
+def _scale_factor(image, target_dpi: int, max_side: int) -> float:
+    factor = 1.0
+    dpi = image.info.get("dpi")
+    if dpi and dpi[0] and dpi[0] > target_dpi:
+        factor = target_dpi / float(dpi[0])
+    longest = max(image.size) * factor
+    if longest > max_side:
+        factor *= max_side / longest
+    return factor
+
+
+def _otsu_threshold(pixels) -> int:
+    """Grey level that best separates ink from paper (maximum between-class variance)."""
+    hist = np.bincount(pixels.ravel(), minlength=256).astype(np.float64)
+    levels = np.arange(256)
+    weight = np.cumsum(hist)
+    mass = np.cumsum(hist * levels)
+    total, total_mass = weight[-1], mass[-1]
+    background = total - weight
+    valid = (weight > 0) & (background > 0)
+    between = np.zeros(256)
+    between[valid] = (total_mass * weight[valid] - mass[valid] * total) ** 2 / (weight[valid] * background[valid])
+    return int(np.argmax(between))
+
+
+def _text_bbox(ink):
+    """
+    (top, bottom, left, right) of the text, or None. Rows and columns that are mostly
+    ink are page edges or surroundings (table, fingers) and are left out first.
+    """
+    # Widened by the margin so the ragged transition next to a dark band goes too
+    window = np.ones(2 * CROP_MARGIN + 1)
+    dark_rows = np.convolve(ink.mean(axis=1) > CROP_MAX_INK, window, mode="same") > 0
+    dark_cols = np.convolve(ink.mean(axis=0) > CROP_MAX_INK, window, mode="same") > 0
+    text = ink.copy()
+    text[dark_rows, :] = False
+    text[:, dark_cols] = False
+    rows = np.flatnonzero(text.mean(axis=1) > CROP_MIN_INK)
+    cols = np.flatnonzero(text.mean(axis=0) > CROP_MIN_INK)
+    if not rows.size or not cols.size:
+        return None
+    return rows[0], rows[-1] + 1, cols[0], cols[-1] + 1
+
+
+def preprocess_image(
+    image,
+    target_dpi: int = OCR_TARGET_DPI,
+    max_side: int = OCR_MAX_SIDE,
+    binarize: bool = OCR_BINARIZE,
+    crop: bool = OCR_CROP,
+):
+    """
+    Prepares a page for tesseract: EXIF orientation, downscale to about target_dpi
+    (long side capped at max_side), grayscale, illumination-flattened Otsu
+    binarization and a crop to the text region. Returns a mode "L" image.
+    """
+    factor = _scale_factor(image, target_dpi, max_side)
+    width, height = round(image.width * factor), round(image.height * factor)
+    if factor < 1.0:
+        # JPEG decodes straight to a reduced, grayscale image (DCT scaling), which is far cheaper
+        image.draft("L", (width, height))
+    image = ImageOps.exif_transpose(image).convert("L")
+    size = (height, width) if (image.width > image.height) != (width > height) else (width, height)
+    if factor < 1.0 and image.size != size:
+        image = image.resize(size, Image.Resampling.LANCZOS)
+    if not binarize:
+        return image
+
+    # Divide out the paper's brightness (text removed by a max filter) before thresholding
+    small = image.reduce(16) if min(image.size) >= 64 else image
+    background = small.filter(ImageFilter.MaxFilter(5)).resize(image.size, Image.Resampling.BILINEAR)
+    pixels = np.asarray(image, dtype=np.float32) / np.maximum(np.asarray(background, dtype=np.float32), 1.0)
+    pixels = np.clip(pixels * 255.0, 0, 255).astype(np.uint8)
+    ink = pixels <= _otsu_threshold(pixels)
+
+    if crop and (bbox := _text_bbox(ink)) is not None:
+        top, bottom, left, right = bbox
+        ink = ink[max(top - CROP_MARGIN, 0):bottom + CROP_MARGIN, max(left - CROP_MARGIN, 0):right + CROP_MARGIN]
+    return Image.fromarray(np.where(ink, 0, 255).astype(np.uint8), mode="L")
+
+
+def _is_pdf(file_path: str) -> bool:
+    with open(file_path, "rb") as fh:
+        return fh.read(5) == b"%PDF-"
+
+
+def _open_pdf(file_path: str):
+    if not PDF_AVAILABLE:
+        raise RuntimeError("PDF documents need pypdfium2 (pip install pypdfium2)")
+    return pdfium.PdfDocument(file_path)
+
+
+def page_count(file_path: str) -> int:
+    """Pages in a document (PDF pages or image frames, e.g. multi-page TIFF), capped at OCR_MAX_PAGES."""
+    if _is_pdf(file_path):
+        pdf = _open_pdf(file_path)
+        try:
+            count = len(pdf)
+        finally:
+            pdf.close()
+    elif not OCR_AVAILABLE:
+        return 1
+    else:
+        with Image.open(file_path) as image:
+            count = getattr(image, "n_frames", 1)
+    return max(1, min(count, OCR_MAX_PAGES))
+
+
+def ocr_page(file_path: str, page: int = 0, preprocess: bool = OCR_PREPROCESS) -> str:
+    """
+    Text of one page of the document at `file_path`; errors propagate.
+    PDF pages with a text layer are read directly, others are rendered at
+    OCR_TARGET_DPI and OCR'd like image frames. Has no side effects, so it can run
+    in an OCR worker process (services/ocr_jobs.py).
+    """
+    if _is_pdf(file_path):
+        pdf = _open_pdf(file_path)
+        try:
+            pdf_page = pdf[page]
+            text = pdf_page.get_textpage().get_text_bounded()
+            if len(text.strip()) >= PDF_TEXT_MIN_CHARS or not OCR_AVAILABLE:
+                return text
+            image = pdf_page.render(scale=OCR_TARGET_DPI / 72, grayscale=True).to_pil()
+        finally:
+            pdf.close()
+        image.info["dpi"] = (OCR_TARGET_DPI, OCR_TARGET_DPI)
+        if preprocess:
+            image = preprocess_image(image)
+        return pytesseract.image_to_string(image)
 
-# ── Keyword → condition/symptom mapping ───────────────────────
-CHRONIC_KEYWORDS = {
-    "hypertension": "hypertension",
-    "high blood pressure": "hypertension",
-    "diabetes": "diabetes",
-    "diabetic": "diabetes",
-    "type 2 diabetes": "diabetes",
-    "type 1 diabetes": "diabetes",
-    "heart disease": "heart disease",
-    "cardiac": "heart disease",
-    "coronary": "heart disease",
-    "asthma": "asthma",
-    "chronic kidney": "chronic kidney disease",
-    "ckd": "chronic kidney disease",
-    "renal failure": "chronic kidney disease",
-}
-
-SYMPTOM_KEYWORDS = {
-    "chest pain": "chest pain",
-    "shortness of breath": "shortness of breath",
-    "dyspnea": "shortness of breath",
-    "fever": "fever",
-    "cough": "cough",
-    "headache": "headache",
-    "dizzy": "dizziness",
-    "dizziness": "dizziness",
-    "vomit": "vomiting",
-    "nausea": "vomiting",
-    "diarrhea": "diarrhea",
-    "abdominal pain": "abdominal pain",
-    "stomach pain": "abdominal pain",
-    "palpitation": "palpitations",
-    "weakness": "weakness",
-    "fatigue": "weakness",
-    "numbness": "numbness",
-    "tingling": "numbness",
-}
-
-
-def extract_text_from_file(file_path: str) -> str:
-    """Extracts text from an image file using pytesseract."""
     if not OCR_AVAILABLE:
         return ""
-    
-    if not os.path.exists(file_path):
-        return ""
-
-    try:
-        image = Image.open(file_path)
-        text = pytesseract.image_to_string(image)
-        return text
-    except Exception as e:
-        print(f"[OCR] Error processing {file_path}: {e}")
-        return ""
+    with Image.open(file_path) as image:
+        if page:
+            image.seek(page)
+        if preprocess:
+            image = preprocess_image(image)
+        return pytesseract.image_to_string(image)
 
 
 def detect_conditions(text: str) -> dict:
     """
-    Scans extracted text for medical keywords.
-    Returns detected chronic conditions and symptoms.
+    Scans extracted text for medical keywords in one pass (services/clinical_terms.py).
+    Returns detected chronic conditions and symptoms (canonical triage names), plus
+    knowledge-base terms mentioned in the text, which are informational only.
     """
-    text_lower = text.lower()
-
-    detected_chronic = set()
-    for keyword, condition in CHRONIC_KEYWORDS.items():
-        if keyword in text_lower:
-            detected_chronic.add(condition)
-
-    detected_symptoms = set()
-    for keyword, symptom in SYMPTOM_KEYWORDS.items():
-        if keyword in text_lower:
-            detected_symptoms.add(symptom)
-
+    found = clinical_terms.scan(text, ("chronic", "symptom", "kb_symptom", "kb_chronic"))
     return {
-        "chronic_conditions": list(detected_chronic),
-        "symptoms": list(detected_symptoms),
+        "chronic_conditions": found["chronic"],
+        "symptoms": found["symptom"],
+        "knowledge_base_terms": {"symptoms": found["kb_symptom"], "chronic_conditions": found["kb_chronic"]},
         "raw_text": text[:500]  # Store first 500 chars for audit
     }
 
@@ -0,0 +1,86 @@
+"""
+Delta encoding of a doctor's queue for the /ws/doctor WebSocket.
+
+Entries are identified by `queue_id`. A change between two queue lists is a list
+of operations, applied by the client in this order:
+
+  1. every `remove` and `move` detaches its entry;
+  2. `insert` and `move` ops, sorted by index, put an entry at `index` of the
+     list as it stands;
+  3. `patch` ops update the listed fields of an entry.
+
+Moves are only emitted for entries outside the longest run that kept its order,
+so moving one patient costs one op, however long the queue. `position` is not
+sent: it is always the 1-based index in the list.
+"""
+import bisect
+from typing import Iterable
+
+KEY = "queue_id"
+DERIVED_FIELDS = ("position",)
+
+
+def _stable_ids(old_ids: list, new_ids: list) -> set:
+    """Ids in the longest subsequence of new_ids whose order matches old_ids."""
+    old_index = {qid: i for i, qid in enumerate(old_ids)}
+    kept = [qid for qid in new_ids if qid in old_index]
+    tails, tail_at, parent = [], [], {}
+    for qid in kept:
+        i = bisect.bisect_left(tails, old_index[qid])
+        parent[qid] = tail_at[i - 1] if i else None
+        if i == len(tails):
+            tails.append(old_index[qid])
+            tail_at.append(qid)
+        else:
+            tails[i] = old_index[qid]
+            tail_at[i] = qid
+    stable, qid = set(), tail_at[-1] if tail_at else None
+    while qid is not None:
+        stable.add(qid)
+        qid = parent[qid]
+    return stable
+
+
+def _fields(entry: dict) -> dict:
+    return {k: v for k, v in entry.items() if k not in DERIVED_FIELDS}
+
+
+def diff_queue(old: list[dict], new: list[dict]) -> list[dict]:
+    """Operations turning queue list `old` into `new`."""
+    old_by_id = {e[KEY]: e for e in old}
+    new_ids = [e[KEY] for e in new]
+    new_set = set(new_ids)
+    stable = _stable_ids([e[KEY] for e in old], new_ids)
+
+    ops = [{"op": "remove", KEY: qid} for qid in old_by_id if qid not in new_set]
+    patches = []
+    for index, entry in enumerate(new):
+        qid = entry[KEY]
+        previous = old_by_id.get(qid)
+        if previous is None:
+            ops.append({"op": "insert", "index": index, "entry": _fields(entry)})
+            continue
+        if qid not in stable:
+            ops.append({"op": "move", KEY: qid, "index": index})
+        changed = {k: v for k, v in _fields(entry).items() if previous.get(k) != v}
+        if changed:
+            patches.append({"op": "patch", KEY: qid, "fields": changed})
+    return ops + patches
+
+
+def apply_ops(queue: Iterable[dict], ops: list[dict]) -> list[dict]:
+    """The queue list after `ops` (as the client applies them); `queue` is not modified."""
+    by_id = {e[KEY]: dict(e) for e in queue}
+    detached = {op[KEY] for op in ops if op["op"] in ("remove", "move")}
+    result = [entry for qid, entry in by_id.items() if qid not in detached]
+    placed = sorted((op for op in ops if op["op"] in ("insert", "move")), key=lambda op: op["index"])
+    for op in placed:
+        entry = dict(op["entry"]) if op["op"] == "insert" else by_id[op[KEY]]
+        result.insert(op["index"], entry)
+    current = {e[KEY]: e for e in result}
+    for op in ops:
+        if op["op"] == "patch":
+            current[op[KEY]].update(op["fields"])
+    for i, entry in enumerate(result, 1):
+        entry["position"] = i
+    return result
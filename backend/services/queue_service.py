@@ -6,8 +6,20 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, update
 from models import Queue, Doctor, Patient, Visit, ChronicCondition, SymptomSeverity, PriorityRule
 from datetime import datetime, timezone
+from typing import Optional
 import uuid
-from services.ws_manager import notify_doctor_queue_update
+from functools import partial
+from services.ws_manager import after_commit, notify_doctor_queue_update
+from services.metrics import registry
+
+# Default consultation length used for wait estimates
+AVG_CONSULTATION_MINUTES = 15
+
+QUEUE_OPERATION_SECONDS = registry.histogram(
+    "queue_operation_seconds",
+    "Latency of queue operations (insert_into_queue: the intake priority and slot step, reorder_queue_for_doctor).",
+    ("operation",),
+)
 
 
 async def compute_priority_score(db: AsyncSession, visit_id: str, triage_result: dict, is_emergency: bool) -> int:
@@ -32,42 +44,75 @@ async def compute_priority_score(db: AsyncSession, visit_id: str, triage_result:
     if not patient:
         return 50 if is_emergency else base_score
 
+    return await score_priority(
+        db,
+        triage_result,
+        patient.age,
+        patient.symptoms,
+        patient.pre_existing_conditions,
+        is_emergency,
+    )
+
+
+def _split_terms(text: str | None) -> list[str]:
+    """Split a stored comma-separated list into stripped, non-empty terms."""
+    if not text:
+        return []
+    return [t.strip() for t in text.split(",") if t.strip()]
+
+
+async def score_priority(
+    db: AsyncSession,
+    triage_result: dict,
+    age: int,
+    symptoms: str | None,
+    pre_existing_conditions: str | None,
+    is_emergency: bool,
+) -> int:
+    """
+    Score a patient from already-known intake data.
+    Knowledge-base lookups are batched: one query each for chronic conditions,
+    symptom severities and priority rules, regardless of how many terms.
+    """
+    # 1. Base Score from AI Risk (1-10 scaled to 0-30)
+    base_score = triage_result["risk_score"] * 3
+
     # 3. Age Risk Multiplier
     age_score = 0
-    if patient.age > 70 or patient.age < 2:
+    if age > 70 or age < 2:
         age_score = 15
-    elif patient.age > 50 or patient.age < 12:
+    elif age > 50 or age < 12:
         age_score = 10
 
+    conditions = _split_terms(pre_existing_conditions)
+    symptoms_list = _split_terms(symptoms)
+
     # 4. Chronic Risk Multiplier
     chronic_score = 0
-    if patient.pre_existing_conditions:
-        conditions = [c.strip() for c in patient.pre_existing_conditions.split(",") if c.strip()]
+    if conditions:
+        c_stmt = select(
+            func.lower(ChronicCondition.chronic_condition), ChronicCondition.risk_modifier_score
+        ).where(func.lower(ChronicCondition.chronic_condition).in_({c.lower() for c in conditions}))
+        c_res = await db.execute(c_stmt)
+        modifiers = {name: score for name, score in c_res.all()}
         for cond in conditions:
-            # Try to match DB condition
-            c_stmt = select(ChronicCondition.risk_modifier_score).where(func.lower(ChronicCondition.chronic_condition) == cond.lower())
-            c_res = await db.execute(c_stmt)
-            score = c_res.scalar_one_or_none() or 5  # Default 5 if not found but present
-            chronic_score += score
+            chronic_score += modifiers.get(cond.lower()) or 5  # Default 5 if not found but present
 
     # 5. Symptom Severity / Infection Priority
     symptom_score = 0
-    if patient.symptoms:
-        symptoms = [s.strip() for s in patient.symptoms.split(",") if s.strip()]
-        for sym in symptoms:
-            s_stmt = select(SymptomSeverity.base_severity).where(func.lower(SymptomSeverity.symptom_name) == sym.lower())
-            s_res = await db.execute(s_stmt)
-            severity = s_res.scalar_one_or_none() or 3 # Default 3
-            symptom_score += severity
+    if symptoms_list:
+        s_stmt = select(
+            func.lower(SymptomSeverity.symptom_name), SymptomSeverity.base_severity
+        ).where(func.lower(SymptomSeverity.symptom_name).in_({s.lower() for s in symptoms_list}))
+        s_res = await db.execute(s_stmt)
+        severities = {name: severity for name, severity in s_res.all()}
+        for sym in symptoms_list:
+            symptom_score += severities.get(sym.lower()) or 3  # Default 3
 
     # 6. Priority Rules (disease/syndrome mapping)
     rule_score = 0
     rule_emergency = False
-    rule_terms = []
-    if patient.symptoms:
-        rule_terms.extend([s.strip().lower() for s in patient.symptoms.split(",") if s.strip()])
-    if patient.pre_existing_conditions:
-        rule_terms.extend([c.strip().lower() for c in patient.pre_existing_conditions.split(",") if c.strip()])
+    rule_terms = [s.lower() for s in symptoms_list] + [c.lower() for c in conditions]
 
     if rule_terms:
         rule_stmt = select(PriorityRule.base_priority, PriorityRule.emergency_override).where(
@@ -101,68 +146,6 @@ async def get_next_position(db: AsyncSession, doctor_id: str) -> int:
     return result.scalar() or 1
 
 
-async def insert_into_queue(
-    db: AsyncSession,
-    visit_id: str,
-    doctor_id: str,
-    triage_result: dict,
-) -> int:
-    """
-    Insert patient into the queue. Returns queue position.
-    """
-    # Coerce IDs to UUID early
-    if isinstance(visit_id, str):
-        visit_id_uuid = uuid.UUID(visit_id)
-    else:
-        visit_id_uuid = visit_id
-        
-    if isinstance(doctor_id, str):
-        doctor_id_uuid = uuid.UUID(doctor_id)
-        doctor_id_str = doctor_id
-    else:
-        doctor_id_uuid = doctor_id
-        doctor_id_str = str(doctor_id)
-    
-    is_emergency = triage_result["risk_level"] == "High"
-    
-    # Compute detailed priority
-    priority = await compute_priority_score(db, str(visit_id_uuid), triage_result, is_emergency)
-
-    # Prevent duplicate insertions
-    existing = await db.execute(
-        select(Queue.queue_id).where(Queue.visit_id == visit_id_uuid)
-    )
-    if existing.scalar_one_or_none():
-        return 0  # Already in queue
-
-    position = await get_next_position(db, doctor_id_str)
-
-    # Emergency patients get position 1 (pushed to front)
-    if is_emergency:
-        # Shift existing positions down
-        await db.execute(
-            update(Queue)
-            .where(Queue.doctor_id == doctor_id_uuid)
-            .values(queue_position=Queue.queue_position + 1)
-        )
-        position = 1
-
-    queue_entry = Queue(
-        queue_id=uuid.uuid4(),
-        visit_id=visit_id_uuid,
-        doctor_id=doctor_id_uuid,
-        priority_score=priority,
-        queue_position=position,
-        waiting_time_minutes=0,
-        is_emergency=is_emergency,
-    )
-    db.add(queue_entry)
-    await db.flush()
-    # Reorder and notify
-    await reorder_queue_for_doctor(db, doctor_id_str)
-    return position
-
-
 async def estimate_wait_time(db: AsyncSession, visit_id: str, doctor_id: str) -> int:
     """
     Estimate wait time in minutes based on queue position and avg consultation time.
@@ -183,23 +166,22 @@ async def estimate_wait_time(db: AsyncSession, visit_id: str, doctor_id: str) ->
     doc_result = await db.execute(doc_stmt)
     doctor = doc_result.scalars().first()
 
-    avg_time = 15  # default
+    avg_time = AVG_CONSULTATION_MINUTES  # default
     if doctor and doctor.consultation_fee:
         # Use a simple heuristic: higher fee = more thorough = slightly longer
-        avg_time = 15
+        avg_time = AVG_CONSULTATION_MINUTES
 
-    # patients_ahead * avg_time
-    wait = max(0, (position - 1)) * avg_time
-    return wait
+    return wait_minutes_for_position(position, avg_time)
 
 
-async def get_doctor_queue(db: AsyncSession, doctor_id: str) -> list[dict]:
-    """Get the dynamically sorted queue for a doctor."""
-    # Coerce doctor_id to UUID if it's a string
-    if isinstance(doctor_id, str):
-        doctor_id = uuid.UUID(doctor_id)
-    
-    stmt = (
+def wait_minutes_for_position(position: int, avg_time: int = AVG_CONSULTATION_MINUTES) -> int:
+    """patients_ahead * avg_time"""
+    return max(0, (position - 1)) * avg_time
+
+
+def _queue_select():
+    """Queue entries with the patient and visit fields shown on the dashboards."""
+    return (
         select(
             Queue,
             Patient.patient_id,
@@ -212,13 +194,12 @@ async def get_doctor_queue(db: AsyncSession, doctor_id: str) -> list[dict]:
         )
         .join(Visit, Queue.visit_id == Visit.visit_id)
         .join(Patient, Visit.patient_id == Patient.patient_id)
-        .where(Queue.doctor_id == doctor_id)
         .order_by(Queue.priority_score.desc(), Queue.queue_position.asc())
     )
-    result = await db.execute(stmt)
-    # result is rows of (Queue, full_name, age, gender, symptoms, risk_level)
-    rows = result.all()
 
+
+def _rank_queue(rows) -> list[dict]:
+    """One doctor's rows of (Queue, patient_id, full_name, age, gender, symptoms, risk_level, status), ranked."""
     queue_list = []
     for i, row in enumerate(rows, 1):
         queue_entry = row[0]
@@ -275,25 +256,68 @@ async def get_doctor_queue(db: AsyncSession, doctor_id: str) -> list[dict]:
     return queue_list
 
 
-async def reorder_queue_for_doctor(db: AsyncSession, doctor_id: str) -> list[dict]:
-    """Recompute dynamic queue ordering, persist positions, and broadcast updates."""
+async def get_doctor_queue(db: AsyncSession, doctor_id: str) -> list[dict]:
+    """Get the dynamically sorted queue for a doctor."""
+    # Coerce doctor_id to UUID if it's a string
+    if isinstance(doctor_id, str):
+        doctor_id = uuid.UUID(doctor_id)
+
+    result = await db.execute(_queue_select().where(Queue.doctor_id == doctor_id))
+    return _rank_queue(result.all())
+
+
+async def get_department_queue(db: AsyncSession, department_id: str) -> list[dict]:
+    """Queues of every doctor in a department, merged by dynamic score; entries carry doctor_id."""
+    if isinstance(department_id, str):
+        department_id = uuid.UUID(department_id)
+    # One query for the whole department; positions are still ranked per doctor
+    stmt = (
+        _queue_select()
+        .join(Doctor, Queue.doctor_id == Doctor.doctor_id)
+        .where(Doctor.department_id == department_id)
+    )
+    by_doctor: dict = {}
+    for row in (await db.execute(stmt)).all():
+        by_doctor.setdefault(row[0].doctor_id, []).append(row)
+    merged = []
+    for doctor_id, rows in by_doctor.items():
+        merged.extend({**item, "doctor_id": str(doctor_id)} for item in _rank_queue(rows))
+    merged.sort(key=lambda x: x["dynamic_score"], reverse=True)
+    return merged
+
+
+@QUEUE_OPERATION_SECONDS.timed(operation="reorder_queue_for_doctor")
+async def reorder_queue_for_doctor(
+    db: AsyncSession, doctor_id: str, event: Optional[dict] = None, department_id: Optional[str] = None
+) -> list[dict]:
+    """Recompute dynamic queue ordering, persist positions, and broadcast them once committed.
+
+    `event` names the change for the doctor's dashboards (default {"event": "queue_reordered"}).
+    Callers that already know the doctor's department can pass department_id to skip the lookup.
+    """
     queue_list = await get_doctor_queue(db, doctor_id)
-    for item in queue_list:
-        # Convert queue_id from string back to UUID for database query
-        queue_id_uuid = uuid.UUID(item["queue_id"])
+    if queue_list:
+        # Bulk UPDATE by primary key: one executemany instead of one statement per entry
         await db.execute(
-            update(Queue)
-            .where(Queue.queue_id == queue_id_uuid)
-            .values(
-                queue_position=item["position"],
-                wait_time_boost=item.get("wait_time_boost", 0),
-            )
+            update(Queue),
+            [
+                {
+                    "queue_id": uuid.UUID(item["queue_id"]),
+                    "queue_position": item["position"],
+                    "wait_time_boost": item.get("wait_time_boost", 0),
+                }
+                for item in queue_list
+            ],
         )
-    try:
-        await notify_doctor_queue_update(doctor_id, {
-            "event": "queue_reordered",
-            "queue": queue_list,
-        })
-    except Exception:
-        pass
+    # department_id routes the update to that department's merged queue topic
+    if department_id is None:
+        department_id = await db.scalar(
+            select(Doctor.department_id).where(Doctor.doctor_id == uuid.UUID(str(doctor_id)))
+        )
+    after_commit(db, partial(notify_doctor_queue_update, doctor_id, {
+        "event": "queue_reordered",
+        **(event or {}),
+        "department_id": str(department_id) if department_id else None,
+        "queue": queue_list,
+    }))
     return queue_list
@@ -7,6 +7,17 @@ SHAP: TreeExplainer for XGBoost feature contributions.
 import numpy as np
 from models_loader import stage1_model, stage2_model, scaler, feature_cols, threshold, model_version
 from utils import build_features
+from services.metrics import registry
+from services.knowledge_base import load_knowledge_base
+from services.keyword_matcher import TermMatcher
+from services import clinical_terms
+
+TRIAGE_STAGE_SECONDS = registry.histogram(
+    "triage_stage_seconds",
+    "Time spent in each run_triage stage (features, stage1, stage2, shap).",
+    ("stage",),
+)
+TRIAGE_RUNS = registry.counter("triage_runs_total", "Completed triage runs by risk level.", ("risk_level",))
 
 # ── Symptom → Department mapping ──────────────────────────────
 SYMPTOM_DEPT_MAP = {
@@ -24,21 +35,45 @@ SYMPTOM_DEPT_MAP = {
     "weakness": "General Medicine",
 }
 
-# Try to load dynamic mapping cache (created by scripts/import_datasets.py)
-try:
-    import json
-    from pathlib import Path
-    CACHE = Path(__file__).resolve().parents[1] / "data_cache.json"
-    if CACHE.exists():
-        with open(CACHE, "r", encoding="utf-8") as fh:
-            data = json.load(fh)
-            cached_map = data.get("symptom_to_department", {})
-            # merge: prefer dataset mapping
-            for k, v in cached_map.items():
-                if k and v:
-                    SYMPTOM_DEPT_MAP[k.lower().strip()] = v
-except Exception:
-    pass
+# Dataset knowledge base (mmap'd snapshot written by scripts/import_datasets.py and
+# scripts/migrate_db.py); its symptom departments take precedence over the map above.
+# None until a snapshot has been built.
+KB = load_knowledge_base()
+
+
+def refresh_knowledge_base() -> None:
+    """Re-map the snapshot after it has been rebuilt and recompile the matchers built from it."""
+    global KB, SYMPTOM_MATCHER
+    KB = load_knowledge_base()
+    SYMPTOM_MATCHER = _build_symptom_matcher()
+    clinical_terms.refresh_term_matcher(KB)
+
+
+def _symptom_department(symptom: str) -> str | None:
+    key = symptom.lower().strip()
+    if KB is not None:
+        dept = KB.value("symptoms", "associated_department", key)
+        if dept:
+            return dept
+    return SYMPTOM_DEPT_MAP.get(key)
+
+
+def _build_symptom_matcher() -> TermMatcher:
+    """
+    "canonical": SYMPTOM_DEPT_MAP names and their inflections (clinical_terms.with_inflections);
+    "kb": knowledge-base names.
+    Overlaps resolve within each vocabulary, so a KB fragment such as "severe chest"
+    cannot hide the canonical "chest pain".
+    """
+    vocabularies = {"canonical": clinical_terms.with_inflections({term: term for term in SYMPTOM_DEPT_MAP})}
+    if KB is not None:
+        vocabularies["kb"] = {s: s for s in KB.keys("symptoms") if s not in SYMPTOM_DEPT_MAP}
+    return TermMatcher(vocabularies)
+
+
+# Compiled once from the symptom vocabulary; rebuilt by refresh_knowledge_base()
+SYMPTOM_MATCHER = _build_symptom_matcher()
+
 
 # Priority order for department selection
 DEPT_PRIORITY = ["Cardiology", "Neurology", "Pulmonology", "Gastroenterology", "General Medicine"]
@@ -48,7 +83,7 @@ def _determine_department(symptoms: list[str]) -> str:
     """Pick highest-priority department based on symptom list."""
     dept_hits: dict[str, int] = {}
     for s in symptoms:
-        dept = SYMPTOM_DEPT_MAP.get(s.lower().strip())
+        dept = _symptom_department(s)
         if dept:
             dept_hits[dept] = dept_hits.get(dept, 0) + 1
 
@@ -115,10 +150,12 @@ def run_triage(payload: dict) -> dict:
     Returns risk_level, risk_score, confidence, department, SHAP explanation.
     """
     # Build features
-    features_df = build_features(payload)
+    with TRIAGE_STAGE_SECONDS.time(stage="features"):
+        features_df = build_features(payload)
 
     # Stage 1: XGBoost — High vs Not-High
-    stage1_proba = stage1_model.predict_proba(features_df)[0]
+    with TRIAGE_STAGE_SECONDS.time(stage="stage1"):
+        stage1_proba = stage1_model.predict_proba(features_df)[0]
     high_prob = float(stage1_proba[1])
 
     if high_prob >= threshold:
@@ -127,8 +164,9 @@ def run_triage(payload: dict) -> dict:
         confidence = high_prob
     else:
         # Stage 2: Logistic Regression — Medium vs Low
-        scaled = scaler.transform(features_df)
-        stage2_proba = stage2_model.predict_proba(scaled)[0]
+        with TRIAGE_STAGE_SECONDS.time(stage="stage2"):
+            scaled = scaler.transform(features_df)
+            stage2_proba = stage2_model.predict_proba(scaled)[0]
         # Class 0 = Low, Class 1 = Medium
         medium_prob = float(stage2_proba[1])
 
@@ -145,7 +183,9 @@ def run_triage(payload: dict) -> dict:
     department_name = _determine_department(payload.get("symptoms", []))
 
     # SHAP explanation
-    shap_explanation = _compute_shap_explanation(features_df)
+    with TRIAGE_STAGE_SECONDS.time(stage="shap"):
+        shap_explanation = _compute_shap_explanation(features_df)
+    TRIAGE_RUNS.inc(risk_level=risk_level)
 
     return {
         "risk_level": risk_level,
@@ -160,16 +200,11 @@ def run_triage(payload: dict) -> dict:
 def extract_symptoms_from_text(text: str) -> list[str]:
     """
     Parses natural language text to extract symptoms.
-    Uses keyword matching against known symptoms.
+    One pass over the text with the compiled symptom matcher: whole words only,
+    canonical symptoms first (inflections map to them), then knowledge-base names.
     """
-    text_lower = text.lower()
-    found_symptoms = []
-    
-    # Simple keyword matching from SYMPTOM_DEPT_MAP
-    for symptom in SYMPTOM_DEPT_MAP.keys():
-        if symptom in text_lower:
-            found_symptoms.append(symptom)
-    return found_symptoms
+    found = SYMPTOM_MATCHER.scan(text)
+    return list(dict.fromkeys(found["canonical"] + found.get("kb", [])))
 
 def run_triage_text(text: str) -> dict:
     """
@@ -0,0 +1,157 @@
+"""
+Streaming, size-bounded, content-addressed storage for uploaded documents.
+
+The multipart request body is parsed as it arrives (python-multipart), so the
+upload is never spooled by the framework first. The file part is hashed and
+written to a temporary file next to its destination chunk by chunk; once the
+file passes MAX_UPLOAD_BYTES, or the whole body passes it plus
+UPLOAD_FORM_OVERHEAD, reading stops, the partial file is removed and
+UploadTooLarge is raised. The finished file is renamed to <sha256><ext>, so the
+client's filename never becomes a path and an identical upload reuses the file
+already on disk. Nothing is kept in memory: the OCR worker reads the stored file.
+"""
+import asyncio
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, Optional
+
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+from services.metrics import registry
+
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(20 * 1024 * 1024)))
+UPLOAD_FORM_OVERHEAD = 64 * 1024  # multipart boundaries and part headers around the file
+
+UPLOAD_BYTES = registry.counter("upload_bytes_total", "Bytes received by /documents/upload.")
+UPLOADS_REJECTED = registry.counter("uploads_rejected_total", "Uploads refused, by reason.", ("reason",))
+
+
+class UploadTooLarge(Exception):
+    """The upload exceeds the configured size limit."""
+
+
+class InvalidUpload(Exception):
+    """The request is not a multipart form carrying the expected file field."""
+
+
+@dataclass
+class StoredUpload:
+    path: str
+    filename: str
+    content_hash: str
+    size: int
+
+
+def _extension(filename: str) -> str:
+    ext = os.path.splitext(os.path.basename(filename or ""))[1].lower()
+    return ext if ext[1:].isalnum() and len(ext) <= 8 else ""
+
+
+class _FilePart:
+    """Collects the bytes of the form field `name` while the parser runs."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.filename: Optional[str] = None
+        self.found = False
+        self.pending: list[bytes] = []
+        self._in_file = False
+        self._header_field = b""
+        self._header_value = b""
+        self._disposition: Optional[bytes] = None
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self._part_begin,
+            "on_header_field": lambda data, start, end: self._add("_header_field", data[start:end]),
+            "on_header_value": lambda data, start, end: self._add("_header_value", data[start:end]),
+            "on_header_end": self._header_end,
+            "on_headers_finished": self._headers_finished,
+            "on_part_data": self._part_data,
+            "on_part_end": self._part_end,
+        }
+
+    def _add(self, attr: str, chunk: bytes) -> None:
+        setattr(self, attr, getattr(self, attr) + chunk)
+
+    def _part_begin(self) -> None:
+        self._disposition = None
+
+    def _header_end(self) -> None:
+        if self._header_field.lower() == b"content-disposition":
+            self._disposition = self._header_value
+        self._header_field = self._header_value = b""
+
+    def _headers_finished(self) -> None:
+        _, options = parse_options_header(self._disposition or b"")
+        name = options.get(b"name", b"").decode("latin-1")
+        self._in_file = not self.found and name == self.name and b"filename" in options
+        if self._in_file:
+            self.found = True
+            self.filename = options[b"filename"].decode("utf-8", "replace")
+
+    def _part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._in_file:
+            self.pending.append(data[start:end])
+
+    def _part_end(self) -> None:
+        self._in_file = False
+
+
+async def store_upload(
+    chunks: AsyncIterator[bytes],
+    content_type: str,
+    uploads_dir: str,
+    max_bytes: int = MAX_UPLOAD_BYTES,
+    field_name: str = "file",
+) -> StoredUpload:
+    """Parse a multipart body from `chunks` (e.g. request.stream()) and store its file field."""
+    mime, options = parse_options_header(content_type or "")
+    boundary = options.get(b"boundary")
+    if mime != b"multipart/form-data" or not boundary:
+        raise InvalidUpload("Expected a multipart/form-data body")
+    part = _FilePart(field_name)
+    parser = MultipartParser(boundary, part.callbacks())
+    digest = hashlib.sha256()
+    size = received = 0
+    fd, tmp_path = tempfile.mkstemp(dir=uploads_dir, prefix=".upload-")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            async for chunk in chunks:
+                received += len(chunk)
+                if received > max_bytes + UPLOAD_FORM_OVERHEAD:
+                    UPLOADS_REJECTED.inc(reason="too_large")
+                    raise UploadTooLarge(f"Upload exceeds {max_bytes} bytes")
+                parser.write(chunk)
+                data, part.pending = b"".join(part.pending), []
+                if not data:
+                    continue
+                size += len(data)
+                if size > max_bytes:
+                    UPLOADS_REJECTED.inc(reason="too_large")
+                    raise UploadTooLarge(f"Upload exceeds {max_bytes} bytes")
+                digest.update(data)
+                await asyncio.to_thread(fh.write, data)
+            parser.finalize()
+        if not part.found:
+            raise InvalidUpload(f"Missing file field {field_name!r}")
+        content_hash = digest.hexdigest()
+        path = Path(uploads_dir) / f"{content_hash}{_extension(part.filename)}"
+        if path.exists():
+            os.unlink(tmp_path)
+        else:
+            os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    UPLOAD_BYTES.inc(size)
+    return StoredUpload(
+        path=str(path),
+        filename=os.path.basename(part.filename or path.name),
+        content_hash=content_hash,
+        size=size,
+    )
@@ -1,11 +1,17 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, func
-from models import Patient, Visit, AIAssessment, Department, EmergencyAlert, DoctorAssignment, Doctor
-from services.ocr_service import extract_text_from_file, detect_conditions, merge_ocr_with_payload
+from sqlalchemy import insert, update
+from models import Patient, Visit, AIAssessment, EmergencyAlert, DoctorAssignment, Queue, AuditLog
+from services.ocr_service import merge_ocr_with_payload
+from services.ocr_jobs import ocr_queue
+from services.ocr_cache import attach_documents
 from services.triage_service import run_triage
-from services.doctor_service import assign_doctor
-from services.queue_service import insert_into_queue, estimate_wait_time
-from datetime import datetime, timezone
+from services.doctor_service import assign_doctor, get_department_id
+from services.queue_service import (
+    score_priority, get_next_position, reorder_queue_for_doctor, wait_minutes_for_position,
+    QUEUE_OPERATION_SECONDS,
+)
+from services.ws_manager import after_commit, notify_emergency, notify_stats_changed
+from functools import partial
 import uuid
 import logging
 
@@ -14,162 +20,200 @@ logger = logging.getLogger(__name__)
 async def create_visit_orchestration(db: AsyncSession, payload_dict: dict):
     """
     Orchestrates the entire visit creation process:
-    OCR -> Merge -> Patient -> Visit -> Triage -> Assessment -> Alert -> Assign -> Queue
+    OCR -> Merge -> Triage -> Department -> Assign -> Priority, then one write
+    pass for Patient, Visit, Assessment, Alert, Assignment, Queue and Audit rows.
     """
     
     # ── 1. OCR Processing ──
+    # Documents uploaded earlier are referenced by OCR job id and reuse that
+    # result; bare file paths are OCR'd in the worker pool, off the event loop.
     ocr_detected = {"chronic_conditions": [], "symptoms": []}
-    for doc_path in payload_dict.get("uploaded_documents", []):
-        text = extract_text_from_file(doc_path)
-        if text:
-            detected = detect_conditions(text)
-            ocr_detected["chronic_conditions"].extend(detected.get("chronic_conditions", []))
-            ocr_detected["symptoms"].extend(detected.get("symptoms", []))
+    ocr_documents = []
+    job_ids = payload_dict.get("ocr_job_ids", [])
+    doc_paths = payload_dict.get("uploaded_documents", [])
+    if job_ids or doc_paths:
+        ocr_documents = await ocr_queue.results(job_ids, doc_paths)
+        for job in ocr_documents:
+            ocr_detected["chronic_conditions"].extend(job.detected.get("chronic_conditions", []))
+            ocr_detected["symptoms"].extend(job.detected.get("symptoms", []))
 
     # ── 2. Merge OCR results ──
     if ocr_detected["chronic_conditions"] or ocr_detected["symptoms"]:
         payload_dict = merge_ocr_with_payload(payload_dict, ocr_detected)
 
-    # ── 3. Create or Fetch Patient ──
+    # ── 3. Run AI Triage (with SHAP) ──
+    # Pure inference: nothing has been written yet, so the risk level can go
+    # straight into the patient row instead of a follow-up UPDATE.
+    triage_result = run_triage(payload_dict)
+    risk_level = triage_result["risk_level"]
+    is_emergency = risk_level == "High"
+
     if payload_dict.get("patient_id"):
         patient_id = payload_dict["patient_id"]
         # Coerce to UUID if string
         if isinstance(patient_id, str):
             patient_id = uuid.UUID(patient_id)
-        # Update mutable fields
-        stmt = update(Patient).where(Patient.patient_id == patient_id).values(
-            age=payload_dict["age"],
-            full_name=payload_dict.get("full_name"),
-            phone_number=payload_dict.get("phone_number"),
-            symptoms=", ".join(payload_dict["symptoms"]),
-            blood_pressure=f"{payload_dict['systolic_bp']}/0",
-            heart_rate=payload_dict["heart_rate"],
-            temperature=payload_dict["temperature"],
-            pre_existing_conditions=", ".join(payload_dict["chronic_conditions"]),
-            risk_level="Pending" 
-        )
-        await db.execute(stmt)
+        is_new_patient = False
     else:
         patient_id = uuid.uuid4()
-        new_patient = Patient(
-            patient_id=patient_id,
-            age=payload_dict["age"],
-            gender=payload_dict["gender"],
-            full_name=payload_dict.get("full_name"),
-            phone_number=payload_dict.get("phone_number"),
-            symptoms=", ".join(payload_dict["symptoms"]),
-            blood_pressure=f"{payload_dict['systolic_bp']}/0",
-            heart_rate=payload_dict["heart_rate"],
-            temperature=payload_dict["temperature"],
-            pre_existing_conditions=", ".join(payload_dict["chronic_conditions"]),
-        )
-        db.add(new_patient)
-
-    # ── 4. Create Visit ──
+        is_new_patient = True
     visit_id = uuid.uuid4()
-    new_visit = Visit(
-        visit_id=visit_id,
-        patient_id=patient_id,
-        visit_type=payload_dict["visit_type"],
-    )
-    db.add(new_visit)
-    await db.flush()
 
-    # ── 5. Run AI Triage (with SHAP) ──
-    triage_result = run_triage(payload_dict)
+    symptoms_text = ", ".join(payload_dict["symptoms"])
+    conditions_text = ", ".join(payload_dict["chronic_conditions"])
 
-    # Update patient risk level
-    if payload_dict.get("patient_id"):
-        await db.execute(update(Patient).where(Patient.patient_id == patient_id).values(risk_level=triage_result["risk_level"]))
-    else:
-        # new_patient is in session but check if it was added
-        # It's better to update it via object if available, but for consistency lets query or update object
-        # simpler: just execute update to be safe or set on object if we have reference
-        # We didn't keep reference if we didn't use locals logic.
-        # But we added to db.
-        # Just update via stmt is safest or set attribute if we have variable.
-        pass 
-        # Actually my previous main.py logic used `new_patient.risk_level = ...`
-        # Here `new_patient` variable exists in `else` block above.
-        # If I use `stmt` it works for both.
-        await db.execute(update(Patient).where(Patient.patient_id == patient_id).values(risk_level=triage_result["risk_level"]))
-        
-
-    # Update visit emergency flag
-    if triage_result["risk_level"] == "High":
-        new_visit.emergency_flag = True
-
-    # ── 6. Look up department UUID ──
+    # ── 4. Look up department UUID (once; reused for assignment) ──
     dept_name = triage_result["department_name"]
-    dept_stmt = select(Department.department_id).where(
-        func.lower(Department.name) == dept_name.lower()
+    dept_id = await get_department_id(db, dept_name)
+    dept_uuid = uuid.UUID(dept_id) if dept_id else None
+
+    # ── 5. Assign Doctor ──
+    doctor_id = doctor_dept_id = None
+    if payload_dict.get("manual_doctor_id"):
+        doctor_id = payload_dict["manual_doctor_id"]
+        # Coerce to UUID if string
+        if isinstance(doctor_id, str):
+            doctor_id = uuid.UUID(doctor_id)
+        # Verify doctor exists?
+    else:
+        use_preferred = payload_dict.get("use_preferred_doctor", True)
+        doctor_id_str, doctor_dept_id = await assign_doctor(
+            db,
+            dept_name,
+            risk_level,
+            str(patient_id) if use_preferred and not is_new_patient else None,
+            department_id=dept_id,
+        )
+        # Convert returned string to UUID
+        if doctor_id_str:
+            doctor_id = uuid.UUID(doctor_id_str)
+
+    # ── 6. Queue priority and slot ──
+    priority = position = None
+    if doctor_id:
+        with QUEUE_OPERATION_SECONDS.time(operation="insert_into_queue"):
+            priority = await score_priority(
+                db, triage_result, payload_dict["age"], symptoms_text, conditions_text, is_emergency
+            )
+            if is_emergency:
+                # Emergency patients get position 1: shift existing positions down
+                await db.execute(
+                    update(Queue)
+                    .where(Queue.doctor_id == doctor_id)
+                    .values(queue_position=Queue.queue_position + 1)
+                )
+                position = 1
+            else:
+                position = await get_next_position(db, str(doctor_id))
+
+    # ── 7. Write all rows in one pass ──
+    # The models declare no relationship(), so a unit-of-work flush would order
+    # tables by class name; rows are inserted here in foreign-key order instead.
+    patient_fields = dict(
+        age=payload_dict["age"],
+        full_name=payload_dict.get("full_name"),
+        phone_number=payload_dict.get("phone_number"),
+        symptoms=symptoms_text,
+        blood_pressure=f"{payload_dict['systolic_bp']}/0",
+        heart_rate=payload_dict["heart_rate"],
+        temperature=payload_dict["temperature"],
+        pre_existing_conditions=conditions_text,
+        risk_level=risk_level,
     )
-    dept_result = await db.execute(dept_stmt)
-    dept_uuid = dept_result.scalar_one_or_none()
+    rows = []
+    if is_new_patient:
+        rows.append((Patient, dict(patient_id=patient_id, gender=payload_dict["gender"], **patient_fields)))
+    else:
+        # Update mutable fields (vitals and risk level in a single statement)
+        await db.execute(update(Patient).where(Patient.patient_id == patient_id).values(**patient_fields))
 
-    # ── 7. Save AI Assessment ──
-    new_assessment = AIAssessment(
+    rows.append((Visit, dict(
+        visit_id=visit_id,
+        patient_id=patient_id,
+        visit_type=payload_dict["visit_type"],
+        emergency_flag=is_emergency,
+    )))
+    rows.append((AIAssessment, dict(
         assessment_id=uuid.uuid4(),
         visit_id=visit_id,
         risk_score=triage_result["risk_score"],
-        risk_level=triage_result["risk_level"],
+        risk_level=risk_level,
         recommended_department=dept_uuid,  # Pass UUID object directly
         confidence_score=triage_result["confidence"],
         model_version=triage_result["model_version"],
         shap_explanation=triage_result["shap_explanation"],
-    )
-    db.add(new_assessment)
+    )))
 
     # ── 8. Emergency Alert (if High) ──
-    if triage_result["risk_level"] == "High":
-        alert = EmergencyAlert(
+    alert = None
+    if is_emergency:
+        alert = dict(
             alert_id=uuid.uuid4(),
             visit_id=visit_id,
             triggered_by="AI",
             alert_message=f"High-risk patient detected. Score: {triage_result['risk_score']}. Department: {dept_name}",
         )
-        db.add(alert)
-
-    # ── 9. Assign Doctor ──
-    doctor_id = None
-    if payload_dict.get("manual_doctor_id"):
-        doctor_id = payload_dict["manual_doctor_id"]
-        # Coerce to UUID if string
-        if isinstance(doctor_id, str):
-            doctor_id = uuid.UUID(doctor_id)
-        # Verify doctor exists?
-    else:
-        use_preferred = payload_dict.get("use_preferred_doctor", True)
-        doctor_id_str, _ = await assign_doctor(
-            db,
-            dept_name,
-            triage_result["risk_level"],
-            str(patient_id) if use_preferred else None,
-        )
-        # Convert returned string to UUID
-        if doctor_id_str:
-            doctor_id = uuid.UUID(doctor_id_str)
+        rows.append((EmergencyAlert, alert))
 
     if doctor_id:
-        new_assignment = DoctorAssignment(
+        rows.append((DoctorAssignment, dict(
             assignment_id=uuid.uuid4(),
             visit_id=visit_id,
             doctor_id=doctor_id,
-        )
-        db.add(new_assignment)
+        )))
+        rows.append((Queue, dict(
+            queue_id=uuid.uuid4(),
+            visit_id=visit_id,
+            doctor_id=doctor_id,
+            priority_score=priority,
+            queue_position=position,
+            waiting_time_minutes=0,
+            is_emergency=is_emergency,
+        )))
 
-    # ── 10. Insert into Queue ──
+    rows.append((AuditLog, dict(
+        log_id=uuid.uuid4(),
+        action=f"visit_created - Risk: {risk_level}, Dept: {dept_name}",
+        target_table="visits",
+        target_id=visit_id,
+    )))
+
+    for model, values in rows:
+        await db.execute(insert(model).values(**values))
+    await attach_documents(db, [job.id for job in ocr_documents], patient_id, visit_id)
+
+    # ── 9. Reorder doctor's queue and notify ──
     queue_position = 0
     wait_minutes = 0
     if doctor_id:
-        queue_position = await insert_into_queue(db, str(visit_id), str(doctor_id), triage_result)
-        wait_minutes = await estimate_wait_time(db, str(visit_id), str(doctor_id))
+        queue_list = await reorder_queue_for_doctor(db, str(doctor_id), department_id=doctor_dept_id)
+        queue_position = next(
+            (item["position"] for item in queue_list if item["visit_id"] == str(visit_id)),
+            position,
+        )
+        wait_minutes = wait_minutes_for_position(queue_position)
+    # Dashboards hear about the visit only once the caller's transaction commits
+    after_commit(db, notify_stats_changed)
+    if alert:
+        after_commit(db, partial(notify_emergency, {
+            "event": "emergency_alert",
+            "alert_id": str(alert["alert_id"]),
+            "visit_id": str(visit_id),
+            "patient_id": str(patient_id),
+            "patient_name": payload_dict.get("full_name"),
+            "risk_score": triage_result["risk_score"],
+            "department": dept_name,
+            "department_id": dept_id,
+            "doctor_id": str(doctor_id) if doctor_id else None,
+            "triggered_by": alert["triggered_by"],
+            "alert_message": alert["alert_message"],
+        }))
 
     # Return result
     return {
         "visit_id": str(visit_id),
         "patient_id": str(patient_id),
-        "risk_level": triage_result["risk_level"],
+        "risk_level": risk_level,
         "risk_score": triage_result["risk_score"],
         "confidence": triage_result["confidence"],
         "department": dept_name,
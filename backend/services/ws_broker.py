@@ -0,0 +1,200 @@
+"""
+Cross-process delivery of dashboard WebSocket updates.
+
+A topic's sockets live in whichever worker accepted them, while the update may
+be published by any worker (`uvicorn --workers N`, or several replicas). WSManager
+hands every coalesced update to a broker, which delivers it to its own process
+at once and, for the shared backends, to every other process:
+
+  memory    (default) this process only; enough for a single worker
+  postgres  LISTEN/NOTIFY on WS_BROKER_CHANNEL over one dedicated asyncpg
+            connection of the primary engine; works across hosts
+  socket    Unix datagram sockets in WS_BROKER_DIR, one per process; a
+            dependency-free stand-in for several workers on one host (SQLite)
+
+NOTIFY payloads and datagrams are small, so a message over WS_BROKER_MAX_PAYLOAD
+bytes is sent without its queue or stats, and the receiving processes reload
+them from the database (only those with a socket open for that topic).
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import tempfile
+import uuid
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+from services.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+WS_BROKER = os.getenv("WS_BROKER", "memory")
+WS_BROKER_CHANNEL = os.getenv("WS_BROKER_CHANNEL", "ws_dashboard_updates")
+WS_BROKER_DIR = os.getenv("WS_BROKER_DIR", os.path.join(tempfile.gettempdir(), "triage-ws"))
+WS_BROKER_MAX_PAYLOAD = int(os.getenv("WS_BROKER_MAX_PAYLOAD", "7900"))  # NOTIFY caps payloads at 8000 bytes
+
+# message fields a receiver can reload itself (see WSManager._receive)
+STATE_FIELDS = ("queue", "stats")
+
+WS_BROKER_MESSAGES = registry.counter(
+    "ws_broker_messages_total",
+    "Updates exchanged with other processes, by direction (sent, received, oversized or failed).",
+    ("direction",),
+)
+
+Deliver = Callable[..., Awaitable[None]]
+
+
+class LocalBroker:
+    """Delivers updates to this process only."""
+
+    def __init__(self, deliver: Optional[Deliver] = None):
+        self.deliver = deliver
+
+    async def start(self, deliver: Deliver) -> None:
+        self.deliver = deliver
+
+    async def publish(self, topic: str, message: dict) -> None:
+        await self.deliver(topic, message)
+
+    async def stop(self) -> None:
+        pass
+
+
+class _SharedBroker(LocalBroker, ABC):
+    """Local delivery plus an envelope sent to the other processes, which skip their own."""
+
+    def __init__(self, max_payload: int = WS_BROKER_MAX_PAYLOAD):
+        super().__init__()
+        self.origin = uuid.uuid4().hex
+        self.max_payload = max_payload
+        self._tasks: set = set()
+
+    def _encode(self, topic: str, message: dict) -> str:
+        payload = json.dumps({"origin": self.origin, "topic": topic, "message": message})
+        if len(payload.encode()) <= self.max_payload or not any(f in message for f in STATE_FIELDS):
+            return payload
+        WS_BROKER_MESSAGES.inc(direction="oversized")
+        slim = {k: v for k, v in message.items() if k not in STATE_FIELDS}
+        return json.dumps({"origin": self.origin, "topic": topic, "message": slim})
+
+    def _received(self, payload) -> None:
+        envelope = json.loads(payload)
+        if envelope["origin"] == self.origin:
+            return
+        WS_BROKER_MESSAGES.inc(direction="received")
+        task = asyncio.get_running_loop().create_task(
+            self.deliver(envelope["topic"], envelope["message"])
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def publish(self, topic: str, message: dict) -> None:
+        await self.deliver(topic, message)
+        try:
+            await self._send(self._encode(topic, message))
+            WS_BROKER_MESSAGES.inc(direction="sent")
+        except Exception as e:
+            WS_BROKER_MESSAGES.inc(direction="failed")
+            logger.warning(f"WebSocket update for {topic} not shared with other workers: {e}")
+
+    @abstractmethod
+    async def _send(self, payload: str) -> None:
+        """Hand an encoded envelope to every other process."""
+
+
+class PostgresBroker(_SharedBroker):
+    """LISTEN/NOTIFY on a dedicated asyncpg connection."""
+
+    def __init__(self, engine, channel: str = WS_BROKER_CHANNEL, max_payload: int = WS_BROKER_MAX_PAYLOAD):
+        super().__init__(max_payload)
+        self.engine = engine
+        self.channel = channel
+        self._conn = None
+        self._listener = None
+        self._send_lock = asyncio.Lock()
+
+    async def start(self, deliver: Deliver) -> None:
+        if self.engine.dialect.name != "postgresql" or self.engine.dialect.driver != "asyncpg":
+            raise RuntimeError("WS_BROKER=postgres needs a postgresql+asyncpg DATABASE_URL")
+        await super().start(deliver)
+        self._conn = await self.engine.connect()
+        raw = await self._conn.get_raw_connection()
+        self._listener = raw.driver_connection
+        await self._listener.add_listener(self.channel, self._on_notify)
+
+    def _on_notify(self, connection, pid, channel, payload) -> None:
+        self._received(payload)
+
+    async def _send(self, payload: str) -> None:
+        # asyncpg runs one query at a time per connection
+        async with self._send_lock:
+            await self._listener.execute("SELECT pg_notify($1, $2)", self.channel, payload)
+
+    async def stop(self) -> None:
+        if self._conn is not None:
+            await self._listener.remove_listener(self.channel, self._on_notify)
+            await self._conn.close()
+            self._conn = None
+
+
+class _DatagramProtocol(asyncio.DatagramProtocol):
+    def __init__(self, broker: "SocketBroker"):
+        self.broker = broker
+
+    def datagram_received(self, data, addr) -> None:
+        self.broker._received(data)
+
+
+class SocketBroker(_SharedBroker):
+    """One Unix datagram socket per process in `directory`; a publish is sent to all of them."""
+
+    def __init__(self, directory: str = WS_BROKER_DIR, max_payload: int = WS_BROKER_MAX_PAYLOAD):
+        super().__init__(max_payload)
+        self.directory = Path(directory)
+        self.path = self.directory / f"{self.origin}.sock"
+        self._transport = None
+        self._sender: Optional[socket.socket] = None
+
+    async def start(self, deliver: Deliver) -> None:
+        await super().start(deliver)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._transport, _ = await asyncio.get_running_loop().create_datagram_endpoint(
+            lambda: _DatagramProtocol(self), local_addr=str(self.path), family=socket.AF_UNIX
+        )
+        self._sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sender.setblocking(False)
+
+    async def _send(self, payload: str) -> None:
+        data = payload.encode()
+        for peer in self.directory.glob("*.sock"):
+            if peer == self.path:
+                continue
+            try:
+                self._sender.sendto(data, str(peer))
+            except (ConnectionRefusedError, FileNotFoundError):
+                # a worker that exited without cleaning up
+                peer.unlink(missing_ok=True)
+            except BlockingIOError:
+                WS_BROKER_MESSAGES.inc(direction="failed")
+
+    async def stop(self) -> None:
+        if self._transport is not None:
+            self._transport.close()
+            self._sender.close()
+            self.path.unlink(missing_ok=True)
+            self._transport = None
+
+
+def create_broker(engine, kind: str = WS_BROKER) -> LocalBroker:
+    """The broker selected by WS_BROKER."""
+    if kind == "postgres":
+        return PostgresBroker(engine)
+    if kind == "socket":
+        return SocketBroker()
+    if kind != "memory":
+        raise ValueError(f"Unknown WS_BROKER {kind!r}; expected memory, postgres or socket")
+    return LocalBroker()
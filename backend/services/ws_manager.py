@@ -1,43 +1,485 @@
-from typing import Dict, Set
-from fastapi import WebSocket
+"""
+Live dashboard WebSocket connections, grouped by topic.
+
+Topics:
+  <doctor_id>               one doctor's queue (/ws/doctor/{doctor_id})
+  department:<id>           the merged queue of every doctor in a department
+  emergencies[:<dept_id>]   emergency alerts, all or for one department
+  stats                     the /stats dashboard figures
+
+Sockets only ever receive their topic, so filtering happens on the server.
+
+Queue changes arrive in bursts: an intake, serve or override recomputes the
+queue, and the handler may publish the same snapshot again. `publish` keeps
+only the latest message per topic and sends it once the burst has been quiet
+for WS_COALESCE_SECONDS, so a burst costs one JSON encode and one write per
+socket. Alerts go out one by one through `emit`.
+
+Queue and stats topics are versioned. A socket gets a `queue_snapshot` or
+`stats_snapshot` (with `seq`) when it connects, then only the change from one
+version to the next: the publishing event with `seq`, `base` and either the
+`ops` from services.queue_delta or the changed stats fields. A socket that is
+behind by more than one version (a slow client that skipped updates, or a
+client asking to resync) gets a snapshot instead. Deltas and snapshots are
+encoded once per version, not per socket. A message published without its
+state (a change notice, or one too large for the broker) makes the receiving
+process load the state itself, and only if it has sockets for the topic.
+
+Every socket is written by its own sender task, so a broadcast only hands the
+message to the outboxes and one slow tablet never delays the other screens. A
+send that takes longer than WS_SEND_TIMEOUT or fails, or an outbox that grows
+past WS_OUTBOX_SIZE messages, evicts the socket: it is unregistered and closed,
+and the client reconnects and starts from a fresh snapshot.
+
+The server keeps the connections alive itself. Every WS_PING_INTERVAL one
+heartbeat task sends a pre-encoded `{"event": "ping"}` to each socket whose
+client has been quiet for that long, and the client answers `{"action":
+"pong"}`. Nothing is sent back for client messages. A socket that stays quiet
+for WS_IDLE_TIMEOUT is evicted. On shutdown, `stop` sends what is pending and
+closes every socket with 1001 (going away).
+
+Coalesced updates go through a broker (services.ws_broker), so with several
+workers each update also reaches the sockets held by the other processes.
+
+Handlers that write hand their notifications to `after_commit`, so dashboards
+only hear about queue, alert and stats changes once they are committed; a
+transaction that rolls back publishes nothing.
+"""
 import asyncio
+import inspect
 import json
+import logging
+import os
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Optional, Set
+
+from fastapi import WebSocket
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from services.metrics import registry
+from services.queue_delta import diff_queue
+from services.ws_broker import LocalBroker
+
+WS_COALESCE_SECONDS = float(os.getenv("WS_COALESCE_SECONDS", "0.05"))
+WS_SEND_TIMEOUT = float(os.getenv("WS_SEND_TIMEOUT", "5"))
+WS_OUTBOX_SIZE = int(os.getenv("WS_OUTBOX_SIZE", "32"))
+WS_PING_INTERVAL = float(os.getenv("WS_PING_INTERVAL", "20"))  # 0 disables pings and idle eviction
+WS_IDLE_TIMEOUT = float(os.getenv("WS_IDLE_TIMEOUT", "60"))
+WS_CLOSE_GOING_AWAY = 1001
+WS_CLOSE_TRY_AGAIN = 1013
+PING = json.dumps({"event": "ping"})
+
+logger = logging.getLogger(__name__)
+
+EMERGENCIES_TOPIC = "emergencies"
+STATS_TOPIC = "stats"
+
+WS_CONNECTIONS = registry.gauge("ws_connections", "Open dashboard WebSocket connections.")
+WS_BROADCAST_SECONDS = registry.histogram(
+    "ws_broadcast_seconds", "Time to hand a message to the outbox of every socket of a topic."
+)
+WS_SEND_SECONDS = registry.histogram("ws_send_seconds", "Time to write one message to one socket.")
+WS_MESSAGES_SENT = registry.counter(
+    "ws_messages_sent_total", "WebSocket messages sent, by outcome (ok, timeout or error).", ("status",)
+)
+WS_MESSAGES_SUPERSEDED = registry.counter(
+    "ws_messages_superseded_total",
+    "Snapshots replaced by a newer one before being sent, by where (burst or slow_client).",
+    ("stage",),
+)
+WS_QUEUE_UPDATE_BYTES = registry.counter(
+    "ws_queue_update_bytes_total", "Bytes of versioned updates written to sockets, by kind (delta or snapshot).", ("kind",)
+)
+WS_EVICTIONS = registry.counter(
+    "ws_evictions_total", "Sockets dropped by the server, by reason (timeout, error, overflow or idle).", ("reason",)
+)
+
+
+def department_topic(department_id) -> str:
+    return f"department:{department_id}"
+
+
+def emergencies_topic(department_id=None) -> str:
+    return f"{EMERGENCIES_TOPIC}:{department_id}" if department_id else EMERGENCIES_TOPIC
+
+
+def state_field(topic: str) -> Optional[str]:
+    """The message field holding a topic's versioned state: "queue", "stats", or None (plain events)."""
+    if topic == STATS_TOPIC:
+        return "stats"
+    if topic.split(":", 1)[0] == EMERGENCIES_TOPIC:
+        return None
+    return "queue"
+
+
+@dataclass
+class _Version:
+    seq: int
+    state: object  # queue list, or stats dict
+    delta: Optional[str] = None  # change from seq - 1 to seq, encoded
+    snapshot: Optional[str] = None  # encoded on first use
+
+    def snapshot_text(self, topic: str) -> str:
+        if self.snapshot is None:
+            name = state_field(topic)
+            self.snapshot = json.dumps({"event": f"{name}_snapshot", "topic": topic, "seq": self.seq, name: self.state})
+        return self.snapshot
+
+
+@dataclass
+class _Outbox:
+    topic: str
+    messages: deque = field(default_factory=deque)
+    state_stale: bool = False
+    seq: Optional[int] = None  # state version the client has
+    overflowed: bool = False
+    last_seen: float = field(default_factory=time.monotonic)  # last message from the client
+
+
+def _changes(name: str, old, new):
+    if name == "queue":
+        return "ops", diff_queue(old, new)
+    return "changes", {k: v for k, v in new.items() if old.get(k) != v}
 
 
 class WSManager:
-    def __init__(self):
-        # doctor_id -> set of websockets
+    def __init__(
+        self,
+        coalesce_seconds: float = WS_COALESCE_SECONDS,
+        send_timeout: float = WS_SEND_TIMEOUT,
+        outbox_size: int = WS_OUTBOX_SIZE,
+        ping_interval: float = WS_PING_INTERVAL,
+        idle_timeout: float = WS_IDLE_TIMEOUT,
+    ):
+        # topic -> set of websockets
         self.connections: Dict[str, Set[WebSocket]] = {}
         self.lock = asyncio.Lock()
+        self.coalesce_seconds = coalesce_seconds
+        self.send_timeout = send_timeout
+        self.outbox_size = outbox_size
+        self.ping_interval = ping_interval
+        self.idle_timeout = idle_timeout
+        self._heartbeat: Optional[asyncio.Task] = None
+        self._pending: Dict[str, dict] = {}
+        self._last_publish: Dict[str, float] = {}
+        self._flushers: Dict[str, asyncio.Task] = {}
+        self._versions: Dict[str, _Version] = {}
+        self._outboxes: Dict[WebSocket, _Outbox] = {}
+        self._senders: Dict[WebSocket, asyncio.Task] = {}
+        self.broker = LocalBroker(self._receive)
+        self.loader: Optional[Callable[[str], Awaitable[object]]] = None
+
+    async def start(self, broker=None, loader: Optional[Callable[[str], Awaitable[object]]] = None) -> None:
+        """Share updates through `broker`; `loader(topic)` reads a topic's state when a message lacks it."""
+        if broker is not None:
+            await broker.start(self._receive)
+            self.broker = broker
+        self.loader = loader
+        if self.ping_interval > 0 and self._heartbeat is None:
+            self._heartbeat = asyncio.create_task(self._keep_alive())
+
+    async def stop(self) -> None:
+        """Send what is pending, close every socket with 1001 and stop the broker."""
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            self._heartbeat = None
+        try:
+            await asyncio.wait_for(self.flush(), self.send_timeout)
+        except asyncio.TimeoutError:
+            pass
+        async with self.lock:
+            sockets = [ws for topic_sockets in self.connections.values() for ws in topic_sockets]
+            self.connections.clear()
+            self._versions.clear()
+        WS_CONNECTIONS.dec(len(sockets))
+        self._outboxes.clear()
+        await asyncio.gather(*(self._close(ws, WS_CLOSE_GOING_AWAY) for ws in sockets))
+        await self.broker.stop()
+        self.broker = LocalBroker(self._receive)
 
-    async def connect(self, doctor_id: str, websocket: WebSocket):
+    async def connect(self, topic: str, websocket: WebSocket, state=None):
+        """Accept and register `websocket`; `state` (fresh from the DB) is sent as its first snapshot."""
         await websocket.accept()
         async with self.lock:
-            if doctor_id not in self.connections:
-                self.connections[doctor_id] = set()
-            self.connections[doctor_id].add(websocket)
+            if topic not in self.connections:
+                self.connections[topic] = set()
+            if websocket not in self.connections[topic]:
+                self.connections[topic].add(websocket)
+                self._outboxes[websocket] = _Outbox(topic)
+                WS_CONNECTIONS.inc()
+            sockets = list(self.connections[topic])
+        self._deliver(websocket, json.dumps({"event": "connected", "topic": topic}))
+        name = state_field(topic)
+        if name is None:
+            return
+        if state is not None and self._advance(topic, {"event": f"{name}_changed", name: state}):
+            for ws in sockets:
+                self._deliver(ws)
+        else:
+            self._deliver(websocket)
 
-    async def disconnect(self, doctor_id: str, websocket: WebSocket):
+    async def disconnect(self, topic: str, websocket: WebSocket):
         async with self.lock:
-            if doctor_id in self.connections and websocket in self.connections[doctor_id]:
-                self.connections[doctor_id].remove(websocket)
-                if not self.connections[doctor_id]:
-                    del self.connections[doctor_id]
-
-    async def broadcast_to_doctor(self, doctor_id: str, message: dict):
-        # send JSON message to all websockets for a doctor
-        msg_text = json.dumps(message)
+            if topic in self.connections and websocket in self.connections[topic]:
+                self.connections[topic].remove(websocket)
+                WS_CONNECTIONS.dec()
+                if not self.connections[topic]:
+                    del self.connections[topic]
+                    self._versions.pop(topic, None)
+        self._outboxes.pop(websocket, None)
+
+    def touch(self, websocket: WebSocket) -> None:
+        """The client sent something (usually the pong), so it is alive."""
+        box = self._outboxes.get(websocket)
+        if box is not None:
+            box.last_seen = time.monotonic()
+
+    async def _keep_alive(self) -> None:
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            now = time.monotonic()
+            idle = []
+            for ws, box in list(self._outboxes.items()):
+                quiet = now - box.last_seen
+                if quiet >= self.idle_timeout:
+                    idle.append(self._evict(ws, box, "idle", WS_CLOSE_GOING_AWAY))
+                elif quiet >= self.ping_interval:
+                    self._deliver(ws, PING)
+            await asyncio.gather(*idle)
+
+    def resync(self, websocket: WebSocket) -> None:
+        """Send the socket a full snapshot next (the client saw a gap in `seq`)."""
+        box = self._outboxes.get(websocket)
+        if box is not None:
+            box.seq = None
+            self._deliver(websocket)
+
+    def publish(self, topic: str, message: dict) -> None:
+        """Queue `message` for the topic's sockets; within a burst only the latest one is sent."""
+        if topic in self._pending:
+            WS_MESSAGES_SUPERSEDED.inc(stage="burst")
+        self._pending[topic] = message
+        self._last_publish[topic] = time.monotonic()
+        if topic not in self._flushers:
+            self._flushers[topic] = asyncio.create_task(self._flush_after_quiet(topic))
+
+    async def emit(self, topic: str, message: dict) -> None:
+        """Send `message` to the topic's sockets in every worker now; events are never coalesced."""
+        await self.broker.publish(topic, message)
+
+    async def _flush_after_quiet(self, topic: str) -> None:
+        try:
+            # messages published while the last one was being handed out start a new window
+            while topic in self._pending:
+                remaining = self._last_publish[topic] + self.coalesce_seconds - time.monotonic()
+                if remaining > 0:
+                    await asyncio.sleep(remaining)
+                    continue
+                await self.broker.publish(topic, self._pending.pop(topic))
+        finally:
+            self._flushers.pop(topic, None)
+            self._last_publish.pop(topic, None)
+
+    async def flush(self) -> None:
+        """Wait until every published message has been handed to its sockets and written."""
+        while self._flushers or self._senders:
+            await asyncio.gather(*self._flushers.values(), *self._senders.values(), return_exceptions=True)
+
+    async def _receive(self, topic: str, message: dict) -> None:
+        """A published update, from this process or (through the broker) another one."""
+        name = state_field(topic)
+        department = message.get("department_id")
+        merged_into = department_topic(department) if department else None
+        if merged_into not in self.connections:
+            merged_into = None
+        if name is not None and name not in message:
+            if (topic not in self.connections and merged_into is None) or self.loader is None:
+                return
+            state = await self.loader(topic)
+            if state is None:
+                return
+            message = {**message, name: state}
+        await self.broadcast(topic, message)
+        if merged_into is not None and name == "queue":
+            await self._merge_into_department(merged_into, topic, message)
+
+    async def _merge_into_department(self, department: str, doctor_id: str, message: dict) -> None:
+        current = self._versions.get(department)
+        if current is not None:
+            entries = current.state
+        elif self.loader is None or (entries := await self.loader(department)) is None:
+            return
+        entries = [e for e in entries if e.get("doctor_id") != doctor_id]
+        entries += [{**e, "doctor_id": doctor_id} for e in message["queue"]]
+        entries.sort(key=lambda e: e.get("dynamic_score", 0), reverse=True)
+        await self.broadcast(department, {"event": message.get("event"), "doctor_id": doctor_id, "queue": entries})
+
+    async def broadcast(self, topic: str, message: dict):
+        """Send `message` to this process's sockets of the topic now, skipping the coalescing window.
+
+        On a versioned topic the message's state becomes the next version and is
+        sent as a delta; one that changes nothing is not sent.
+        """
         async with self.lock:
-            sockets = list(self.connections.get(doctor_id, []))
+            sockets = list(self.connections.get(topic, []))
+        if not sockets:
+            return
+        start = time.perf_counter()
+        if state_field(topic) in message:
+            if not self._advance(topic, message):
+                return
+            text = None
+        else:
+            text = json.dumps(message)
         for ws in sockets:
-            try:
-                await ws.send_text(msg_text)
-            except Exception:
-                # ignore broken sockets
-                pass
+            self._deliver(ws, text)
+        WS_BROADCAST_SECONDS.observe(time.perf_counter() - start)
+
+    def _advance(self, topic: str, message: dict) -> bool:
+        """Record the message's state as the topic's next version; False if it is unchanged."""
+        name = state_field(topic)
+        state = message[name]
+        current = self._versions.get(topic)
+        if current is None:
+            self._versions[topic] = _Version(seq=1, state=state)
+            return True
+        key, changes = _changes(name, current.state, state)
+        if not changes:
+            return False
+        event = {k: v for k, v in message.items() if k != name}
+        seq = current.seq + 1
+        self._versions[topic] = _Version(
+            seq=seq, state=state, delta=json.dumps({**event, "seq": seq, "base": current.seq, key: changes})
+        )
+        return True
+
+    def _deliver(self, ws: WebSocket, text: Optional[str] = None) -> None:
+        """Queue `text` for the socket, or (text=None) bring its state up to the latest version."""
+        box = self._outboxes.get(ws)
+        if box is None or box.overflowed:
+            return
+        if text is not None:
+            if len(box.messages) >= self.outbox_size:
+                # the sender evicts the socket as soon as its current write returns
+                box.overflowed = True
+                box.messages.clear()
+                return
+            box.messages.append(text)
+        elif box.state_stale:
+            WS_MESSAGES_SUPERSEDED.inc(stage="slow_client")
+        else:
+            box.state_stale = True
+        if ws not in self._senders:
+            self._senders[ws] = asyncio.create_task(self._drain(ws))
+
+    def _state_update(self, box: _Outbox) -> Optional[str]:
+        version = self._versions.get(box.topic)
+        if version is None or box.seq == version.seq:
+            return None
+        if box.seq == version.seq - 1 and version.delta is not None:
+            text, kind = version.delta, "delta"
+        else:
+            text, kind = version.snapshot_text(box.topic), "snapshot"
+        box.seq = version.seq
+        WS_QUEUE_UPDATE_BYTES.inc(len(text), kind=kind)
+        return text
+
+    async def _drain(self, ws: WebSocket) -> None:
+        try:
+            while (box := self._outboxes.get(ws)) is not None:
+                if box.overflowed:
+                    await self._evict(ws, box, "overflow")
+                    break
+                if box.messages:
+                    text = box.messages.popleft()
+                elif box.state_stale:
+                    box.state_stale = False
+                    text = self._state_update(box)
+                    if text is None:
+                        continue
+                else:
+                    break
+                start = time.perf_counter()
+                try:
+                    await asyncio.wait_for(ws.send_text(text), self.send_timeout)
+                except asyncio.TimeoutError:
+                    status = "timeout"
+                except Exception:
+                    status = "error"
+                else:
+                    WS_SEND_SECONDS.observe(time.perf_counter() - start)
+                    WS_MESSAGES_SENT.inc(status="ok")
+                    continue
+                WS_MESSAGES_SENT.inc(status=status)
+                await self._evict(ws, box, status)
+                break
+        finally:
+            self._senders.pop(ws, None)
+
+    async def _evict(self, ws: WebSocket, box: _Outbox, reason: str, code: int = WS_CLOSE_TRY_AGAIN) -> None:
+        WS_EVICTIONS.inc(reason=reason)
+        await self.disconnect(box.topic, ws)
+        await self._close(ws, code)
+
+    async def _close(self, ws: WebSocket, code: int) -> None:
+        try:
+            await asyncio.wait_for(ws.close(code=code), self.send_timeout)
+        except Exception:
+            pass
 
 
 manager = WSManager()
 
 async def notify_doctor_queue_update(doctor_id: str, payload: dict):
-    await manager.broadcast_to_doctor(doctor_id, payload)
+    # callers pass either the UUID or its string; sockets are registered by string
+    manager.publish(str(doctor_id), payload)
+
+
+def notify_stats_changed() -> None:
+    """The /stats figures changed; workers with stats subscribers recompute them once per burst."""
+    manager.publish(STATS_TOPIC, {"event": "stats_delta"})
+
+
+async def notify_emergency(alert: dict) -> None:
+    """Send an emergency alert to the firehose and to its department's alert topic."""
+    await manager.emit(EMERGENCIES_TOPIC, alert)
+    if alert.get("department_id"):
+        await manager.emit(emergencies_topic(alert["department_id"]), alert)
+
+
+_AFTER_COMMIT = "ws_after_commit"
+_after_commit_tasks: Set[asyncio.Task] = set()
+
+
+def after_commit(db, notify: Callable[[], object]) -> None:
+    """Call `notify` (sync, or returning an awaitable) once `db`'s transaction commits."""
+    db.info.setdefault(_AFTER_COMMIT, []).append(notify)
+
+
+def _log_failure(task: asyncio.Task) -> None:
+    _after_commit_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Post-commit notification failed", exc_info=task.exception())
+
+
+@event.listens_for(Session, "after_commit")
+def _notify_committed(session: Session) -> None:
+    for notify in session.info.pop(_AFTER_COMMIT, []):
+        try:
+            result = notify()
+        except Exception:
+            logger.exception("Post-commit notification failed")
+            continue
+        if inspect.isawaitable(result):
+            task = asyncio.ensure_future(result)
+            _after_commit_tasks.add(task)
+            task.add_done_callback(_log_failure)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_rolled_back(session: Session, previous_transaction) -> None:
+    if previous_transaction.parent is None:
+        session.info.pop(_AFTER_COMMIT, None)
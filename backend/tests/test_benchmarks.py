@@ -0,0 +1,41 @@
+import sys
+from pathlib import Path
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.common import summarize, best_of, compare_to_baseline, config_mismatch
+
+
+def test_summarize_percentiles():
+    summary = summarize([i / 1000 for i in range(1, 101)], wall_seconds=2.0)
+    assert summary["requests"] == 100
+    assert summary["throughput_rps"] == 50.0
+    assert summary["p50_ms"] == 50.0
+    assert summary["p95_ms"] == 95.0
+    assert summary["p99_ms"] == 99.0
+
+
+def test_best_of_keeps_best_round():
+    merged = best_of([
+        {"requests": 10, "throughput_rps": 80.0, "p50_ms": 5.0, "p95_ms": 9.0, "p99_ms": 12.0},
+        {"requests": 10, "throughput_rps": 100.0, "p50_ms": 6.0, "p95_ms": 8.0, "p99_ms": 30.0},
+    ])
+    assert merged == {"requests": 20, "throughput_rps": 100.0, "p50_ms": 5.0, "p95_ms": 8.0, "p99_ms": 12.0}
+
+
+def test_compare_flags_only_regressions_beyond_threshold():
+    baseline = {"results": {"GET /stats": {"throughput_rps": 100.0, "p50_ms": 10.0, "p95_ms": 20.0, "p99_ms": 30.0}}}
+    ok = {"GET /stats": {"throughput_rps": 90.0, "p50_ms": 12.0, "p95_ms": 24.0, "p99_ms": 40.0}}
+    assert compare_to_baseline(ok, baseline, threshold=0.25, tail_threshold=0.5) == []
+
+    slow = {"GET /stats": {"throughput_rps": 60.0, "p50_ms": 13.0, "p95_ms": 20.0, "p99_ms": 50.0}}
+    regressions = compare_to_baseline(slow, baseline, threshold=0.25, tail_threshold=0.5)
+    assert [r.split()[2] for r in regressions] == ["throughput_rps", "p50_ms", "p99_ms"]
+
+
+def test_baselines_recorded_with_other_settings_are_not_compared():
+    baseline = {"config": {"doctors": 20, "queued": 200}, "results": {}}
+    assert config_mismatch(baseline, {"doctors": 20, "queued": 200}) is None
+    message = config_mismatch(baseline, {"doctors": 20, "queued": 50})
+    assert "--update-baseline" in message and "'queued': 50" in message
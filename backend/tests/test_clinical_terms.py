@@ -0,0 +1,56 @@
+import sys
+from pathlib import Path
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services import clinical_terms
+from services.keyword_matcher import TermMatcher
+from services.knowledge_base import KnowledgeBase, write_snapshot
+
+
+def test_longest_match_is_resolved_per_category():
+    matcher = TermMatcher({
+        "symptom": {"chest pain": "chest pain"},
+        "kb_symptom": {"severe chest": "severe chest"},
+    })
+    found = matcher.scan("Severe chest pain radiating")
+    assert found == {"symptom": ["chest pain"], "kb_symptom": ["severe chest"]}
+    assert matcher.scan("severe chest pain", ["symptom"]) == {"symptom": ["chest pain"]}
+
+
+def test_inflections_and_plurals_map_to_canonical_terms():
+    found = clinical_terms.scan("Vomiting since morning, palpitations and coughing", ("symptom",))
+    assert found["symptom"] == ["vomiting", "palpitations", "cough"]
+
+
+def test_only_verbs_get_ing_and_ed_forms():
+    vocabulary = clinical_terms.with_inflections({"chest pain": "chest pain", "fever": "fever", "cough": "cough"})
+    assert vocabulary["chest pains"] == "chest pain" and vocabulary["fevers"] == "fever"
+    assert vocabulary["coughing"] == vocabulary["coughed"] == "cough"
+    assert not {"chest paining", "chest pained", "fevering", "fevered"} & vocabulary.keys()
+
+
+def test_matching_is_whole_word():
+    found = clinical_terms.scan("Cardiology referral; hepatitis B negative", ("chronic", "history"))
+    assert found == {"chronic": [], "history": ["hepatitis"]}
+
+
+def test_history_and_high_risk_categories():
+    found = clinical_terms.scan(
+        "Known COPD and diabetes. Presented with seizures and severe pain.",
+        ("history", "high_risk"),
+    )
+    assert found["history"] == ["copd", "diabetes"]
+    assert found["high_risk"] == ["seizure", "severe pain"]
+
+
+def test_knowledge_base_vocabulary(tmp_path):
+    path = tmp_path / "kb.bin"
+    write_snapshot(path, {
+        "symptoms": {"jaw pain": {"symptom_name": "Jaw Pain"}},
+        "chronic": {"sickle cell disease": {"chronic_condition": "Sickle Cell Disease"}},
+    })
+    matcher = clinical_terms.build_term_matcher(KnowledgeBase(path))
+    found = matcher.scan("Jaw pain; history of sickle cell disease", ("kb_symptom", "kb_chronic"))
+    assert found == {"kb_symptom": ["jaw pain"], "kb_chronic": ["sickle cell disease"]}
@@ -0,0 +1,88 @@
+import asyncio
+import sqlite3
+import sys
+import uuid
+from pathlib import Path
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import create_async_engine
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from models import Base, SymptomSeverity
+from services.dataset_loader import DATASETS, dataset_uuid, load_datasets, read_dataset, sync_datasets
+
+HEADER = "Symptom_ID,Symptom_Name,Base_Severity,Emergency_Trigger,Associated_Department,Possible_Linked_Conditions,Typical_Duration_Days\n"
+
+
+def _write_csv(data_dir: Path, rows: str) -> None:
+    (data_dir / DATASETS["symptom_severity"]["file"]).write_text(HEADER + rows, encoding="utf-8")
+
+
+def test_read_dataset_normalizes_columns(tmp_path):
+    _write_csv(tmp_path, "SYMP1,fever,4,True,General Medicine,x,3\nSYMP2,cough,,no,,x,\n")
+    spec = DATASETS["symptom_severity"]
+    records = read_dataset(tmp_path / spec["file"], SymptomSeverity, spec["columns"]).to_dict("records")
+
+    assert records[0]["symptom_id"] == dataset_uuid("SYMP1")
+    assert records[0]["emergency_trigger"] is True
+    assert records[1]["emergency_trigger"] is False
+    assert records[1]["base_severity"] is None
+    assert records[1]["associated_department"] is None
+    assert "possible_linked_conditions" not in records[0]
+
+
+async def _load_twice(db_path, data_dir):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    _write_csv(data_dir, "SYMP1,fever,4,True,General Medicine,x,3\nSYMP2,cough,2,False,Pulmonology,x,5\n")
+    first = await load_datasets(engine, data_dir, names=["symptom_severity"], chunk_size=1)
+    _write_csv(data_dir, "SYMP1,fever,9,True,Emergency,x,3\nSYMP2,cough,2,False,Pulmonology,x,5\n")
+    second = await load_datasets(engine, data_dir, names=["symptom_severity"])
+    await engine.dispose()
+    return first, second
+
+
+def test_load_is_idempotent_upsert(tmp_path):
+    first, second = asyncio.run(_load_twice(tmp_path / "kb.db", tmp_path))
+    assert first["symptom_severity"][0] == 2
+    assert second["symptom_severity"][0] == 2
+
+    conn = sqlite3.connect(tmp_path / "kb.db")
+    rows = conn.execute(
+        "SELECT symptom_name, base_severity, associated_department FROM symptom_severity ORDER BY symptom_name"
+    ).fetchall()
+    conn.close()
+    assert rows == [("cough", 2, "Pulmonology"), ("fever", 9, "Emergency")]
+
+
+async def _sync_sequence(db_path, data_dir):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        # a row seeded by the app (uuid4 key) must survive syncs
+        await conn.execute(insert(SymptomSeverity).values(symptom_id=uuid.uuid4(), symptom_name="Fever"))
+    names = ["symptom_severity"]
+    _write_csv(data_dir, "SYMP1,fever,4,True,General Medicine,x,3\nSYMP2,cough,2,False,Pulmonology,x,5\n")
+    runs = [await sync_datasets(engine, data_dir, names)]
+    runs.append(await sync_datasets(engine, data_dir, names))
+    _write_csv(data_dir, "SYMP1,fever,9,True,Emergency,x,3\nSYMP3,rash,1,no,Dermatology,x,7\n")
+    runs.append(await sync_datasets(engine, data_dir, names))
+    await engine.dispose()
+    return [r["symptom_severity"] for r in runs]
+
+
+def test_sync_skips_unchanged_and_applies_diff(tmp_path):
+    first, second, third = asyncio.run(_sync_sequence(tmp_path / "kb.db", tmp_path))
+    assert (first["status"], first["inserted"]) == ("synced", 2)
+    assert second["status"] == "unchanged"
+    assert (third["inserted"], third["updated"], third["deleted"]) == (1, 1, 1)
+
+    conn = sqlite3.connect(tmp_path / "kb.db")
+    names = [row[0] for row in conn.execute("SELECT symptom_name FROM symptom_severity ORDER BY symptom_name")]
+    synced_rows = conn.execute("SELECT row_count FROM dataset_sync WHERE dataset = 'symptom_severity'").fetchone()
+    conn.close()
+    assert names == ["Fever", "fever", "rash"]
+    assert synced_rows == (2,)
@@ -0,0 +1,65 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from db import build_engine, SQLITE_PROFILES
+
+
+async def _pragmas(url, profile):
+    engine = build_engine(url, profile)
+    async with engine.connect() as conn:
+        values = {
+            name: (await conn.execute(text(f"PRAGMA {name}"))).scalar()
+            for name in ("journal_mode", "synchronous", "busy_timeout", "cache_size", "temp_store")
+        }
+    await engine.dispose()
+    return values
+
+
+def test_production_profile_applies_pragmas(tmp_path):
+    values = asyncio.run(_pragmas(f"sqlite+aiosqlite:///{tmp_path / 'prod.db'}", "production"))
+    assert values["journal_mode"] == "wal"
+    assert values["synchronous"] == 1  # NORMAL
+    assert values["busy_timeout"] == SQLITE_PROFILES["production"]["busy_timeout"]
+    assert values["cache_size"] == SQLITE_PROFILES["production"]["cache_size"]
+    assert values["temp_store"] == 2  # MEMORY
+
+
+def test_legacy_profile_leaves_defaults(tmp_path):
+    values = asyncio.run(_pragmas(f"sqlite+aiosqlite:///{tmp_path / 'legacy.db'}", "legacy"))
+    assert values["journal_mode"] == "delete"
+    assert values["synchronous"] == 2  # FULL
+
+
+def test_unknown_profile_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        build_engine(f"sqlite+aiosqlite:///{tmp_path / 'x.db'}", "turbo")
+
+
+async def _write_through_reader(url):
+    writer = build_engine(url, "production")
+    reader = build_engine(url, "production", read_only=True)
+    async with writer.begin() as conn:
+        await conn.execute(text("CREATE TABLE t (x INTEGER)"))
+    try:
+        async with reader.begin() as conn:
+            assert (await conn.execute(text("SELECT count(*) FROM t"))).scalar() == 0
+            with pytest.raises(OperationalError):
+                await conn.execute(text("INSERT INTO t VALUES (1)"))
+        return writer.pool.size(), reader.pool.size()
+    finally:
+        await writer.dispose()
+        await reader.dispose()
+
+
+def test_reader_pool_is_query_only_and_writer_is_single(tmp_path):
+    writer_size, reader_size = asyncio.run(_write_through_reader(f"sqlite+aiosqlite:///{tmp_path / 'split.db'}"))
+    assert writer_size == 1
+    assert reader_size > 1
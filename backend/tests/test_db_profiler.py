@@ -0,0 +1,48 @@
+import sys
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.db_profiler import DBProfilerMiddleware, install_db_profiler, DB_STATEMENTS
+
+
+def _app(tmp_path, expose_headers=True):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'profile.db'}")
+    install_db_profiler(engine)
+    install_db_profiler(engine)  # idempotent
+    app = FastAPI()
+    app.add_middleware(DBProfilerMiddleware, expose_headers=expose_headers)
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: int):
+        async with engine.connect() as conn:
+            for _ in range(3):
+                await conn.execute(text("SELECT :v"), {"v": item_id})
+        return {"item_id": item_id}
+
+    return app
+
+
+def test_headers_report_statement_count(tmp_path):
+    with TestClient(_app(tmp_path)) as client:
+        before = DB_STATEMENTS.count(method="GET", route="/items/{item_id}")
+        resp = client.get("/items/7")
+    assert resp.status_code == 200
+    assert resp.headers["X-DB-Statements"] == "3"
+    assert float(resp.headers["X-DB-Time-Ms"]) >= 0
+    assert resp.headers["X-DB-Slowest"].count("SELECT ?") == 3
+    # Aggregated under the route template, not the concrete path
+    assert DB_STATEMENTS.count(method="GET", route="/items/{item_id}") == before + 1
+
+
+def test_headers_hidden_outside_debug(tmp_path):
+    with TestClient(_app(tmp_path, expose_headers=False)) as client:
+        resp = client.get("/items/1")
+    assert "X-DB-Statements" not in resp.headers
+
@@ -0,0 +1,81 @@
+import asyncio
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.ext.asyncio import create_async_engine
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from models import (
+    Base, Patient, Visit, AIAssessment, DoctorAssignment, PatientPreference, Queue,
+    MedicalRecord, Prescription, Department, SymptomSeverity, ChronicCondition, PriorityRule,
+)
+
+ID = uuid.uuid4()
+
+# Hot-path lookups and the index each one must use
+HOT_QUERIES = [
+    (select(Queue).where(Queue.doctor_id == ID).order_by(Queue.queue_position), "ix_queue_doctor_id_queue_position"),
+    (select(func.max(Queue.queue_position)).where(Queue.doctor_id == ID), "ix_queue_doctor_id_queue_position"),
+    (select(Queue).where(Queue.visit_id == ID), "ix_queue_visit_id"),
+    (select(Visit).where(Visit.patient_id == ID), "ix_visits_patient_id"),
+    (select(Visit).order_by(Visit.arrival_time.desc()).limit(10), "ix_visits_arrival_time"),
+    (
+        select(func.count()).where(DoctorAssignment.doctor_id == ID, DoctorAssignment.is_active == True),
+        "ix_doctor_assignments_doctor_id_is_active",
+    ),
+    (select(DoctorAssignment).where(DoctorAssignment.visit_id == ID), "ix_doctor_assignments_visit_id"),
+    (select(AIAssessment).where(AIAssessment.visit_id == ID), "ix_ai_assessments_visit_id"),
+    (select(MedicalRecord).where(MedicalRecord.visit_id == ID), "ix_medical_records_visit_id"),
+    (select(Prescription).where(Prescription.record_id == ID), "ix_prescriptions_record_id"),
+    (select(Patient).where(Patient.user_id == ID), "ix_patients_user_id"),
+    (select(Patient).where(Patient.phone_number == "5550000000"), "ix_patients_phone_number"),
+    (
+        select(PatientPreference).where(PatientPreference.patient_id == ID, PatientPreference.preferred_doctor == ID),
+        "ix_patient_preferences_patient_id_preferred_doctor",
+    ),
+    (select(Department.department_id).where(func.lower(Department.name) == "cardiology"), "ix_departments_name_lower"),
+    (
+        select(SymptomSeverity.base_severity).where(func.lower(SymptomSeverity.symptom_name).in_(["fever", "cough"])),
+        "ix_symptom_severity_symptom_name_lower",
+    ),
+    (
+        select(ChronicCondition.risk_modifier_score)
+        .where(func.lower(ChronicCondition.chronic_condition).in_(["asthma"])),
+        "ix_chronic_conditions_chronic_condition_lower",
+    ),
+    (
+        select(PriorityRule.base_priority).where(func.lower(PriorityRule.condition_name).in_(["chest pain"])),
+        "ix_priority_rules_condition_name_lower",
+    ),
+]
+
+
+async def _plans(db_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    plans = []
+    async with engine.connect() as conn:
+        for stmt, _ in HOT_QUERIES:
+            compiled = stmt.compile(dialect=sqlite.dialect(), compile_kwargs={"literal_binds": True})
+            rows = (await conn.execute(text(f"EXPLAIN QUERY PLAN {compiled}"))).all()
+            plans.append(" | ".join(row[-1] for row in rows))
+    await engine.dispose()
+    return plans
+
+
+@pytest.fixture(scope="module")
+def plans(tmp_path_factory):
+    return asyncio.run(_plans(tmp_path_factory.mktemp("indexes") / "plans.db"))
+
+
+@pytest.mark.parametrize("position", range(len(HOT_QUERIES)), ids=[ix for _, ix in HOT_QUERIES])
+def test_hot_query_uses_index(plans, position):
+    _, index_name = HOT_QUERIES[position]
+    assert index_name in plans[position], plans[position]
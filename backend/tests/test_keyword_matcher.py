@@ -0,0 +1,31 @@
+import sys
+from pathlib import Path
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.keyword_matcher import KeywordMatcher
+
+
+def test_whole_words_only():
+    matcher = KeywordMatcher(["cough", "pain"])
+    assert matcher.findall("Coughing and painful joints") == []
+    assert matcher.findall("dry cough, pain.") == ["cough", "pain"]
+
+
+def test_longest_match_wins_overlaps():
+    matcher = KeywordMatcher(["chest pain", "severe chest pain", "pain", "chest"])
+    assert matcher.finditer("Severe chest pain since noon") == [(0, 17, "severe chest pain")]
+    assert matcher.findall("chest pain then chest") == ["chest pain", "chest"]
+
+
+def test_overlapping_keywords_share_suffixes():
+    # "he" is reached through a failure link from "she"
+    matcher = KeywordMatcher(["he", "she", "hers", "his"])
+    assert matcher.findall("she said his and hers, he said") == ["she", "his", "hers", "he"]
+
+
+def test_vocabulary_is_normalized_and_deduplicated():
+    matcher = KeywordMatcher([" Fever ", "fever", ""])
+    assert len(matcher) == 1
+    assert matcher.findall("FEVER, fever again") == ["fever"]
@@ -0,0 +1,54 @@
+import sys
+from pathlib import Path
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.knowledge_base import KnowledgeBase, make_key, write_snapshot
+
+TABLES = {
+    "symptoms": {
+        "chest pain": {"symptom_name": "Chest Pain", "associated_department": "Cardiology",
+                       "base_severity": 8, "emergency_trigger": True, "typical_duration_days": None},
+        "cough": {"symptom_name": "Cough", "associated_department": None,
+                  "base_severity": 2, "emergency_trigger": False, "typical_duration_days": 7},
+    },
+    "vitals": {
+        make_key("Heart_Rate", "Adult", "Normal"): {
+            "vital_type": "Heart_Rate", "age_group": "Adult", "condition_modifier": "Normal",
+            "critical_low_threshold": 45.0, "critical_high_threshold": 135.0,
+            "moderate_low_threshold": None, "moderate_high_threshold": 115.5,
+            "critical_instability_score": 4, "moderate_instability_score": 2,
+        },
+    },
+}
+
+
+def test_snapshot_round_trip(tmp_path):
+    path = tmp_path / "kb.bin"
+    counts = write_snapshot(path, TABLES)
+    kb = KnowledgeBase(path)
+
+    assert counts == {"symptoms": 2, "conditions": 0, "vitals": 1, "chronic": 0}
+    assert list(kb.keys("symptoms")) == ["chest pain", "cough"]
+    assert kb.get("symptoms", " Chest PAIN ") == TABLES["symptoms"]["chest pain"]
+    assert kb.value("symptoms", "associated_department", "cough") is None
+    assert kb.get("symptoms", "rash") is None
+    assert kb.get("conditions", "anything") is None
+    vitals = kb.get("vitals", "heart_rate", "adult", "normal")
+    assert vitals["moderate_low_threshold"] is None
+    assert vitals["moderate_high_threshold"] == 115.5
+
+
+def test_rewrite_does_not_disturb_open_snapshot(tmp_path):
+    path = tmp_path / "kb.bin"
+    write_snapshot(path, TABLES)
+    old = KnowledgeBase(path)
+
+    updated = {"symptoms": {"cough": {**TABLES["symptoms"]["cough"], "associated_department": "Pulmonology"}}}
+    write_snapshot(path, updated)
+
+    assert old.value("symptoms", "associated_department", "chest pain") == "Cardiology"
+    new = KnowledgeBase(path)
+    assert new.value("symptoms", "associated_department", "cough") == "Pulmonology"
+    assert new.get("symptoms", "chest pain") is None
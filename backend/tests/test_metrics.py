@@ -0,0 +1,57 @@
+import asyncio
+import sys
+from pathlib import Path
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.metrics import MetricsRegistry
+
+
+def test_histogram_exposition():
+    reg = MetricsRegistry()
+    hist = reg.histogram("req_db_statements", "Statements.", ("route",), buckets=(1, 5))
+    for value in (1, 3, 9):
+        hist.observe(value, route="/a")
+    reg.counter("hits_total", "Hits.").inc()
+    body = reg.render()
+    assert '# TYPE req_db_statements histogram' in body
+    assert 'req_db_statements_bucket{route="/a",le="1"} 1' in body
+    assert 'req_db_statements_bucket{route="/a",le="5"} 2' in body
+    assert 'req_db_statements_bucket{route="/a",le="+Inf"} 3' in body
+    assert 'req_db_statements_sum{route="/a"} 13' in body
+    assert 'hits_total 1' in body
+
+
+def test_gauge_and_timed_decorator():
+    reg = MetricsRegistry()
+    gauge = reg.gauge("open_sockets", "Sockets.")
+    gauge.inc()
+    gauge.inc()
+    gauge.dec()
+    assert gauge.value() == 1
+    assert reg.gauge("open_sockets", "Sockets.") is gauge
+
+    hist = reg.histogram("op_seconds", "Op latency.", ("operation",))
+
+    @hist.timed(operation="sync")
+    def work():
+        return 1
+
+    @hist.timed(operation="async")
+    async def async_work():
+        return 2
+
+    assert work() == 1
+    assert asyncio.run(async_work()) == 2
+    assert hist.count(operation="sync") == 1
+    assert hist.count(operation="async") == 1
+
+
+def test_run_triage_records_stages():
+    from services.triage_service import run_triage, TRIAGE_STAGE_SECONDS
+
+    before = {stage: TRIAGE_STAGE_SECONDS.count(stage=stage) for stage in ("features", "stage1", "shap")}
+    run_triage({"age": 40, "symptoms": ["cough"], "chronic_conditions": []})
+    for stage, count in before.items():
+        assert TRIAGE_STAGE_SECONDS.count(stage=stage) == count + 1
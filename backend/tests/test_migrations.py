@@ -0,0 +1,107 @@
+import asyncio
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from migrations import LATEST_VERSION, current_version, migrate
+
+
+async def _migrate_twice(db_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+    first = await migrate(engine)
+
+    statements = []
+    record = lambda *args: statements.append(args[2])
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    second = await migrate(engine)
+    event.remove(engine.sync_engine, "before_cursor_execute", record)
+    version = await current_version(engine)
+    await engine.dispose()
+    return first, second, statements, version
+
+
+def test_fresh_database_migrates_then_checks_once(tmp_path):
+    first, second, statements, version = asyncio.run(_migrate_twice(tmp_path / "fresh.db"))
+    assert [v for v, _, _ in first] == list(range(1, LATEST_VERSION + 1))
+    assert second == []
+    assert len(statements) == 1  # the version check
+    assert version == LATEST_VERSION
+
+
+def test_pre_versioning_database_is_upgraded(tmp_path):
+    db_path = tmp_path / "legacy.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "CREATE TABLE doctors (doctor_id CHAR(32) PRIMARY KEY, user_id CHAR(32), department_id CHAR(32), "
+        "specialization VARCHAR, experience_years INTEGER, consultation_fee NUMERIC, is_available BOOLEAN, "
+        "max_daily_patients INTEGER, created_at TIMESTAMP)"
+    )
+    conn.close()
+
+    first, _, _, version = asyncio.run(_migrate_twice(db_path))
+    assert version == LATEST_VERSION
+
+    conn = sqlite3.connect(db_path)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(doctors)")}
+    indexes = {row[1] for row in conn.execute("PRAGMA index_list(doctors)")}
+    recorded = conn.execute("SELECT count(*) FROM schema_version WHERE duration_ms IS NOT NULL").fetchone()[0]
+    conn.close()
+    assert {"shift_start", "shift_end"} <= columns
+    assert "ix_doctors_department_id" in indexes
+    assert recorded == LATEST_VERSION
+
+
+def test_index_on_a_missing_column_fails_the_migration(tmp_path):
+    db_path = tmp_path / "legacy.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE visits (visit_id CHAR(32) PRIMARY KEY, patient_id CHAR(32))")
+    conn.close()
+
+    with pytest.raises(RuntimeError, match="ix_visits_arrival_time"):
+        asyncio.run(_migrate_twice(db_path))
+    # SQLite migrates in one transaction, so nothing is recorded as applied
+    conn = sqlite3.connect(db_path)
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    conn.close()
+    assert "schema_version" not in tables
+
+
+def test_concurrent_workers_apply_each_migration_once(tmp_path):
+    async def run():
+        engines = [create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'shared.db'}") for _ in range(4)]
+        results = await asyncio.gather(*(migrate(engine) for engine in engines))
+        for engine in engines:
+            await engine.dispose()
+        return results
+
+    results = asyncio.run(run())
+    applied = sorted(v for result in results for v, _, _ in result)
+    assert applied == list(range(1, LATEST_VERSION + 1))
+    conn = sqlite3.connect(tmp_path / "shared.db")
+    versions = [row[0] for row in conn.execute("SELECT version FROM schema_version ORDER BY version")]
+    conn.close()
+    assert versions == list(range(1, LATEST_VERSION + 1))
+
+
+def test_migrated_schema_matches_the_models(tmp_path):
+    from models import Base
+
+    db_path = tmp_path / "fresh.db"
+    asyncio.run(_migrate_twice(db_path))
+    conn = sqlite3.connect(db_path)
+    for table in Base.metadata.sorted_tables:
+        rows = list(conn.execute(f"PRAGMA table_info({table.name})"))
+        assert {row[1] for row in rows} == set(table.c.keys()), table.name
+        not_null = {row[1] for row in rows if row[3] and not row[5]}  # primary keys aside
+        assert not_null == {c.name for c in table.columns if not c.nullable and not c.primary_key}, table.name
+        indexes = {row[1] for row in conn.execute(f"PRAGMA index_list({table.name})") if row[3] == "c"}
+        assert {ix.name for ix in table.indexes} <= indexes, table.name
+    conn.close()
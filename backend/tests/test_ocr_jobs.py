@@ -0,0 +1,183 @@
+import asyncio
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from migrations import migrate
+from services.ocr_cache import OCRResultCache
+from services.ocr_jobs import OCRJobQueue, OCRJobNotFound, OCRQueueFull
+
+
+def _threads(workers):
+    return ThreadPoolExecutor(max_workers=workers)
+
+
+def _one_page(source):
+    return 1
+
+
+def _fake_ocr(file_path, page):
+    if file_path.endswith(".bad"):
+        raise ValueError("cannot identify image file")
+    return "Known diabetic, presenting with chest pain"
+
+
+def test_jobs_run_off_the_event_loop_and_detect_conditions():
+    async def scenario():
+        queue = OCRJobQueue(workers=2, executor_factory=_threads, pages=_one_page, ocr=_fake_ocr)
+        await queue.start()
+        try:
+            ok = queue.submit("/uploads/scan.png")
+            bad = queue.submit("/uploads/scan.bad")
+            assert ok.status == "queued"
+            await queue.wait(ok, timeout=5)
+            await queue.wait(bad, timeout=5)
+            return ok, bad, await queue.get(ok.id)
+        finally:
+            await queue.stop()
+
+    ok, bad, looked_up = asyncio.run(scenario())
+    assert ok.status == "done" and looked_up is ok
+    assert ok.detected["chronic_conditions"] == ["diabetes"]
+    assert ok.detected["symptoms"] == ["chest pain"]
+    assert bad.status == "failed" and "cannot identify" in bad.error
+    assert bad.to_dict()["detected_conditions"] == {"chronic_conditions": [], "symptoms": []}
+
+
+def test_queue_is_bounded():
+    release = threading.Event()
+
+    def blocking_ocr(file_path, page):
+        release.wait(5)
+        return ""
+
+    async def scenario():
+        queue = OCRJobQueue(workers=1, max_queued=1, executor_factory=_threads, pages=_one_page, ocr=blocking_ocr)
+        await queue.start()
+        try:
+            first = queue.submit("a.png")
+            await asyncio.sleep(0.05)  # the single worker picks it up
+            queue.submit("b.png")
+            with pytest.raises(OCRQueueFull):
+                queue.submit("c.png")
+            release.set()
+            await queue.wait(first, timeout=5)
+        finally:
+            release.set()
+            await queue.stop()
+
+    asyncio.run(scenario())
+
+
+def test_visit_results_reuse_finished_jobs():
+    calls = []
+
+    def counting_ocr(file_path, page):
+        calls.append(file_path)
+        return "fever and cough"
+
+    async def scenario():
+        queue = OCRJobQueue(workers=1, executor_factory=_threads, pages=_one_page, ocr=counting_ocr)
+        await queue.start()
+        try:
+            uploaded = queue.submit("upload.png")
+            await queue.wait(uploaded, timeout=5)
+            jobs = await queue.results([uploaded.id], ["inline.png"], timeout=5)
+            with pytest.raises(OCRJobNotFound):
+                await queue.results(["no-such-job"])
+            return jobs
+        finally:
+            await queue.stop()
+
+    jobs = asyncio.run(scenario())
+    assert calls == ["upload.png", "inline.png"]
+    assert [job.detected["symptoms"] for job in jobs] == [["fever", "cough"], ["fever", "cough"]]
+
+
+async def _cached_scenario(tmp_path, ocr):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'docs.db'}")
+    await migrate(engine)
+    first_scan, same_scan = tmp_path / "first.png", tmp_path / "copy.png"
+    first_scan.write_bytes(b"same bytes")
+    same_scan.write_bytes(b"same bytes")
+
+    queue = OCRJobQueue(workers=1, executor_factory=_threads, pages=_one_page, ocr=ocr, cache=OCRResultCache(engine))
+    await queue.start()
+    try:
+        first = await queue.run(str(first_scan), timeout=5)
+        again = await queue.run(str(same_scan), timeout=5)
+    finally:
+        await queue.stop()
+
+    # A fresh queue (another worker process, or after eviction) finds the job in documents
+    reader = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'docs.db'}")
+    other = OCRJobQueue(
+        workers=1, executor_factory=_threads, pages=_one_page, ocr=ocr,
+        cache=OCRResultCache(engine, read_engine=reader),
+    )
+    reloaded = await other.get(first.id)
+    await reader.dispose()
+    async with engine.connect() as conn:
+        stored = (await conn.execute(text("SELECT content_hash, processed FROM documents"))).all()
+    await engine.dispose()
+    return first, again, reloaded, stored
+
+
+def test_repeated_content_is_served_from_the_document_cache(tmp_path):
+    calls = []
+
+    def counting_ocr(file_path, page):
+        calls.append(file_path)
+        return "History of asthma"
+
+    first, again, reloaded, stored = asyncio.run(_cached_scenario(tmp_path, counting_ocr))
+    assert len(calls) == 1
+    assert not first.cached and again.cached
+    assert again.detected == first.detected
+    assert first.detected["chronic_conditions"] == ["asthma"]
+    assert first.content_hash == again.content_hash and len(first.content_hash) == 64
+    assert reloaded.status == "done" and reloaded.text == "History of asthma"
+    assert reloaded.detected == first.detected
+    assert len(stored) == 2 and all(row.processed for row in stored)
+
+
+def test_pages_are_streamed_and_reading_stops_once_categories_are_found():
+    page_texts = ["Referral letter", "Known asthma", "Reports fever", "Unrelated", "Unrelated"]
+    calls = []
+
+    def page_ocr(file_path, page):
+        calls.append(page)
+        return page_texts[page]
+
+    async def scenario():
+        queue = OCRJobQueue(
+            workers=1, executor_factory=_threads, ocr=page_ocr, pages=lambda source: len(page_texts),
+            pages_in_flight=1, early_stop=("chronic_conditions", "symptoms"),
+        )
+        await queue.start()
+        try:
+            job = queue.submit("referral.pdf")
+            events = job.subscribe()
+            await queue.wait(job, timeout=5)
+            received = []
+            while not events.empty():
+                received.append(events.get_nowait())
+            return job, received
+        finally:
+            await queue.stop()
+
+    job, received = asyncio.run(scenario())
+    assert calls == [0, 1, 2]
+    assert job.page_count == 5 and job.stopped_early
+    assert [p["page"] for p in job.pages] == [1, 2, 3]
+    assert job.detected["chronic_conditions"] == ["asthma"] and job.detected["symptoms"] == ["fever"]
+    assert [e["event"] for e in received] == ["ocr_page"] * 3 + ["ocr_finished"]
+    assert job.text == "Referral letter\nKnown asthma\nReports fever"
@@ -0,0 +1,55 @@
+import sys
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.ocr_service import PDF_AVAILABLE, ocr_page, page_count
+
+
+def text_pdf(lines: list[str]) -> bytes:
+    """Minimal PDF with one line of Helvetica text (a text layer) per page."""
+    count = len(lines)
+    font = 3 + 2 * count
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{' '.join(f'{3 + 2 * i} 0 R' for i in range(count))}] /Count {count} >>",
+    ]
+    for i, line in enumerate(lines):
+        content = f"BT /F1 12 Tf 72 720 Td ({line}) Tj ET"
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 {font} 0 R >> >> /Contents {4 + 2 * i} 0 R >>"
+        )
+        objects.append(f"<< /Length {len(content)} >>\nstream\n{content}\nendstream")
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    out, offsets = b"%PDF-1.4\n", []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode()
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return out
+
+
+def test_multi_frame_tiff_pages_are_counted(tmp_path):
+    frames = [Image.new("L", (100, 100), 255) for _ in range(3)]
+    path = tmp_path / "scan.tiff"
+    frames[0].save(path, "TIFF", save_all=True, append_images=frames[1:])
+    assert page_count(str(path)) == 3
+
+
+@pytest.mark.skipif(not PDF_AVAILABLE, reason="pypdfium2 not installed")
+def test_pdf_text_layer_is_read_without_ocr(tmp_path):
+    data = text_pdf(["Referral: known diabetic with asthma", "Second page reports chest pain"])
+    path = tmp_path / "referral.pdf"
+    path.write_bytes(data)
+    assert page_count(str(path)) == 2
+    assert ocr_page(str(path), 1) == "Second page reports chest pain"
+    assert ocr_page(str(path), 0).startswith("Referral")
@@ -0,0 +1,41 @@
+import io
+import sys
+from pathlib import Path
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.ocr_service import preprocess_image
+
+
+def _photo(orientation: int = 1) -> Image.Image:
+    """Dark table, unevenly lit page, one block of 'text' bars."""
+    page = Image.new("L", (1200, 1600), 70)
+    draw = ImageDraw.Draw(page)
+    draw.rectangle((100, 150, 1100, 1450), fill=230)
+    for i in range(8):
+        draw.rectangle((300, 500 + i * 40, 800, 515 + i * 40), fill=20)
+    pixels = np.asarray(page, dtype=np.float32) * np.linspace(0.6, 1.0, page.width)[None, :]
+    page = Image.fromarray(pixels.astype(np.uint8))
+    exif = Image.Exif()
+    exif[0x0112] = orientation
+    buf = io.BytesIO()
+    page.save(buf, "JPEG", quality=95, exif=exif)
+    return Image.open(io.BytesIO(buf.getvalue()))
+
+
+def test_binarizes_and_crops_to_the_text():
+    out = preprocess_image(_photo(), max_side=2000)
+    pixels = np.asarray(out)
+    assert out.mode == "L" and set(np.unique(pixels)) == {0, 255}
+    # 500 x 295 px of bars plus the 20 px margin on each side
+    assert abs(out.width - 540) <= 4 and abs(out.height - 335) <= 4
+
+
+def test_downscales_and_applies_exif_orientation():
+    out = preprocess_image(_photo(orientation=6), max_side=800, binarize=False)
+    assert out.mode == "L"
+    assert out.size == (800, 600)  # displayed landscape, long side capped at 800 px
@@ -1,15 +1,47 @@
-import pytest
+import asyncio
 import sys
+import uuid
 from pathlib import Path
 
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
 # Add backend to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from models import Base, Patient, Visit
 from services.queue_service import compute_priority_score
 
 
-def test_priority_scores():
-    assert compute_priority_score('High', 90, True) == 100
-    assert compute_priority_score('High', 80, False) >= 80
-    assert compute_priority_score('Medium', 50, False) >= 50
-    assert compute_priority_score('Low', 10, False) >= 20
+async def _scores(db_path, cases):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with session_factory() as db, db.begin():
+        patient = Patient(
+            patient_id=uuid.uuid4(), age=75, gender="Male", symptoms="chest pain",
+            blood_pressure="150/0", heart_rate=100, temperature=37.5,
+            pre_existing_conditions="hypertension",
+        )
+        visit = Visit(visit_id=uuid.uuid4(), patient_id=patient.patient_id)
+        db.add_all([patient, visit])
+
+    async with session_factory() as db:
+        results = [
+            await compute_priority_score(db, str(visit.visit_id), {"risk_score": risk_score}, emergency)
+            for risk_score, emergency in cases
+        ]
+        unknown = await compute_priority_score(db, "not-a-uuid", {"risk_score": 5}, True)
+    await engine.dispose()
+    return results, unknown
+
+
+def test_priority_scores(tmp_path):
+    (high_emergency, high, medium, low), unknown = asyncio.run(
+        _scores(tmp_path / "priority.db", [(9, True), (8, False), (5, False), (1, False)])
+    )
+    assert high_emergency == 100
+    assert high >= medium >= low
+    assert low >= 20
+    assert unknown == 50
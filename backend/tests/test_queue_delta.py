@@ -0,0 +1,54 @@
+import random
+import sys
+from pathlib import Path
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.queue_delta import apply_ops, diff_queue
+
+
+def _entry(n, **fields):
+    return {"queue_id": f"q{n}", "patient_name": f"Patient {n}", "dynamic_score": 50, "position": 0, **fields}
+
+
+def _positioned(entries):
+    return [{**e, "position": i} for i, e in enumerate(entries, 1)]
+
+
+def test_moving_one_patient_is_one_op():
+    old = _positioned([_entry(n) for n in range(50)])
+    new = _positioned(old[:10] + old[11:] + [old[10]])
+    assert diff_queue(old, new) == [{"op": "move", "queue_id": "q10", "index": 49}]
+    assert apply_ops(old, diff_queue(old, new)) == new
+
+
+def test_ops_carry_only_what_changed():
+    old = _positioned([_entry(1), _entry(2), _entry(3)])
+    new = _positioned([_entry(4), _entry(1), {**_entry(3), "visit_status": "in_progress"}])
+    ops = diff_queue(old, new)
+    assert ops == [
+        {"op": "remove", "queue_id": "q2"},
+        {"op": "insert", "index": 0, "entry": {"queue_id": "q4", "patient_name": "Patient 4", "dynamic_score": 50}},
+        {"op": "patch", "queue_id": "q3", "fields": {"visit_status": "in_progress"}},
+    ]
+    assert apply_ops(old, ops) == new
+    assert diff_queue(new, new) == []
+
+
+def test_random_changes_round_trip():
+    rng = random.Random(7)
+    old = _positioned([_entry(n, dynamic_score=rng.randint(0, 100)) for n in range(30)])
+    next_id = 30
+    for _ in range(200):
+        new = [dict(e) for e in old if rng.random() > 0.1]
+        for _ in range(rng.randint(0, 3)):
+            new.append(_entry(next_id))
+            next_id += 1
+        for e in new:
+            if rng.random() < 0.2:
+                e["dynamic_score"] = rng.randint(0, 100)
+        new.sort(key=lambda e: e["dynamic_score"], reverse=True)
+        new = _positioned(new)
+        assert apply_ops(old, diff_queue(old, new)) == new
+        old = new
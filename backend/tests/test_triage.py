@@ -5,7 +5,8 @@ from pathlib import Path
 # Add backend to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from services.triage_service import run_triage
+from services import triage_service
+from services.triage_service import run_triage, run_triage_text, extract_symptoms_from_text
 
 
 def test_triage_high():
@@ -21,3 +22,26 @@ def test_triage_high():
     assert 'risk_level' in res
     assert 'risk_score' in res
     assert res['risk_level'] in ('High','Medium','Low')
+
+
+class _StubKB:
+    """Knowledge base whose only symptom is a fragment overlapping "chest pain"."""
+
+    def keys(self, table):
+        return ["severe chest"] if table == "symptoms" else []
+
+    def value(self, table, column, key):
+        return "General Medicine" if key == "severe chest" else None
+
+
+def test_kb_fragment_does_not_hide_canonical_symptom(monkeypatch):
+    monkeypatch.setattr(triage_service, "KB", _StubKB())
+    monkeypatch.setattr(triage_service, "SYMPTOM_MATCHER", triage_service._build_symptom_matcher())
+    text = "I have severe chest pain since morning and I am sweating"
+    assert extract_symptoms_from_text(text) == ["chest pain", "severe chest"]
+    assert run_triage_text(text)["department_name"] == "Cardiology"
+
+
+def test_inflected_symptoms_map_to_canonical_names():
+    found = extract_symptoms_from_text("Coughing for a week, headaches at night, vomited twice")
+    assert found[:3] == ["cough", "headache", "vomiting"]
@@ -0,0 +1,71 @@
+import asyncio
+import hashlib
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.upload_store import InvalidUpload, UploadTooLarge, store_upload
+
+BOUNDARY = "----triage-test"
+CONTENT_TYPE = f"multipart/form-data; boundary={BOUNDARY}"
+
+
+def _body(data: bytes, filename: str, field: str = "file") -> bytes:
+    return (
+        f"--{BOUNDARY}\r\n"
+        f'Content-Disposition: form-data; name="note"\r\n\r\nscan\r\n'
+        f"--{BOUNDARY}\r\n"
+        f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+        f"Content-Type: application/octet-stream\r\n\r\n"
+    ).encode() + data + f"\r\n--{BOUNDARY}--\r\n".encode()
+
+
+class _Stream:
+    """An ASGI-style body stream in 64 KiB chunks that counts what was read."""
+
+    def __init__(self, body: bytes, chunk: int = 64 * 1024):
+        self.body, self.chunk, self.read = body, chunk, 0
+
+    async def __aiter__(self):
+        while self.read < len(self.body):
+            piece = self.body[self.read:self.read + self.chunk]
+            self.read += len(piece)
+            yield piece
+
+
+def _store(stream, tmp_path, **kwargs):
+    return asyncio.run(store_upload(stream.__aiter__(), CONTENT_TYPE, str(tmp_path), **kwargs))
+
+
+def test_upload_is_stored_under_its_content_hash(tmp_path):
+    data = os.urandom(3 * 1024 * 1024 + 17)  # many chunks
+    first = _store(_Stream(_body(data, "../../etc/Scan.PNG")), tmp_path)
+    again = _store(_Stream(_body(data, "other.png")), tmp_path)
+
+    digest = hashlib.sha256(data).hexdigest()
+    assert first.content_hash == digest and first.size == len(data)
+    assert first.path == str(tmp_path / f"{digest}.png") == again.path
+    assert first.filename == "Scan.PNG"
+    assert Path(first.path).read_bytes() == data
+    assert sorted(p.name for p in tmp_path.iterdir()) == [f"{digest}.png"]
+
+
+def test_oversized_upload_stops_reading_and_is_removed(tmp_path):
+    stream = _Stream(_body(b"x" * (2 * 1024 * 1024), "big.jpg"))
+    with pytest.raises(UploadTooLarge):
+        _store(stream, tmp_path, max_bytes=100 * 1024)
+    assert stream.read < 300 * 1024  # rejected while streaming, not after the whole body
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_body_without_the_file_field_is_rejected(tmp_path):
+    with pytest.raises(InvalidUpload):
+        _store(_Stream(_body(b"data", "a.png", field="other")), tmp_path)
+    with pytest.raises(InvalidUpload):
+        asyncio.run(store_upload(_Stream(b"{}").__aiter__(), "application/json", str(tmp_path)))
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,178 @@
+import asyncio
+import sys
+import uuid
+from pathlib import Path
+
+from sqlalchemy import event, select, func
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from models import Base, User, Department, Doctor, Patient, Visit, Queue, AuditLog
+from services.queue_service import QUEUE_OPERATION_SECONDS, get_department_queue, get_doctor_queue
+from services.visit_service import create_visit_orchestration
+
+# Upper bound on SQL statements issued by a single intake (reads + writes)
+MAX_STATEMENTS_PER_INTAKE = 16
+
+
+def _payload(**overrides) -> dict:
+    payload = {
+        "age": 45,
+        "gender": "Female",
+        "systolic_bp": 130,
+        "heart_rate": 80,
+        "temperature": 37.2,
+        "symptoms": ["cough", "fever"],
+        "chronic_conditions": ["asthma"],
+        "visit_type": "Walk-In",
+        "uploaded_documents": [],
+        "full_name": "Query Count",
+        "phone_number": "5550001",
+        "use_preferred_doctor": True,
+    }
+    payload.update(overrides)
+    return payload
+
+
+async def _setup(tmp_path, queued: int):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'intake.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    session_factory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False, autoflush=False)
+    async with session_factory() as db, db.begin():
+        dept_ids = {name: uuid.uuid4() for name in ("General Medicine", "Pulmonology", "Cardiology")}
+        db.add_all(Department(department_id=d_id, name=name) for name, d_id in dept_ids.items())
+        doctor_ids = []
+        for name, d_id in dept_ids.items():
+            user = User(user_id=uuid.uuid4(), full_name=f"{name} Doc", email=f"{name}@test", password_hash="x", role="Doctor")
+            doctor = Doctor(
+                doctor_id=uuid.uuid4(), user_id=user.user_id, department_id=d_id,
+                experience_years=10, shift_start="00:00", shift_end="23:59",
+            )
+            db.add_all([user, doctor])
+            doctor_ids.append(doctor.doctor_id)
+        for i in range(queued):
+            patient = Patient(
+                patient_id=uuid.uuid4(), age=30, gender="Male", symptoms="cough",
+                blood_pressure="120/0", heart_rate=70, temperature=37.0,
+            )
+            visit = Visit(visit_id=uuid.uuid4(), patient_id=patient.patient_id)
+            db.add_all([patient, visit])
+            for doctor_id in doctor_ids:
+                db.add(Queue(
+                    queue_id=uuid.uuid4(), visit_id=visit.visit_id, doctor_id=doctor_id,
+                    priority_score=10 + i, queue_position=i + 1,
+                ))
+    return engine, session_factory
+
+
+async def _count_intake(tmp_path, queued: int, **overrides) -> tuple[int, dict, list[str]]:
+    engine, session_factory = await _setup(tmp_path, queued)
+    statements = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", _record)
+    try:
+        async with session_factory() as db, db.begin():
+            result = await create_visit_orchestration(db, _payload(**overrides))
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", _record)
+
+    async with session_factory() as db:
+        audits = (await db.execute(select(func.count()).select_from(AuditLog))).scalar()
+        risk = (await db.execute(
+            select(Patient.risk_level).where(Patient.patient_id == uuid.UUID(result["patient_id"]))
+        )).scalar()
+    await engine.dispose()
+    return len(statements), {**result, "audits": audits, "stored_risk": risk}, statements
+
+
+def test_intake_statement_count_is_bounded(tmp_path):
+    timed_before = QUEUE_OPERATION_SECONDS.count(operation="insert_into_queue")
+    count, result, statements = asyncio.run(_count_intake(tmp_path, queued=0))
+    assert QUEUE_OPERATION_SECONDS.count(operation="insert_into_queue") == timed_before + 1
+    assert result["doctor_id"] is not None
+    assert result["audits"] == 1
+    assert result["stored_risk"] == result["risk_level"]
+    assert count <= MAX_STATEMENTS_PER_INTAKE, "\n".join(statements)
+    # Patient risk level is written with the row, never by a follow-up UPDATE
+    assert not any(s.startswith("UPDATE patients") for s in statements)
+
+
+def test_intake_statement_count_independent_of_queue_length(tmp_path):
+    (tmp_path / "empty").mkdir()
+    (tmp_path / "busy").mkdir()
+    empty_count, _, _ = asyncio.run(_count_intake(tmp_path / "empty", queued=0))
+    busy_count, result, _ = asyncio.run(_count_intake(tmp_path / "busy", queued=25))
+    assert result["queue_position"] >= 1
+    assert busy_count == empty_count
+
+
+def test_returning_patient_updated_in_single_statement(tmp_path):
+    async def _run():
+        engine, session_factory = await _setup(tmp_path, queued=0)
+        async with session_factory() as db, db.begin():
+            first = await create_visit_orchestration(db, _payload())
+        statements = []
+
+        def _record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine.sync_engine, "before_cursor_execute", _record)
+        async with session_factory() as db, db.begin():
+            await create_visit_orchestration(db, _payload(patient_id=first["patient_id"], heart_rate=120))
+        event.remove(engine.sync_engine, "before_cursor_execute", _record)
+        await engine.dispose()
+        return statements
+
+    statements = asyncio.run(_run())
+    assert sum(s.startswith("UPDATE patients") for s in statements) == 1
+    assert len(statements) <= MAX_STATEMENTS_PER_INTAKE
+
+
+def test_department_queue_is_one_query(tmp_path):
+    async def _run():
+        engine, session_factory = await _setup(tmp_path, queued=4)
+        async with session_factory() as db, db.begin():
+            department_id = (await db.execute(select(Department.department_id))).scalars().first()
+            doctor_id = (await db.execute(
+                select(Doctor.doctor_id).where(Doctor.department_id == department_id)
+            )).scalar()
+            # A second doctor in the department, sharing the first one's patients
+            user = User(user_id=uuid.uuid4(), full_name="Second Doc", email="second@test", password_hash="x", role="Doctor")
+            second = Doctor(
+                doctor_id=uuid.uuid4(), user_id=user.user_id, department_id=department_id,
+                experience_years=3, shift_start="00:00", shift_end="23:59",
+            )
+            db.add_all([user, second])
+            for visit_id in (await db.execute(select(Queue.visit_id).where(Queue.doctor_id == doctor_id))).scalars().all()[:2]:
+                db.add(Queue(queue_id=uuid.uuid4(), visit_id=visit_id, doctor_id=second.doctor_id, priority_score=50, queue_position=1))
+
+        statements = []
+
+        def _record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        async with session_factory() as db, db.begin():
+            event.listen(engine.sync_engine, "before_cursor_execute", _record)
+            merged = await get_department_queue(db, department_id)
+            event.remove(engine.sync_engine, "before_cursor_execute", _record)
+            per_doctor = [
+                {**item, "doctor_id": str(d_id)}
+                for d_id in (doctor_id, second.doctor_id)
+                for item in await get_doctor_queue(db, d_id)
+            ]
+        await engine.dispose()
+        return statements, merged, per_doctor
+
+    statements, merged, per_doctor = asyncio.run(_run())
+    assert len(statements) == 1
+    assert len(merged) == 6
+    key = lambda item: (item["doctor_id"], item["queue_id"])
+    assert sorted(merged, key=key) == sorted(per_doctor, key=key)
+    assert [item["dynamic_score"] for item in merged] == sorted((item["dynamic_score"] for item in merged), reverse=True)
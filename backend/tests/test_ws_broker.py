@@ -0,0 +1,103 @@
+import asyncio
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.ws_broker import WS_BROKER_MESSAGES, LocalBroker, PostgresBroker, SocketBroker, _SharedBroker, create_broker
+from services.ws_manager import WSManager
+from ws_fakes import FakeSocket, make_queue
+
+
+async def _wait_for(predicate, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+def test_updates_published_by_one_worker_reach_sockets_held_by_another():
+    async def scenario(directory):
+        loaded = []
+
+        async def loader(doctor_id):
+            loaded.append(doctor_id)
+            return make_queue(*map(str, range(100)))
+
+        workers = [WSManager(coalesce_seconds=0.01), WSManager(coalesce_seconds=0.01)]
+        for manager in workers:
+            await manager.start(broker=SocketBroker(directory, max_payload=2000), loader=loader)
+        here, there = FakeSocket(), FakeSocket()
+        try:
+            await workers[0].connect("doc-1", here, state=make_queue("a"))
+            await workers[1].connect("doc-1", there, state=make_queue("a"))
+            workers[0].publish("doc-1", {"event": "queue_reordered", "queue": make_queue("a", "b")})
+            await _wait_for(lambda: len(there.sent) == 3)
+            # too big for one datagram: worker 1 re-reads it from the database
+            workers[0].publish("doc-1", {"event": "queue_reordered", "queue": make_queue(*map(str, range(100)))})
+            await _wait_for(lambda: len(there.sent) == 4)
+            await asyncio.gather(*(m.flush() for m in workers))
+        finally:
+            for manager in workers:
+                await manager.stop()
+        return here, there, loaded, sorted(Path(directory).iterdir())
+
+    with tempfile.TemporaryDirectory() as directory:
+        here, there, loaded, left_over = asyncio.run(scenario(directory))
+    assert [m["event"] for m in here.sent] == ["connected", "queue_snapshot", "queue_reordered", "queue_reordered"]
+    assert [m["event"] for m in there.sent] == ["connected", "queue_snapshot", "queue_reordered", "queue_reordered"]
+    entry = {k: v for k, v in make_queue("a", "b")[1].items() if k != "position"}
+    assert there.sent[2]["ops"] == [{"op": "insert", "index": 1, "entry": entry}]
+    assert loaded == ["doc-1"]
+    assert left_over == []
+
+
+def test_unknown_broker_kind_is_rejected():
+    assert type(create_broker(None, "memory")) is LocalBroker
+    with pytest.raises(ValueError, match="redis"):
+        create_broker(None, "redis")
+
+
+def test_postgres_envelopes_drop_oversized_state_and_skip_their_own_origin():
+    async def scenario():
+        delivered = []
+
+        async def deliver(topic, message):
+            delivered.append((topic, message))
+
+        broker, other = PostgresBroker(None, max_payload=500), PostgresBroker(None, max_payload=500)
+        await LocalBroker.start(broker, deliver)  # no LISTEN connection: only the envelope handling
+        oversized = WS_BROKER_MESSAGES.value(direction="oversized")
+        small = other._encode("doc-1", {"event": "queue_reordered", "queue": make_queue("a")})
+        large = other._encode("doc-1", {"event": "queue_reordered", "queue": make_queue(*map(str, range(20)))})
+        counted = WS_BROKER_MESSAGES.value(direction="oversized") - oversized
+
+        broker._received(broker._encode("doc-1", {"event": "queue_reordered", "queue": []}))
+        broker._received(small)
+        broker._received(large)
+        await asyncio.gather(*broker._tasks)
+        return small, large, counted, delivered
+
+    small, large, counted, delivered = asyncio.run(scenario())
+    assert len(small.encode()) <= 500 and json.loads(small)["message"]["queue"] == make_queue("a")
+    # too big for NOTIFY: the receiver gets the event without the queue and reloads it
+    assert json.loads(large)["message"] == {"event": "queue_reordered"}
+    assert counted == 1
+    # the broker's own envelope is skipped; the other worker's two are delivered
+    assert delivered == [
+        ("doc-1", {"event": "queue_reordered", "queue": make_queue("a")}),
+        ("doc-1", {"event": "queue_reordered"}),
+    ]
+
+
+def test_shared_brokers_must_implement_send():
+    class NoTransport(_SharedBroker):
+        pass
+
+    with pytest.raises(TypeError, match="_send"):
+        NoTransport()
@@ -0,0 +1,254 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.queue_delta import apply_ops
+from services.ws_manager import WSManager, after_commit, department_topic, emergencies_topic
+from ws_fakes import FakeSocket, make_queue
+
+
+def test_a_burst_of_updates_is_sent_once():
+    async def scenario():
+        manager = WSManager(coalesce_seconds=0.02)
+        sockets = [FakeSocket(), FakeSocket()]
+        for ws in sockets:
+            await manager.connect("doc-1", ws, state=make_queue("a"))
+        await manager.flush()
+        for n in range(5):
+            manager.publish("doc-1", {"event": "queue_reordered", "queue": make_queue("a", f"new-{n}")})
+            await asyncio.sleep(0.005)
+        manager.publish("doc-2", {"event": "queue_reordered", "queue": []})  # nobody listening
+        await manager.flush()
+        return sockets
+
+    for ws in asyncio.run(scenario()):
+        snapshot, delta = ws.queue_messages()
+        assert snapshot["event"] == "queue_snapshot" and snapshot["queue"] == make_queue("a")
+        assert delta["event"] == "queue_reordered" and (delta["base"], delta["seq"]) == (1, 2)
+        assert delta["ops"] == [{"op": "insert", "index": 1, "entry": {"queue_id": "new-4", "patient_name": "Patient new-4"}}]
+
+
+def test_clients_rebuild_the_queue_from_deltas():
+    async def scenario():
+        manager = WSManager(coalesce_seconds=0)
+        ws = FakeSocket()
+        await manager.connect("doc-1", ws, state=make_queue("a", "b", "c"))
+        await manager.flush()
+        for ids in [("b", "a", "c"), ("b", "c"), ("d", "b", "c"), ("d", "b", "c")]:
+            await manager.broadcast("doc-1", {"event": "queue_reordered", "queue": make_queue(*ids)})
+            await manager.flush()
+        return ws
+
+    snapshot, *deltas = asyncio.run(scenario()).queue_messages()
+    assert [d["seq"] for d in deltas] == [2, 3, 4]  # the unchanged last update is not sent
+    queue = snapshot["queue"]
+    for delta in deltas:
+        queue = apply_ops(queue, delta["ops"])
+    assert queue == make_queue("d", "b", "c")
+
+
+def test_slow_clients_skip_to_a_snapshot():
+    async def scenario():
+        manager = WSManager(coalesce_seconds=0)
+        fast, slow = FakeSocket(), FakeSocket(send_delay=0.05)
+        await manager.connect("doc-1", fast, state=make_queue())
+        await manager.connect("doc-1", slow)
+        await manager.flush()
+        for n in range(4):
+            await manager.broadcast("doc-1", {"event": "queue_reordered", "queue": make_queue(*map(str, range(n + 1)))})
+            await asyncio.sleep(0.01)
+        await manager.flush()
+        return fast, slow
+
+    fast, slow = asyncio.run(scenario())
+    assert [m["seq"] for m in fast.queue_messages()] == [1, 2, 3, 4, 5]
+    assert [m["event"] for m in slow.queue_messages()] == ["queue_snapshot", "queue_reordered", "queue_snapshot"]
+    assert slow.queue_messages()[-1] == {
+        "event": "queue_snapshot", "topic": "doc-1", "seq": 5, "queue": make_queue("0", "1", "2", "3"),
+    }
+
+
+def test_updates_published_while_sending_are_not_lost():
+    async def scenario():
+        manager = WSManager(coalesce_seconds=0.01)
+        ws = FakeSocket()
+        await manager.connect("doc-1", ws, state=make_queue())
+        manager.publish("doc-1", {"event": "queue_reordered", "queue": make_queue("a")})
+        await asyncio.sleep(0.03)
+        manager.publish("doc-1", {"event": "queue_reordered", "queue": make_queue("a", "b")})
+        await manager.flush()
+        manager.resync(ws)
+        await manager.flush()
+        return ws
+
+    messages = asyncio.run(scenario()).queue_messages()
+    assert [m["seq"] for m in messages] == [1, 2, 3, 3]
+    assert messages[-1]["event"] == "queue_snapshot" and messages[-1]["queue"] == make_queue("a", "b")
+
+
+def test_slow_and_dead_sockets_are_evicted_without_delaying_the_others():
+    async def scenario():
+        manager = WSManager(coalesce_seconds=0, send_timeout=0.05, outbox_size=3)
+        fast, hung, dead, flooded = FakeSocket(), FakeSocket(send_delay=10), FakeSocket(fail=True), FakeSocket(send_delay=0.02)
+        for ws in (fast, hung, dead, flooded):
+            await manager.connect("doc-1", ws)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        for n in range(6):
+            await manager.broadcast("doc-1", {"event": "note", "n": n})
+            await asyncio.sleep(0.001)
+        fast_done = loop.time() - start
+        await manager.flush()
+        return manager, fast_done, (fast, hung, dead, flooded)
+
+    manager, fast_done, (fast, hung, dead, flooded) = asyncio.run(scenario())
+    assert [m["n"] for m in fast.sent if m["event"] == "note"] == list(range(6))
+    assert fast_done < 0.05  # never waited on the hung socket's timeout
+    assert manager.connections == {"doc-1": {fast}}
+    assert (hung.closed_with, dead.closed_with, flooded.closed_with) == (1013, 1013, 1013)
+    assert fast.closed_with is None
+
+
+def test_department_sockets_see_every_doctors_queue_merged():
+    async def scenario():
+        manager = WSManager(coalesce_seconds=0)
+        ws = FakeSocket()
+        merged = [{"queue_id": "x", "dynamic_score": 40, "doctor_id": "doc-2"}]
+        await manager.connect(department_topic("cardio"), ws, state=merged)
+        await manager.flush()
+        await manager._receive("doc-1", {
+            "event": "queue_reordered", "department_id": "cardio",
+            "queue": [{"queue_id": "a", "dynamic_score": 90}, {"queue_id": "b", "dynamic_score": 10}],
+        })
+        await manager.flush()
+        await manager._receive("doc-1", {
+            "event": "queue_reordered", "department_id": "cardio", "queue": [{"queue_id": "b", "dynamic_score": 10}],
+        })
+        await manager.flush()
+        return ws
+
+    ws = asyncio.run(scenario())
+    snapshot, *deltas = ws.queue_messages()
+    assert snapshot["topic"] == "department:cardio"
+    assert [d["doctor_id"] for d in deltas] == ["doc-1", "doc-1"]
+    queue = snapshot["queue"]
+    for delta in deltas:
+        queue = apply_ops(queue, delta["ops"])
+    assert [(e["queue_id"], e["doctor_id"]) for e in queue] == [("x", "doc-2"), ("b", "doc-1")]
+
+
+def test_emergency_alerts_reach_the_firehose_and_their_department():
+    async def scenario():
+        manager = WSManager(coalesce_seconds=0)
+        everything, cardio, neuro = FakeSocket(), FakeSocket(), FakeSocket()
+        await manager.connect(emergencies_topic(), everything)
+        await manager.connect(emergencies_topic("cardio"), cardio)
+        await manager.connect(emergencies_topic("neuro"), neuro)
+        for n in range(3):
+            alert = {"event": "emergency_alert", "alert_id": n, "department_id": "cardio"}
+            await manager.emit(emergencies_topic(), alert)
+            await manager.emit(emergencies_topic("cardio"), alert)
+        await manager.flush()
+        return everything, cardio, neuro
+
+    everything, cardio, neuro = asyncio.run(scenario())
+    assert [m["alert_id"] for m in everything.queue_messages()] == [0, 1, 2]  # never coalesced
+    assert [m["alert_id"] for m in cardio.queue_messages()] == [0, 1, 2]
+    assert neuro.queue_messages() == []
+
+
+def test_stats_subscribers_get_only_the_changed_fields():
+    async def scenario():
+        stats = {"total_visits": 10, "risk_distribution": {"High": 2}}
+        manager = WSManager(coalesce_seconds=0.01)
+
+        async def loader(topic):
+            return dict(stats)
+
+        await manager.start(loader=loader)
+        ws = FakeSocket()
+        await manager.connect("stats", ws, state=dict(stats))
+        stats["total_visits"] = 11
+        for _ in range(3):
+            manager.publish("stats", {"event": "stats_delta"})
+        await manager.flush()
+        return ws
+
+    snapshot, delta = asyncio.run(scenario()).queue_messages()
+    assert snapshot == {"event": "stats_snapshot", "topic": "stats", "seq": 1,
+                        "stats": {"total_visits": 10, "risk_distribution": {"High": 2}}}
+    assert delta == {"event": "stats_delta", "seq": 2, "base": 1, "changes": {"total_visits": 11}}
+
+
+def test_quiet_clients_are_pinged_and_silent_ones_evicted():
+    async def scenario():
+        manager = WSManager(coalesce_seconds=0, ping_interval=0.02, idle_timeout=0.07)
+        await manager.start()
+        answering, silent = FakeSocket(), FakeSocket()
+        await manager.connect("doc-1", answering)
+        await manager.connect("doc-1", silent)
+        for _ in range(10):
+            await asyncio.sleep(0.02)
+            if any(m["event"] == "ping" for m in answering.sent):
+                manager.touch(answering)  # the client's pong
+                answering.sent.clear()
+        connected = dict(manager.connections)
+        await manager.stop()
+        return connected, answering, silent
+
+    connected, answering, silent = asyncio.run(scenario())
+    assert connected == {"doc-1": {answering}}
+    assert silent.closed_with == 1001 and any(m["event"] == "ping" for m in silent.sent)
+    assert answering.closed_with == 1001  # by stop
+
+
+def test_stop_sends_pending_updates_then_closes_every_socket():
+    async def scenario():
+        manager = WSManager(coalesce_seconds=0.05)
+        sockets = [FakeSocket(), FakeSocket()]
+        await manager.connect("doc-1", sockets[0], state=make_queue("a"))
+        await manager.connect("stats", sockets[1], state={"total_visits": 1})
+        await manager.flush()
+        manager.publish("doc-1", {"event": "queue_reordered", "queue": make_queue("a", "b")})
+        await manager.stop()
+        return manager, sockets
+
+    manager, (doctor, stats) = asyncio.run(scenario())
+    assert [m["event"] for m in doctor.queue_messages()] == ["queue_snapshot", "queue_reordered"]
+    assert (doctor.closed_with, stats.closed_with) == (1001, 1001)
+    assert manager.connections == {}
+
+
+def test_notifications_are_published_only_after_the_commit():
+    async def scenario():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        sessions = async_sessionmaker(engine)
+        sent = []
+
+        async def alert():
+            sent.append("alert")
+
+        async with sessions() as db:
+            with pytest.raises(RuntimeError):
+                async with db.begin():
+                    after_commit(db, lambda: sent.append("rolled back"))
+                    raise RuntimeError("intake failed")
+            async with db.begin():
+                await db.execute(text("SELECT 1"))
+                after_commit(db, lambda: sent.append("stats"))
+                after_commit(db, alert)
+                before_commit = list(sent)
+        await asyncio.sleep(0)
+        await engine.dispose()
+        return before_commit, sent
+
+    before_commit, sent = asyncio.run(scenario())
+    assert before_commit == []
+    assert sent == ["stats", "alert"]
@@ -0,0 +1,30 @@
+"""Stand-ins shared by the WebSocket manager and broker tests."""
+import asyncio
+import json
+
+
+class FakeSocket:
+    def __init__(self, send_delay: float = 0.0, fail: bool = False):
+        self.send_delay = send_delay
+        self.fail = fail
+        self.sent = []
+        self.closed_with = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        await asyncio.sleep(self.send_delay)
+        if self.fail:
+            raise RuntimeError("connection reset")
+        self.sent.append(json.loads(text))
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+    def queue_messages(self):
+        return [m for m in self.sent if m["event"] != "connected"]
+
+
+def make_queue(*ids):
+    return [{"queue_id": q, "patient_name": f"Patient {q}", "position": i} for i, q in enumerate(ids, 1)]
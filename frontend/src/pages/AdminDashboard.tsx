@@ -1,4 +1,4 @@
-import React, { useEffect, useState } from 'react';
+import React, { useEffect, useRef, useState } from 'react';
 import { IonContent, IonPage, IonIcon } from '@ionic/react';
 import { statsChartOutline, peopleOutline, gitNetworkOutline } from 'ionicons/icons';
 // import { useHistory } from 'react-router-dom';
@@ -15,8 +15,34 @@ const AdminDashboard: React.FC = () => {
     const [stats, setStats] = useState<any>(null);
     const [loading, setLoading] = useState(true);
 
+    const statsSeq = useRef<number | null>(null);
+
     useEffect(() => {
         fetchStats();
+
+        // live figures: a snapshot on connect, then only the fields that changed
+        const ws = new WebSocket('ws://127.0.0.1:8000/ws/stats');
+        ws.onmessage = (evt) => {
+            try {
+                const msg = JSON.parse(evt.data);
+                if (msg.event === 'ping') {
+                    ws.send(JSON.stringify({ action: 'pong' }));
+                } else if (msg.event === 'stats_snapshot') {
+                    statsSeq.current = msg.seq;
+                    setStats(msg.stats);
+                    setLoading(false);
+                } else if (msg.event === 'stats_delta') {
+                    if (msg.base !== statsSeq.current) {
+                        ws.send(JSON.stringify({ action: 'resync' }));
+                        return;
+                    }
+                    statsSeq.current = msg.seq;
+                    setStats((prev: any) => ({ ...prev, ...msg.changes }));
+                }
+            } catch (e) { }
+        };
+
+        return () => { try { ws.close(); } catch (e) { } };
     }, []);
 
     const fetchStats = async () => {
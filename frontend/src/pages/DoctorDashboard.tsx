@@ -8,6 +8,7 @@ import {
 import { useHistory } from 'react-router-dom';
 import { playOutline, checkmarkDoneOutline, pulseOutline, timeOutline, personOutline, medkitOutline } from 'ionicons/icons';
 import api from '../api';
+import { applyQueueOps } from '../queueDelta';
 import './DoctorDashboard.css';
 
 interface QueueItem {
@@ -70,8 +71,10 @@ const DoctorDashboard: React.FC = () => {
         fetchQueue();
         connectWebSocket();
 
-        // Polling fallback every 30s
-        const interval = setInterval(fetchQueue, 30000);
+        // Polling fallback every 30s while the socket is down
+        const interval = setInterval(() => {
+            if (ws.current?.readyState !== WebSocket.OPEN) fetchQueue();
+        }, 30000);
         return () => {
             clearInterval(interval);
             if (ws.current) ws.current.close();
@@ -91,6 +94,9 @@ const DoctorDashboard: React.FC = () => {
     };
 
     const ws = useRef<WebSocket | null>(null);
+    const queueSeq = useRef<number | null>(null);
+    const queueRef = useRef<QueueItem[]>([]);
+    queueRef.current = queue;
 
     const connectWebSocket = () => {
         if (!doctorId) return;
@@ -110,11 +116,31 @@ const DoctorDashboard: React.FC = () => {
         ws.current.onmessage = (event) => {
             const data = JSON.parse(event.data);
             if (data.event === 'connected') return;
+            if (data.event === 'ping') {
+                // server heartbeat; a socket that never answers is closed as idle
+                ws.current?.send(JSON.stringify({ action: 'pong' }));
+                return;
+            }
 
-            // On any queue update, re-fetch the full queue to ensure consistency
-            // (Simpler than merging updates manually)
-            if (data.queue && Array.isArray(data.queue)) {
+            // A snapshot on connect (or resync), then deltas numbered by seq
+            if (data.event === 'queue_snapshot') {
+                queueSeq.current = data.seq;
                 setQueue(data.queue);
+                setLoading(false);
+                return;
+            }
+            if (Array.isArray(data.ops)) {
+                if (data.base !== queueSeq.current) {
+                    ws.current?.send(JSON.stringify({ action: 'resync' }));
+                    return;
+                }
+                const next = applyQueueOps(queueRef.current, data.ops);
+                if (next === null) {
+                    ws.current?.send(JSON.stringify({ action: 'resync' }));
+                    return;
+                }
+                queueSeq.current = data.seq;
+                setQueue(next);
                 return;
             }
 
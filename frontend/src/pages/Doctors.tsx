@@ -23,24 +23,29 @@ const Doctors: React.FC = () => {
                 setError('');
                 setLoading(false);
 
-                // open websocket for each doctor to receive live queue updates
-                docs.forEach((d: any) => {
+                // one websocket per department; its merged queue updates name the doctor they concern
+                const departments = Array.from(new Set(docs.map((d: any) => d.department_id).filter(Boolean))) as string[];
+                departments.forEach((deptId) => {
                     try {
-                        const ws = new WebSocket(`ws://127.0.0.1:8000/ws/doctor/${d.doctor_id}`);
-                        ws.onopen = () => console.log('ws open', d.doctor_id);
+                        const ws = new WebSocket(`ws://127.0.0.1:8000/ws/department/${deptId}`);
+                        ws.onopen = () => console.log('ws open', deptId);
                         ws.onmessage = (evt) => {
                             try {
                                 const msg = JSON.parse(evt.data);
-                                if (msg.event === 'queue_insert' || msg.event.startsWith('queue_')) {
+                                if (msg.event === 'ping') {
+                                    ws.send(JSON.stringify({ action: 'pong' }));
+                                    return;
+                                }
+                                if (msg.doctor_id && msg.event.startsWith('queue_')) {
                                     // indicate there is activity for this doctor
-                                    setDoctors(prev => prev.map((p: any) => p.doctor_id === d.doctor_id ? { ...p, _live_activity: true } : p));
+                                    setDoctors(prev => prev.map((p: any) => p.doctor_id === msg.doctor_id ? { ...p, _live_activity: true } : p));
                                 }
                             } catch (e) { }
                         };
-                        ws.onclose = () => { console.log('ws closed', d.doctor_id); };
-                        sockets[d.doctor_id] = ws;
+                        ws.onclose = () => { console.log('ws closed', deptId); };
+                        sockets[deptId] = ws;
                     } catch (err) {
-                        console.warn('WS failed for', d.doctor_id, err);
+                        console.warn('WS failed for', deptId, err);
                     }
                 });
             } catch (err) {
@@ -30,7 +30,7 @@ const PatientIntake: React.FC = () => {
     const [selectedConditions, setSelectedConditions] = useState<string[]>([]);
     const [uploadedFile, setUploadedFile] = useState<File | null>(null);
 
-    const [uploadedDocuments, setUploadedDocuments] = useState<string[]>([]);
+    const [ocrJobIds, setOcrJobIds] = useState<string[]>([]);
     const [uploading, setUploading] = useState(false);
     const [symptomOptions, setSymptomOptions] = useState<string[]>([]);
     const [conditionOptions, setConditionOptions] = useState<string[]>([]);
@@ -92,9 +92,9 @@ const PatientIntake: React.FC = () => {
                     headers: { 'Content-Type': undefined }
                 });
 
-                const { file_path, detected_conditions } = res.data;
+                const { job_id, detected_conditions } = res.data;
                 setUploadedFile(file);
-                setUploadedDocuments(prev => [...prev, file_path]);
+                setOcrJobIds(prev => [...prev, job_id]);
 
                 // Auto-fill from OCR
                 const newSymptoms = detected_conditions.symptoms || [];
@@ -161,7 +161,7 @@ const PatientIntake: React.FC = () => {
                 temperature,
                 visit_type: formData.visit_type,
                 chronic_conditions: selectedConditions,
-                uploaded_documents: uploadedDocuments
+                ocr_job_ids: ocrJobIds
             };
 
             const res = await api.post('/visits', payload);
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import {
     IonContent, IonPage, IonHeader, IonToolbar, IonTitle, IonButtons, IonButton,
     IonSegment, IonSegmentButton, IonLabel, IonItem, IonInput, IonList,
@@ -26,7 +26,7 @@ const RecipientDashboard: React.FC = () => {
     // File Upload State
     const [uploadedFile, setUploadedFile] = useState<File | null>(null);
     const [uploading, setUploading] = useState(false);
-    const [uploadedDocuments, setUploadedDocuments] = useState<string[]>([]);
+    const [ocrJobIds, setOcrJobIds] = useState<string[]>([]);
     const [isRefreshing, setIsRefreshing] = useState(false);
 
     // Symptom Autocomplete
@@ -41,6 +41,28 @@ const RecipientDashboard: React.FC = () => {
         }
     }, [segment]);
 
+    const segmentRef = useRef(segment);
+    segmentRef.current = segment;
+
+    useEffect(() => {
+        // emergency alerts are pushed as they are raised, by intake or by a risk override
+        const ws = new WebSocket('ws://127.0.0.1:8000/ws/emergencies');
+        ws.onmessage = (evt) => {
+            try {
+                const msg = JSON.parse(evt.data);
+                if (msg.event === 'ping') {
+                    ws.send(JSON.stringify({ action: 'pong' }));
+                    return;
+                }
+                if (msg.event !== 'emergency_alert') return;
+                setToastMsg(`Emergency: ${msg.patient_name || 'patient'} — ${msg.alert_message}`);
+                setShowToast(true);
+                if (segmentRef.current === 'visiting') loadVisitingPatients();
+            } catch (e) { }
+        };
+        return () => { try { ws.close(); } catch (e) { } };
+    }, []);
+
     const loadInitialPatients = async () => {
         try {
             const res = await api.get('/recipient/patients/search?q=');
@@ -156,9 +178,9 @@ const RecipientDashboard: React.FC = () => {
             data.append('file', file);
             try {
                 const res = await api.post('/documents/upload', data, { headers: { 'Content-Type': undefined } });
-                const { file_path, detected_conditions } = res.data;
+                const { job_id, detected_conditions } = res.data;
                 setUploadedFile(file);
-                setUploadedDocuments(prev => [...prev, file_path]);
+                setOcrJobIds(prev => [...prev, job_id]);
 
                 const newSymptoms = detected_conditions.symptoms || [];
                 const newConditions = detected_conditions.chronic_conditions || [];
@@ -222,7 +244,7 @@ const RecipientDashboard: React.FC = () => {
                 chronic_conditions: regForm.pre_existing_conditions.split(',').map(s => s.trim()).filter(s => s),
                 visit_type: 'Walk-In',
                 use_preferred_doctor: true,
-                uploaded_documents: uploadedDocuments
+                ocr_job_ids: ocrJobIds
             };
 
             await api.post('/visits', payload);
@@ -407,7 +429,7 @@ const RecipientDashboard: React.FC = () => {
                                 {uploadedFile && (
                                     <div style={{ marginTop: '1rem', display: 'inline-flex', alignItems: 'center', gap: '0.5rem', background: 'white', padding: '8px 16px', borderRadius: '20px', boxShadow: '0 2px 5px rgba(0,0,0,0.1)' }}>
                                         <span>📄 {uploadedFile.name}</span>
-                                        <IonIcon icon={closeCircle} onClick={() => { setUploadedFile(null); setUploadedDocuments([]) }} style={{ cursor: 'pointer', color: 'var(--color-danger)', fontSize: '1.2rem' }} />
+                                        <IonIcon icon={closeCircle} onClick={() => { setUploadedFile(null); setOcrJobIds([]) }} style={{ cursor: 'pointer', color: 'var(--color-danger)', fontSize: '1.2rem' }} />
                                     </div>
                                 )}
                             </div>
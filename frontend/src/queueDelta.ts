@@ -0,0 +1,28 @@
+// Applies queue deltas from /ws/doctor/{id} (see backend/services/queue_delta.py).
+// Removes and moves detach first, then inserts/moves go in by index, then patches.
+// Returns null when an op names an entry the list does not have: ask for a resync.
+
+export type QueueOp =
+    | { op: 'remove'; queue_id: string }
+    | { op: 'move'; queue_id: string; index: number }
+    | { op: 'insert'; index: number; entry: any }
+    | { op: 'patch'; queue_id: string; fields: Record<string, any> };
+
+export function applyQueueOps<T extends { queue_id: string }>(queue: T[], ops: QueueOp[]): T[] | null {
+    const byId = new Map<string, T>(queue.map(e => [e.queue_id, { ...e }]));
+    if (ops.some((o: any) => o.op !== 'insert' && !byId.has(o.queue_id))) return null;
+    const detached = new Set(ops.filter(o => o.op === 'remove' || o.op === 'move').map((o: any) => o.queue_id));
+    const result = [...byId.values()].filter(e => !detached.has(e.queue_id));
+    const placed = ops
+        .filter(o => o.op === 'insert' || o.op === 'move')
+        .sort((a: any, b: any) => a.index - b.index);
+    for (const o of placed as any[]) {
+        const entry = o.op === 'insert' ? { ...o.entry } : byId.get(o.queue_id);
+        result.splice(o.index, 0, entry);
+    }
+    const current = new Map(result.map(e => [e.queue_id, e]));
+    for (const o of ops) {
+        if (o.op === 'patch') Object.assign(current.get(o.queue_id) as any, o.fields);
+    }
+    return result.map((e, i) => ({ ...e, position: i + 1 }));
+}